@@ -0,0 +1,470 @@
+"""Benchmark every API route against synthetic catalogs.
+
+Drives the FastAPI app in-process (httpx ASGI transport) or over HTTP through
+a local uvicorn, on in-memory storage or on MongoDB (a real server given with
+--mongo-url, otherwise an in-process mongomock stand-in).  Reports throughput
+and p50/p95/p99 latency per route and can save the results as a JSON
+baseline that later runs are compared against.
+
+    python benchmark.py --sizes 1000,10000 --save benchmarks/baseline.json
+    python benchmark.py --sizes 1000,10000 --compare benchmarks/baseline.json
+
+Every (storage, transport, size) combination runs in a fresh subprocess, so
+module-level state in server.py never leaks from one run into the next.
+"""
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent
+RESULT_MARKER = "BENCHMARK_RESULT "
+
+CATEGORIES = ["Adventure", "Beach", "Cultural", "Luxury", "Family", "Wildlife", "Cruise", "City Break"]
+PLACES = [
+    ("Bali", "Indonesia"), ("Kyoto", "Japan"), ("Zermatt", "Switzerland"), ("Santorini", "Greece"),
+    ("Cusco", "Peru"), ("Marrakech", "Morocco"), ("Reykjavik", "Iceland"), ("Cape Town", "South Africa"),
+    ("Banff", "Canada"), ("Queenstown", "New Zealand"), ("Havana", "Cuba"), ("Hanoi", "Vietnam"),
+]
+WORDS = [
+    "temple", "beach", "mountain", "sunset", "hiking", "culture", "cuisine", "island", "safari", "glacier",
+    "market", "village", "festival", "lagoon", "volcano", "wine", "desert", "canyon", "reef", "castle",
+]
+
+# ==================== SYNTHETIC CATALOG ====================
+
+def sentence(rng, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+def make_package(rng, package_id: str) -> dict:
+    place, country = rng.choice(PLACES)
+    price = round(rng.uniform(300, 9000), 2)
+    return {
+        "id": package_id,
+        "title": f"{place} {sentence(rng, 2)}",
+        "description": sentence(rng, 24),
+        "price": price,
+        "originalPrice": round(price * rng.uniform(1.0, 1.3), 2),
+        "duration": f"{rng.randint(3, 21)} Days",
+        "destination": f"{place}, {country}",
+        "image": f"https://images.example.com/{package_id}.jpg",
+        "highlights": [sentence(rng, 3) for _ in range(4)],
+        "included": [sentence(rng, 2) for _ in range(3)],
+        "excluded": [sentence(rng, 2) for _ in range(2)],
+        "category": rng.choice(CATEGORIES),
+        "rating": round(rng.uniform(3.0, 5.0), 1),
+        "reviews": rng.randint(0, 5000),
+        "featured": rng.random() < 0.05,
+        "featuredOrder": 0,
+    }
+
+def make_post(rng, post_id: str, published_at: datetime) -> dict:
+    return {
+        "id": post_id,
+        "title": sentence(rng, 5),
+        "content": " ".join(sentence(rng, 12) for _ in range(20)),
+        "excerpt": sentence(rng, 16),
+        "author": rng.choice(["Sarah Johnson", "Mike Chen", "Ana Souza", "Tom Berg"]),
+        "image": f"https://images.example.com/{post_id}.jpg",
+        "category": rng.choice(CATEGORIES),
+        "tags": rng.sample(WORDS, 3),
+        "publishedAt": published_at,
+        "readTime": rng.randint(2, 15),
+    }
+
+def make_destination(rng, destination_id: str) -> dict:
+    place, country = rng.choice(PLACES)
+    now = datetime.utcnow()
+    return {
+        "id": destination_id,
+        "name": f"{place} {destination_id}",
+        "country": country,
+        "packages": rng.randint(0, 50),
+        "created_at": now,
+        "updated_at": now,
+    }
+
+async def load_catalog(server, size: int, seed: int, spare: int) -> dict:
+    """Write ``size`` packages and blog posts through the storage helpers
+
+    ``spare`` extra destinations (bench-dest-N) exist for the delete scenario.
+    """
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    packages = [make_package(rng, f"pkg-{n}") for n in range(size)]
+    posts = [make_post(rng, f"post-{n}", start + timedelta(hours=n)) for n in range(size)]
+    destinations = [make_destination(rng, f"dest-{n}") for n in range(max(size // 100, 10))]
+    destinations += [make_destination(rng, f"bench-dest-{n}") for n in range(spare)]
+    for collection_name, records in (("packages", packages), ("blog_posts", posts), ("destinations", destinations)):
+        for offset in range(0, len(records), 1000):
+            await server.bulk_save_records(collection_name, records[offset:offset + 1000], upsert=True)
+    await server.rebuild_search_index()
+    return {
+        "package_ids": [package["id"] for package in packages],
+        "post_ids": [post["id"] for post in posts],
+        "destination_ids": [destination["id"] for destination in destinations if destination["id"].startswith("dest-")],
+        "packages": packages,
+        "posts": posts,
+    }
+
+# ==================== SCENARIOS ====================
+
+# ``build(catalog, rng, i)`` returns (url, json body or None) for the i-th request
+Scenario = namedtuple("Scenario", "name method route build")
+
+def pick(rng, values):
+    return values[rng.randrange(len(values))]
+
+def new_package(catalog, rng, package_id):
+    return {**pick(rng, catalog["packages"]), "id": package_id}
+
+def new_post(catalog, rng, post_id):
+    return {**pick(rng, catalog["posts"]), "id": post_id, "publishedAt": datetime.utcnow().isoformat()}
+
+def package_query(catalog, rng, i):
+    params = [f"category={pick(rng, CATEGORIES)}", "sort=-rating", "limit=20"]
+    if i % 2:
+        params.append(f"min_price={rng.randint(500, 3000)}")
+    return f"/api/packages?{'&'.join(params)}", None
+
+SCENARIOS = [
+    # Service
+    Scenario("root", "GET", "/api/", lambda c, r, i: ("/api/", None)),
+    Scenario("health", "GET", "/api/health", lambda c, r, i: ("/api/health", None)),
+    Scenario("ready", "GET", "/api/ready", lambda c, r, i: ("/api/ready", None)),
+    Scenario("metrics", "GET", "/api/metrics", lambda c, r, i: ("/api/metrics", None)),
+    Scenario("admin_cache", "GET", "/api/admin/cache", lambda c, r, i: ("/api/admin/cache", None)),
+    # Public reads
+    Scenario("homepage", "GET", "/api/homepage", lambda c, r, i: ("/api/homepage", None)),
+    Scenario("homepage_full", "GET", "/api/homepage/full", lambda c, r, i: ("/api/homepage/full", None)),
+    Scenario("featured_packages", "GET", "/api/featured-packages", lambda c, r, i: ("/api/featured-packages", None)),
+    Scenario("packages_all", "GET", "/api/packages", lambda c, r, i: ("/api/packages", None)),
+    Scenario("packages_filtered", "GET", "/api/packages", package_query),
+    Scenario("packages_summary_page", "GET", "/api/packages",
+             lambda c, r, i: (f"/api/packages?view=summary&sort=price&limit=50&min_price={r.randint(300, 8000)}", None)),
+    Scenario("blog_page", "GET", "/api/blog", lambda c, r, i: ("/api/blog?limit=20&view=summary", None)),
+    Scenario("blog_all", "GET", "/api/blog", lambda c, r, i: ("/api/blog", None)),
+    Scenario("blog_latest", "GET", "/api/blog/latest", lambda c, r, i: (f"/api/blog/latest?n={r.randint(1, 10)}", None)),
+    Scenario("search", "GET", "/api/search",
+             lambda c, r, i: (f"/api/search?q={pick(r, WORDS)}+{pick(r, WORDS)[:3]}&limit=10", None)),
+    Scenario("destinations", "GET", "/api/destinations", lambda c, r, i: ("/api/destinations", None)),
+    Scenario("destinations_page", "GET", "/api/destinations", lambda c, r, i: ("/api/destinations?limit=20", None)),
+    Scenario("destination", "GET", "/api/destinations/{destination_id}",
+             lambda c, r, i: (f"/api/destinations/{pick(r, c['destination_ids'])}", None)),
+    # Admin reads
+    Scenario("admin_homepage", "GET", "/api/admin/homepage", lambda c, r, i: ("/api/admin/homepage", None)),
+    Scenario("admin_packages_page", "GET", "/api/admin/packages", lambda c, r, i: ("/api/admin/packages?limit=50", None)),
+    Scenario("admin_blog_page", "GET", "/api/admin/blog", lambda c, r, i: ("/api/admin/blog?limit=50", None)),
+    Scenario("admin_featured", "GET", "/api/admin/featured-packages",
+             lambda c, r, i: ("/api/admin/featured-packages", None)),
+    # Admin writes
+    Scenario("admin_homepage_patch", "PATCH", "/api/admin/homepage/{section}",
+             lambda c, r, i: ("/api/admin/homepage/hero", {"title": f"Benchmark hero {i}"})),
+    Scenario("admin_package_create", "POST", "/api/admin/packages",
+             lambda c, r, i: ("/api/admin/packages", new_package(c, r, f"bench-pkg-{i}"))),
+    Scenario("admin_package_update", "PUT", "/api/admin/packages/{package_id}",
+             lambda c, r, i: (f"/api/admin/packages/bench-pkg-{i}", new_package(c, r, f"bench-pkg-{i}"))),
+    Scenario("admin_featured_add", "POST", "/api/admin/featured-packages/add",
+             lambda c, r, i: (f"/api/admin/featured-packages/add?package_id=bench-pkg-{i}", None)),
+    Scenario("admin_featured_remove", "DELETE", "/api/admin/featured-packages/remove/{package_id}",
+             lambda c, r, i: (f"/api/admin/featured-packages/remove/bench-pkg-{i}", None)),
+    Scenario("admin_featured_reorder", "PUT", "/api/admin/featured-packages/reorder",
+             lambda c, r, i: ("/api/admin/featured-packages/reorder", r.sample(c["package_ids"][:50], 3))),
+    Scenario("admin_featured_put", "PUT", "/api/admin/featured-packages",
+             lambda c, r, i: ("/api/admin/featured-packages", {
+                 "title": "Popular Destinations", "description": f"Benchmark {i}",
+                 "packageIds": r.sample(c["package_ids"][:50], 3)})),
+    Scenario("admin_package_delete", "DELETE", "/api/admin/packages/{package_id}",
+             lambda c, r, i: (f"/api/admin/packages/bench-pkg-{i}", None)),
+    Scenario("admin_blog_create", "POST", "/api/admin/blog",
+             lambda c, r, i: ("/api/admin/blog", new_post(c, r, f"bench-post-{i}"))),
+    Scenario("admin_blog_update", "PUT", "/api/admin/blog/{post_id}",
+             lambda c, r, i: (f"/api/admin/blog/bench-post-{i}", new_post(c, r, f"bench-post-{i}"))),
+    Scenario("admin_blog_delete", "DELETE", "/api/admin/blog/{post_id}",
+             lambda c, r, i: (f"/api/admin/blog/bench-post-{i}", None)),
+    Scenario("admin_packages_bulk", "POST", "/api/admin/packages/bulk",
+             lambda c, r, i: ("/api/admin/packages/bulk", [new_package(c, r, f"bench-bulk-{i}-{k}") for k in range(50)])),
+    Scenario("admin_packages_bulk_delete", "POST", "/api/admin/packages/bulk-delete",
+             lambda c, r, i: ("/api/admin/packages/bulk-delete", [f"bench-bulk-{i}-{k}" for k in range(50)])),
+    Scenario("admin_blog_bulk", "POST", "/api/admin/blog/bulk",
+             lambda c, r, i: ("/api/admin/blog/bulk", [new_post(c, r, f"bench-bulk-{i}-{k}") for k in range(50)])),
+    Scenario("admin_blog_bulk_delete", "POST", "/api/admin/blog/bulk-delete",
+             lambda c, r, i: ("/api/admin/blog/bulk-delete", [f"bench-bulk-{i}-{k}" for k in range(50)])),
+    Scenario("admin_destinations_bulk", "POST", "/api/admin/destinations/bulk",
+             lambda c, r, i: ("/api/admin/destinations/bulk",
+                              [{"id": f"bench-bulk-{i}-{k}", "name": f"Bulk {k}", "country": "Norway"} for k in range(50)])),
+    Scenario("admin_destinations_bulk_delete", "POST", "/api/admin/destinations/bulk-delete",
+             lambda c, r, i: ("/api/admin/destinations/bulk-delete", [f"bench-bulk-{i}-{k}" for k in range(50)])),
+    Scenario("destination_create", "POST", "/api/destinations",
+             lambda c, r, i: ("/api/destinations", {"name": f"Bench {i}", "country": "Norway"})),
+    Scenario("destination_update", "PUT", "/api/destinations/{destination_id}",
+             lambda c, r, i: (f"/api/destinations/{pick(r, c['destination_ids'])}", {"name": f"Renamed {i}"})),
+    Scenario("destination_delete", "DELETE", "/api/destinations/{destination_id}",
+             lambda c, r, i: (f"/api/destinations/bench-dest-{i}", None)),
+    Scenario("admin_homepage_put", "PUT", "/api/admin/homepage",
+             lambda c, r, i: ("/api/admin/homepage", c["homepage"])),
+    # Legacy
+    Scenario("status_create", "POST", "/api/status", lambda c, r, i: ("/api/status", {"client_name": f"bench-{i % 20}"})),
+    Scenario("status_page", "GET", "/api/status", lambda c, r, i: ("/api/status?limit=50", None)),
+    Scenario("status_summary", "GET", "/api/status/summary", lambda c, r, i: ("/api/status/summary?minutes=60", None)),
+]
+
+# Routes that cannot be exercised without extra configuration
+EXCLUDED_ROUTES = {
+    ("GET", "/api/admin/profiles"),  # needs PROFILE_TOKEN
+    ("GET", "/api/admin/profiles/{profile_id}"),
+}
+
+def uncovered_routes(app):
+    """API routes that no scenario exercises, so new endpoints don't silently go unmeasured"""
+    from fastapi.routing import APIRoute
+    covered = {(scenario.method, scenario.route) for scenario in SCENARIOS} | EXCLUDED_ROUTES
+    return sorted(
+        f"{method} {route.path}"
+        for route in app.routes if isinstance(route, APIRoute)
+        for method in route.methods if (method, route.path) not in covered
+    )
+
+# ==================== MEASUREMENT ====================
+
+def percentile(sorted_values, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+def summarize(latencies, errors: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+async def measure(client, scenario: Scenario, catalog: dict, requests: int, concurrency: int, warmup: int, seed: int):
+    """Run ``warmup`` unmeasured then ``requests`` measured calls with ``concurrency`` workers"""
+    rng = random.Random(f"{seed}:{scenario.name}")
+    for i in range(warmup):
+        url, body = scenario.build(catalog, rng, requests + i)
+        await client.request(scenario.method, url, json=body)
+    requests_left = iter(range(requests))
+    latencies, errors = [], 0
+
+    async def worker():
+        nonlocal errors
+        for i in requests_left:
+            url, body = scenario.build(catalog, rng, i)
+            start = time.perf_counter()
+            response = await client.request(scenario.method, url, json=body)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@contextlib.asynccontextmanager
+async def open_client(app, transport: str):
+    """httpx client talking to ``app`` in-process or through a local uvicorn"""
+    import httpx
+    if transport == "asgi":
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark") as client:
+                yield client
+        return
+    import uvicorn
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False))
+    serve_task = asyncio.create_task(server.serve())
+    while not server.started:
+        if serve_task.done():
+            serve_task.result()
+        await asyncio.sleep(0.01)
+    try:
+        limits = httpx.Limits(max_connections=64, max_keepalive_connections=64)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits) as client:
+            yield client
+    finally:
+        server.should_exit = True
+        await serve_task
+
+def patch_mongo_standin(server):
+    """Point the server at an in-process mongomock database instead of a real MongoDB"""
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        sys.exit("The MongoDB stand-in needs mongomock-motor (pip install mongomock-motor), or pass --mongo-url")
+    database = AsyncMongoMockClient()["benchmark"]
+
+    async def connect_to_standin():
+        return database
+
+    server.connect_to_mongo = connect_to_standin
+
+async def run_combination(storage: str, transport: str, size: int, args) -> dict:
+    """Benchmark every selected scenario for one storage/transport/catalog size"""
+    os.environ["LOCAL_STORE_DIR"] = ""
+    os.environ["WRITE_BEHIND_JOURNAL"] = str(Path(tempfile.mkdtemp()) / "write_behind.jsonl")
+    if storage == "memory":
+        os.environ["MONGO_URL"] = ""
+    elif args.mongo_url:
+        os.environ["MONGO_URL"] = args.mongo_url
+        os.environ["DB_NAME"] = f"benchmark_{size}_{os.getpid()}"
+    sys.path.insert(0, str(ROOT_DIR))
+    import server
+    if storage == "mongo" and not args.mongo_url:
+        patch_mongo_standin(server)
+
+    async with open_client(server.app, transport) as client:
+        while not server.startup_state["seeded"]:
+            await asyncio.sleep(0.01)
+        expected = "in_memory" if storage == "memory" else "connected"
+        if server.startup_state["database"] != expected:
+            raise RuntimeError(f"Expected {expected} storage, got {server.startup_state['database']}")
+        catalog = await load_catalog(server, size, args.seed, args.requests + args.warmup)
+        catalog["homepage"] = (await client.get("/api/admin/homepage")).json()
+        results = {}
+        for scenario in SCENARIOS:
+            if args.routes and not any(selected in scenario.name for selected in args.routes):
+                continue
+            results[scenario.name] = await measure(
+                client, scenario, catalog, args.requests, args.concurrency, args.warmup, args.seed
+            )
+        if storage == "mongo" and args.mongo_url:
+            await server.client.drop_database(os.environ["DB_NAME"])
+    return {"results": results, "uncovered_routes": uncovered_routes(server.app)}
+
+# ==================== REPORTING ====================
+
+def print_table(combination: str, results: dict):
+    print(f"\n== {combination}")
+    print(f"{'route':<32}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, stats in results.items():
+        print(f"{name:<32}{stats['rps']:>10.1f}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+              f"{stats['p99_ms']:>10.2f}{stats['errors']:>8}")
+
+def compare(current: dict, baseline: dict, tolerance: float, min_delta_ms: float):
+    """Regressions of ``current`` against ``baseline``: slower p50/p95, lower throughput or new errors"""
+    regressions = []
+    for combination, routes in baseline["results"].items():
+        for name, before in routes.items():
+            after = current["results"].get(combination, {}).get(name)
+            if after is None:
+                continue
+            for metric in ("p50_ms", "p95_ms"):
+                if after[metric] > before[metric] * (1 + tolerance) and after[metric] - before[metric] > min_delta_ms:
+                    regressions.append(f"{combination} {name}: {metric} {before[metric]} -> {after[metric]}")
+            if after["rps"] < before["rps"] * (1 - tolerance):
+                regressions.append(f"{combination} {name}: rps {before['rps']} -> {after['rps']}")
+            if after["errors"] > before["errors"]:
+                regressions.append(f"{combination} {name}: errors {before['errors']} -> {after['errors']}")
+    return regressions
+
+def run_worker(combination: str, argv) -> dict:
+    """Run one combination in a fresh interpreter and return its parsed results"""
+    completed = subprocess.run(
+        [sys.executable, __file__, "--worker", combination, *argv],
+        cwd=ROOT_DIR, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+    )
+    for line in completed.stdout.splitlines():
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+    sys.stderr.write(completed.stderr[-4000:])
+    raise RuntimeError(f"Benchmark worker {combination} failed with exit code {completed.returncode}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    split = lambda value: [item for item in value.split(",") if item]
+    parser.add_argument("--storage", type=split, default=["memory", "mongo"], help="memory,mongo")
+    parser.add_argument("--transport", type=split, default=["asgi", "uvicorn"], help="asgi,uvicorn")
+    parser.add_argument("--sizes", type=lambda value: [int(size) for size in split(value)], default=[1000, 10000, 100000],
+                        help="catalog sizes (packages and blog posts each)")
+    parser.add_argument("--routes", type=split, default=[], help="only scenarios whose name contains one of these")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per route")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mongo-url", help="benchmark a real MongoDB instead of the mongomock stand-in")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON to compare against; exits 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore latency changes smaller than this")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = parse_args(argv)
+    if args.worker:
+        storage, transport, size = args.worker.split(":")
+        result = asyncio.run(run_combination(storage, transport, int(size), args))
+        print(RESULT_MARKER + json.dumps(result))
+        return 0
+
+    report = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "mongo": "server" if args.mongo_url else "mongomock",
+        },
+        "results": {},
+    }
+    worker_argv = [
+        "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+        "--warmup", str(args.warmup), "--seed", str(args.seed), "--routes", ",".join(args.routes),
+    ]
+    if args.mongo_url:
+        worker_argv += ["--mongo-url", args.mongo_url]
+    for storage, transport, size in itertools.product(args.storage, args.transport, args.sizes):
+        combination = f"{storage}:{transport}:{size}"
+        outcome = run_worker(combination, worker_argv)
+        report["results"][combination] = outcome["results"]
+        report["meta"]["uncovered_routes"] = outcome["uncovered_routes"]
+        print_table(combination, outcome["results"])
+
+    if report["meta"].get("uncovered_routes"):
+        print(f"\nRoutes without a scenario: {', '.join(report['meta']['uncovered_routes'])}")
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save).write_text(json.dumps(report, indent=2))
+        print(f"\nSaved results to {args.save}")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(report, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("\nNo regressions against baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
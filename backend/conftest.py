@@ -0,0 +1,105 @@
+import asyncio
+import copy
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+from pymongo.errors import AutoReconnect
+
+# server reads its configuration at import time
+os.environ["MONGO_URL"] = "invalid://tests"  # connect_to_mongo is replaced per test
+os.environ["LOCAL_STORE_DIR"] = ""
+os.environ["PROFILE_TOKEN"] = ""
+_scratch = Path(tempfile.mkdtemp(prefix="backend-tests-"))
+os.environ["WRITE_BEHIND_JOURNAL"] = str(_scratch / "write_behind.jsonl")
+os.environ["WRITE_BEHIND_DEAD_LETTER"] = str(_scratch / "write_behind_dead_letter.jsonl")
+sys.path.insert(0, str(Path(__file__).parent))
+
+import server  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+# Diagnostic script, run directly with python
+collect_ignore = ["test_destinations.py"]
+
+
+def wait_for(predicate, timeout: float = 5.0):
+    """Poll ``predicate`` until it is true or fail after ``timeout`` seconds"""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached in time")
+        time.sleep(0.005)
+
+
+PING_MONGO = server.ping_mongo
+
+
+def start_outage(client, monkeypatch):
+    """Make the breaker probe fail and open the breaker, as repeated connection errors would"""
+    async def unreachable():
+        raise AutoReconnect("mongo down")
+
+    async def trip():
+        server.mongo_breaker.last_error = "mongo down"
+        server.mongo_breaker.trip()
+
+    monkeypatch.setattr(server, "ping_mongo", unreachable)
+    client.portal.call(trip)
+
+
+def end_outage(monkeypatch):
+    """Let the probe reach MongoDB again and wait for the breaker to close"""
+    monkeypatch.setattr(server, "ping_mongo", PING_MONGO)
+    wait_for(lambda: server.mongo_breaker.state == server.mongo_breaker.CLOSED)
+
+
+@pytest.fixture(params=["memory", "mongo"])
+def backend(request):
+    """Storage backend the app runs on; a test module overrides it to pin one"""
+    return request.param
+
+
+@pytest.fixture
+def client(backend, monkeypatch, tmp_path):
+    """A started app on fresh storage: in-memory only, or MongoDB (mongomock)"""
+    mongo = AsyncMongoMockClient()["tests"] if backend == "mongo" else None
+
+    async def connect_to_mongo():
+        return mongo
+
+    async def probe():
+        # Looked up on each call so tests can simulate an outage
+        await server.ping_mongo()
+
+    monkeypatch.setattr(server, "connect_to_mongo", connect_to_mongo)
+    monkeypatch.setattr(server, "db", None)
+    monkeypatch.setattr(server, "startup_state", {"ready": False, "database": "connecting", "seeded": False})
+    monkeypatch.setattr(server, "write_behind_journal", server.AppendOnlyLog(tmp_path / "journal.jsonl", 0.001))
+    monkeypatch.setattr(server, "dead_letter_log", server.AppendOnlyLog(tmp_path / "dead_letter.jsonl", 0.001))
+    monkeypatch.setattr(server, "replay_lock", asyncio.Lock())
+    monkeypatch.setattr(server, "replay_scheduled", False)
+    monkeypatch.setattr(server, "homepage_lock", asyncio.Lock())
+    monkeypatch.setattr(server, "mongo_breaker", server.CircuitBreaker(
+        probe,
+        failure_threshold=3,
+        failure_window=30.0,
+        probe_interval=0.01,
+        probe_successes=1,
+        on_recover=server.replay_write_behind_journal,
+        on_switch=server.mark_all_collections_dirty,
+    ))
+    monkeypatch.setattr(server, "status_buffer", server.StatusIngestBuffer(
+        batch_size=50, flush_interval=0.005, max_pending=1000, enqueue_timeout=0.1,
+    ))
+    monkeypatch.setattr(server, "destination_counts", server.DestinationCounts())
+    monkeypatch.setattr(server, "status_rollups", server.StatusRollups())
+    monkeypatch.setitem(server.in_memory_data, "homepage", copy.deepcopy(server.default_homepage_data))
+    server.seed_memory_data()
+    server.response_cache.clear()
+    with TestClient(server.app) as test_client:
+        wait_for(lambda: server.startup_state["seeded"])
+        yield test_client
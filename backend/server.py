@@ -1,44 +1,82 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Request, Response, Query
+from fastapi.encoders import jsonable_encoder
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring, ASCENDING, DESCENDING, ReplaceOne, UpdateOne, DeleteOne, ReturnDocument
+from pymongo.errors import BulkWriteError, ConnectionFailure, OperationFailure
 import os
 import logging
+import asyncio
+import copy
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Optional, Union
 import uuid
-from datetime import datetime
+import time
+import hashlib
+import base64
+import json
+import re
+import math
+import heapq
+import mmap
+import marshal
+import cProfile
+import pstats
+import io
+import hmac
+import functools
+import contextvars
+import threading
+import gzip
+from itertools import islice
+from urllib.parse import parse_qs
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, timezone
 
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection - use local MongoDB or create one if not exists
-try:
-    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-    client = AsyncIOMotorClient(mongo_url)
-    db = client[os.environ.get('DB_NAME', 'travel_company_db')]
-    # Test connection
-    client.admin.command('ping')
-    logger.info("✅ Connected to MongoDB")
-except Exception as e:
-    logger.warning(f"⚠️ MongoDB connection failed: {e}")
-    logger.info("🔄 Using in-memory storage for development")
-    # Fallback to in-memory storage
-    db = None
-
-# MongoDB connection status
-if db:
-    logger.info("✅ Using MongoDB for persistent storage")
-else:
-    logger.warning("⚠️ Using in-memory storage (data will not persist)")
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# MongoDB connection - the client is created and pinged in the background after
+# startup (see initialize_storage); until then reads are served from in-memory
+# storage and writes are refused, and if MongoDB cannot be reached within the
+# timeout everything is served from in-memory storage.  An empty MONGO_URL
+# selects in-memory storage up front, without a connection attempt.
+MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+DB_NAME = os.environ.get('DB_NAME', 'travel_company_db')
+MONGO_TIMEOUT_MS = int(os.environ.get('MONGO_TIMEOUT_MS', '2000'))
+
+client = None
+db = None
+
+# Startup progress reported by /api/ready
+startup_state = {"ready": False, "database": "connecting", "seeded": False}
+background_tasks = set()
 
 # Create the main app without a prefix
 app = FastAPI(title="Travel Company API", version="1.0.0")
 
+async def require_storage_ready(request: Request):
+    """Refuse writes until the storage backend has been chosen and loaded
+
+    A write accepted earlier would go to in-memory data that startup then
+    replaces, or to no journal at all, and be lost.
+    """
+    if request.method not in ("GET", "HEAD", "OPTIONS") and not startup_state["ready"]:
+        raise HTTPException(status_code=503, detail="Storage is starting", headers={"Retry-After": "1"})
+
 # Create a router with the /api prefix
-api_router = APIRouter(prefix="/api")
+api_router = APIRouter(prefix="/api", dependencies=[Depends(require_storage_ready)])
 
 # ==================== DATA MODELS ====================
 
@@ -138,6 +176,14 @@ class DestinationUpdate(BaseModel):
     name: Optional[str] = None
     country: Optional[str] = None
 
+class DestinationPage(BaseModel):
+    items: List[Destination]
+    next: Optional[str] = None
+
+class StatusCheckPage(BaseModel):
+    items: List[StatusCheck]
+    next: Optional[str] = None
+
 # ==================== IN-MEMORY STORAGE (Fallback) ====================
 
 # Default homepage data
@@ -198,50 +244,42 @@ sample_destinations = [
     {
         "id": "1",
         "name": "Bali",
-        "country": "Indonesia",
-        "packages": 8
+        "country": "Indonesia"
     },
     {
         "id": "2",
         "name": "Tokyo",
-        "country": "Japan",
-        "packages": 12
+        "country": "Japan"
     },
     {
         "id": "3",
         "name": "Paris",
-        "country": "France",
-        "packages": 15
+        "country": "France"
     },
     {
         "id": "4",
         "name": "Interlaken",
-        "country": "Switzerland",
-        "packages": 6
+        "country": "Switzerland"
     },
     {
         "id": "5",
         "name": "Serengeti",
-        "country": "Tanzania",
-        "packages": 4
+        "country": "Tanzania"
     },
     {
         "id": "6",
         "name": "Maldives",
-        "country": "Maldives",
-        "packages": 10
+        "country": "Maldives"
     },
     {
         "id": "7",
         "name": "Mumbai",
-        "country": "India",
-        "packages": 5
+        "country": "India"
     },
     {
         "id": "8",
         "name": "Delhi",
-        "country": "India",
-        "packages": 7
+        "country": "India"
     }
 ]
 
@@ -303,67 +341,2492 @@ sample_packages = [
     }
 ]
 
+def naive_utc(value):
+    """Timezone-aware datetimes as naive UTC, the way MongoDB returns them"""
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def normalize_datetimes(record: dict):
+    """Convert the record's top-level datetimes to naive UTC in place"""
+    for field, value in record.items():
+        if isinstance(value, datetime) and value.tzinfo is not None:
+            record[field] = naive_utc(value)
+    return record
+
+def sort_key(value, record_id):
+    """Ordering key shared by in-memory sorted indexes and pagination cursors
+
+    Missing values sort first, as null does in MongoDB.
+    """
+    value = naive_utc(value)
+    return ((value is not None, value), record_id)
+
+class InMemoryCollection:
+    """Id-indexed record store used when MongoDB is unavailable.
+
+    Records live in a dict keyed by ``id`` (insertion order preserved), so
+    point lookups, updates and deletes are O(1).  Optional secondary indexes
+    map a field value to the ordered set of ids holding it, and sorted
+    indexes keep ``(value, id)`` keys in order for keyset pagination.
+    """
+
+    def __init__(self, records=(), indexes=(), sorted_fields=("id",)):
+        self._records = {}
+        self._indexes = {field: {} for field in indexes}
+        self._sorted = {field: [] for field in sorted_fields}
+        for record in records:
+            self.insert(record)
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records.values())
+
+    def __contains__(self, record_id):
+        return record_id in self._records
+
+    def _index_add(self, record):
+        """Index a record; on failure nothing of it is left in the indexes"""
+        try:
+            for field, index in self._indexes.items():
+                index.setdefault(record.get(field), {})[record["id"]] = None
+            for field, keys in self._sorted.items():
+                insort(keys, sort_key(record.get(field), record["id"]))
+        except Exception:
+            self._index_remove(record)
+            raise
+
+    def _index_remove(self, record):
+        for field, index in self._indexes.items():
+            value = record.get(field)
+            ids = index.get(value)
+            if ids is not None:
+                ids.pop(record["id"], None)
+                if not ids:
+                    del index[value]
+        for field, keys in self._sorted.items():
+            key = sort_key(record.get(field), record["id"])
+            try:
+                position = bisect_left(keys, key)
+            except TypeError:
+                # A value that does not compare with the others was never inserted
+                if key in keys:
+                    keys.remove(key)
+                continue
+            if position < len(keys) and keys[position] == key:
+                del keys[position]
+
+    def all(self):
+        """Return all records in insertion order"""
+        return list(self._records.values())
+
+    def get(self, record_id, default=None):
+        """Return the record with the given id"""
+        return self._records.get(record_id, default)
+
+    def get_many(self, record_ids):
+        """Return the records for the given ids in that order, skipping missing ones"""
+        records = self._records
+        return [records[record_id] for record_id in record_ids if record_id in records]
+
+    def find_by(self, field, value):
+        """Return the records whose indexed ``field`` equals ``value``"""
+        ids = self._indexes[field].get(value, {})
+        return [self._records[record_id] for record_id in ids]
+
+    def _replace(self, existing, record):
+        """Swap ``existing`` (or None) for ``record``; indexed first, stored only if that worked"""
+        normalize_datetimes(record)
+        if existing is not None:
+            self._index_remove(existing)
+        try:
+            self._index_add(record)
+        except Exception:
+            if existing is not None:
+                self._index_add(existing)
+            raise
+        self._records[record["id"]] = record
+
+    def insert(self, record):
+        """Add a record, replacing any existing record with the same id"""
+        if record.get("id") is None:
+            record["id"] = str(uuid.uuid4())
+        self._replace(self._records.get(record["id"]), record)
+        return record
+
+    def update(self, record_id, record):
+        """Replace an existing record in place; returns False if it does not exist"""
+        existing = self._records.get(record_id)
+        if existing is None:
+            return False
+        record["id"] = record_id
+        self._replace(existing, record)
+        return True
+
+    def patch(self, record_id, fields):
+        """Merge ``fields`` into an existing record; returns the record or None"""
+        existing = self._records.get(record_id)
+        if existing is None:
+            return None
+        self._replace(existing, {**existing, **fields, "id": record_id})
+        return self._records[record_id]
+
+    def delete(self, record_id):
+        """Remove a record; returns the removed record or None"""
+        record = self._records.pop(record_id, None)
+        if record is not None:
+            self._index_remove(record)
+        return record
+
+    def has_index(self, field):
+        return field in self._indexes
+
+    def has_sorted_index(self, field):
+        return field in self._sorted
+
+    def count_by(self, field, value):
+        """Number of records whose indexed ``field`` equals ``value``"""
+        return len(self._indexes[field].get(value, ()))
+
+    def iter_sorted(self, field, after=None, descending=False):
+        """Yield records in (field, id) order, starting after the cursor key"""
+        keys = self._sorted[field]
+        if descending:
+            end = bisect_left(keys, sort_key(*after)) if after else len(keys)
+            positions = range(end - 1, -1, -1)
+        else:
+            start = bisect_right(keys, sort_key(*after)) if after else 0
+            positions = range(start, len(keys))
+        for position in positions:
+            yield self._records[keys[position][1]]
+
+    def page(self, field, after=None, limit=50, descending=False):
+        """Return up to ``limit`` records ordered by (field, id) after the cursor key"""
+        return list(islice(self.iter_sorted(field, after, descending), limit))
+
+    def range_bounds(self, field, low=None, high=None):
+        """Positions in the sorted index of the records with low <= field <= high"""
+        keys = self._sorted[field]
+        # (True,) sorts after every None key; (True, high, 0) after every key holding ``high``
+        start = bisect_left(keys, ((True, low),) if low is not None else ((True,),))
+        end = bisect_left(keys, ((True, high, 0),)) if high is not None else len(keys)
+        return start, max(start, end)
+
+    def range(self, field, low=None, high=None):
+        """Records with low <= field <= high, in (field, id) order"""
+        start, end = self.range_bounds(field, low, high)
+        return [self._records[record_id] for _, record_id in self._sorted[field][start:end]]
+
+    def replace_all(self, records):
+        """Drop every record and load ``records`` instead"""
+        self._records = {}
+        self._indexes = {field: {} for field in self._indexes}
+        self._sorted = {field: [] for field in self._sorted}
+        for record in records:
+            self.insert(record)
+
+
 # In-memory storage
 in_memory_data = {
-    "homepage": default_homepage_data.copy(),
-    "packages": sample_packages.copy(),
-    "blog_posts": [],
-    "destinations": sample_destinations.copy()
+    "homepage": copy.deepcopy(default_homepage_data),
+    "packages": InMemoryCollection(
+        [dict(pkg) for pkg in sample_packages],
+        indexes=("category", "destination", "featured"),
+        sorted_fields=("id", "price", "rating", "reviews"),
+    ),
+    "blog_posts": InMemoryCollection(indexes=("category",), sorted_fields=("id", "publishedAt")),
+    "destinations": InMemoryCollection(
+        [dict(dest) for dest in sample_destinations],
+        indexes=("country",),
+    ),
 }
 
+# ==================== RESPONSE CACHE ====================
+
+class ResponseCache:
+    """Read-through cache for public responses.
+
+    Entries expire after ``ttl_seconds`` and the least recently used entry is
+    evicted once ``max_entries`` is reached.  Every entry is tagged with the
+    collections it was built from; a write to a collection drops exactly the
+    entries tagged with it.  Loads that race a write are not cached, see
+    ``cached_read``.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._keys_by_tag = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value, tags = entry
+        if expires_at < time.monotonic():
+            self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def set(self, key, value, tags):
+        if key in self._entries:
+            self._drop(key)
+        while len(self._entries) >= self.max_entries:
+            oldest_key = next(iter(self._entries))
+            self._drop(oldest_key)
+            self.evictions += 1
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value, tuple(tags))
+        for tag in tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+    def invalidate(self, tag):
+        """Drop every entry built from ``tag``"""
+        for key in list(self._keys_by_tag.get(tag, ())):
+            self._drop(key)
+            self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._keys_by_tag.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+response_cache = ResponseCache(
+    ttl_seconds=float(os.environ.get('CACHE_TTL_SECONDS', '60')),
+    max_entries=int(os.environ.get('CACHE_MAX_ENTRIES', '256')),
+)
+
+# Monotonic per-collection write counters; every write bumps its collection
+collection_versions = {}
+
+# Distinguishes ETags across restarts, when the counters start again from zero
+BOOT_ID = uuid.uuid4().hex
+
+def get_versions(tags):
+    """Snapshot of the current version of each collection"""
+    return tuple(collection_versions.get(tag, 0) for tag in tags)
+
+async def cached_read(key: str, tags, loader):
+    """Return the cached value for ``key`` or load it and cache it under ``tags``"""
+    entry = response_cache.get(key)
+    if entry is not None:
+        return entry[1]
+    versions = get_versions(tags)
+    value = await loader()
+    # A write landed while the value was being loaded; caching it would be stale
+    if versions == get_versions(tags):
+        response_cache.set(key, value, tags)
+    return value
+
+# Documents whose sections are versioned and cached separately
+HOMEPAGE_SECTIONS = ("hero", "featuredPackages", "latestBlogs", "whyChooseUs", "testimonials", "cta")
+COLLECTION_SECTIONS = {"homepage": HOMEPAGE_SECTIONS}
+
+def mark_collection_dirty(collection_name: str, sections=None):
+    """Bump the collection version and invalidate everything derived from it
+
+    Responses that depend on a single section are tagged ``collection.section``;
+    passing ``sections`` limits the invalidation to those sections (plus the
+    whole-document tag).
+    """
+    if sections is None:
+        sections = COLLECTION_SECTIONS.get(collection_name, ())
+    for tag in (collection_name, *(f"{collection_name}.{section}" for section in sections)):
+        collection_versions[tag] = collection_versions.get(tag, 0) + 1
+        response_cache.invalidate(tag)
+
+# Collections served through the response cache and ETags
+CACHED_COLLECTIONS = ("homepage", "packages", "blog_posts", "destinations")
+
+def mark_all_collections_dirty():
+    """Invalidate every cached response and ETag, e.g. when the storage backend changes"""
+    for collection_name in CACHED_COLLECTIONS:
+        mark_collection_dirty(collection_name)
+    response_cache.clear()
+
+def make_etag(request: Request, tags):
+    """Strong ETag for a response built from ``tags`` at their current versions"""
+    versions = ",".join(str(version) for version in get_versions(tags))
+    token = f"{BOOT_ID}|{request.url.path}?{request.url.query}|{versions}"
+    return '"' + hashlib.blake2b(token.encode(), digest_size=12).hexdigest() + '"'
+
+def check_not_modified(request: Request, response: Response, tags, vary: Optional[str] = None):
+    """Set the ETag on a public GET; return a 304 response if the client copy is current"""
+    etag = make_etag(request, tags)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if vary:
+        headers["Vary"] = vary
+    for candidate in request.headers.get("if-none-match", "").split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*":
+            return Response(status_code=304, headers=headers)
+        # Compressed variants carry the encoding as an ETag suffix; the 304 names the variant matched
+        if ETAG_ENCODING_SUFFIX.sub('"', candidate) == etag:
+            return Response(status_code=304, headers={**headers, "ETag": candidate})
+    response.headers.update(headers)
+    return None
+
+# ==================== ENCODED RESPONSES ====================
+
+try:
+    import brotli
+except ImportError:  # without brotli only gzip is offered
+    brotli = None
+
+# Unfiltered collection snapshots are compressed ahead of time, once per version, at these levels
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '9'))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', '9'))
+# Other bodies are compressed on first request, in the negotiated encoding only
+GZIP_ON_DEMAND_LEVEL = int(os.environ.get('GZIP_ON_DEMAND_LEVEL', '6'))
+BROTLI_ON_DEMAND_QUALITY = int(os.environ.get('BROTLI_ON_DEMAND_QUALITY', '5'))
+# Bodies smaller than this are sent as they are; compressing them saves nothing
+MIN_COMPRESS_BYTES = int(os.environ.get('MIN_COMPRESS_BYTES', '1024'))
+
+ETAG_ENCODING_SUFFIX = re.compile(r'-(?:gzip|br)"$')
+# Preference order when the client weighs several encodings the same
+ENCODING_PREFERENCE = ("br", "gzip", "identity")
+
+class EncodedBody:
+    """A response value serialized to JSON once, with its compressed variants
+
+    Built once per collection version and kept in the response cache, so a
+    hit is a lookup plus a copy of ready bytes instead of encode + compress.
+    With ``precompress`` every variant is built up front at the high
+    snapshot levels; otherwise a variant is compressed, at the moderate
+    on-demand level, the first time a client negotiates it.
+    """
+
+    def __init__(self, value, precompress: bool = False):
+        # Same output as FastAPI's JSONResponse
+        self.identity = json.dumps(
+            jsonable_encoder(value), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+        ).encode("utf-8")
+        self.variants = {"identity": self.identity}
+        self.encodings = ("identity",)
+        if len(self.identity) >= MIN_COMPRESS_BYTES:
+            self.encodings = ("identity", "gzip") if brotli is None else ("identity", "gzip", "br")
+            if precompress:
+                for encoding in self.encodings[1:]:
+                    self.variants[encoding] = self._compress(encoding, GZIP_LEVEL, BROTLI_QUALITY)
+
+    def _compress(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "gzip":
+            return gzip.compress(self.identity, compresslevel=gzip_level, mtime=0)
+        return brotli.compress(self.identity, quality=brotli_quality)
+
+    async def content(self, encoding: str):
+        """Bytes of one variant, compressed off the event loop on first use"""
+        variant = self.variants.get(encoding)
+        if variant is None:
+            variant = await read_flights.do(
+                (id(self), encoding),
+                lambda: asyncio.to_thread(self._compress, encoding, GZIP_ON_DEMAND_LEVEL, BROTLI_ON_DEMAND_QUALITY),
+                f"compress:{encoding}",
+            )
+            self.variants[encoding] = variant
+        return variant
+
+    def pick(self, accept_encoding: str):
+        """Encoding best matching an Accept-Encoding header"""
+        weights = parse_accept_encoding(accept_encoding)
+        best, best_weight = "identity", 0.0
+        for encoding in ENCODING_PREFERENCE:
+            if encoding not in self.encodings:
+                continue
+            # identity is acceptable unless refused; anything else only if asked for
+            fallback = 1.0 if encoding == "identity" else 0.0
+            weight = weights.get(encoding, weights.get("*", fallback))
+            if weight > best_weight:
+                best, best_weight = encoding, weight
+        return best
+
+def parse_accept_encoding(header: str):
+    """Map each encoding named in an Accept-Encoding header to its q-value"""
+    weights = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+    return weights
+
+async def encoded_read(request: Request, response: Response, tags, loader, params, precompress: bool = False):
+    """Serve a cached value as pre-serialized, compressed JSON
+
+    The cache key is built from ``params``, the handler's validated query
+    parameters.  ``response`` carries the headers set by check_not_modified;
+    they are copied onto the returned response, with the ETag suffixed by
+    the content encoding so caches never confuse two variants.
+    """
+    key = "body:" + request_cache_key(request.url.path, params)
+
+    async def build():
+        value = await loader()
+        return await asyncio.to_thread(EncodedBody, value, precompress)
+
+    body = await cached_read(
+        key,
+        tags,
+        lambda: read_flights.do((key, get_versions(tags)), build, f"encode:{request.url.path}"),
+    )
+    encoding = body.pick(request.headers.get("accept-encoding", ""))
+    content = await body.content(encoding)
+    headers = dict(response.headers)
+    headers["vary"] = "Accept-Encoding"
+    if encoding != "identity":
+        headers["content-encoding"] = encoding
+        if "etag" in headers:
+            headers["etag"] = headers["etag"][:-1] + f'-{encoding}"'
+    return Response(content=content, media_type="application/json", headers=headers)
+
+# ==================== SEARCH INDEX ====================
+
+SEARCH_STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or our the to with your".split()
+)
+
+def tokenize(text: str):
+    """Lowercase word tokens without stopwords"""
+    return [token for token in re.findall(r"\w+", text.lower()) if token not in SEARCH_STOPWORDS]
+
+class SearchIndex:
+    """Inverted index over packages and blog posts with BM25 ranking.
+
+    Postings map a term to ``{doc_key: weighted term frequency}``, so a query
+    only touches the documents containing its terms.  Terms are also kept in a
+    sorted list so the last query token can be expanded as a prefix for
+    type-ahead.  Documents are added, replaced and removed one at a time as
+    the admin routes write.
+
+    Queries are answered top-k: each term's postings are also kept in blocks
+    ordered by impact, and blocks are visited best first, each with an upper
+    bound from its largest frequency and shortest document.  Documents are
+    scored in full the first time they are met, and the walk stops once no
+    unvisited block can lift a document into the current top ``limit``.
+    Terms found in more than COMMON_TERM_RATIO of the documents do not
+    nominate candidates unless the other terms leave the top ``limit`` short;
+    then their best blocks are walked until COMMON_TERM_CANDIDATES documents
+    have been scored, so ranking on common terms alone is approximate.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    MAX_PREFIX_EXPANSIONS = 16
+    # Shorter prefixes, and the terms a prefix matches past the scan limit, are not expanded
+    MIN_PREFIX_LENGTH = 2
+    MAX_PREFIX_SCAN = 256
+    BLOCK_SIZE = 64
+    COMMON_TERM_RATIO = 0.5
+    COMMON_TERM_CANDIDATES = 1000
+
+    # Weighted searchable fields and the summary returned with each hit, per kind
+    FIELDS = {
+        "package": {"title": 3.0, "destination": 2.0, "highlights": 1.0, "description": 1.0},
+        "blog": {"title": 3.0, "tags": 2.0, "excerpt": 1.0, "content": 1.0},
+    }
+    SUMMARY_FIELDS = {
+        "package": ("id", "title", "destination", "image", "price", "rating"),
+        "blog": ("id", "title", "excerpt", "image", "author", "publishedAt"),
+    }
+
+    def __init__(self):
+        self._postings = {}
+        self._terms = []
+        self._doc_terms = {}
+        self._doc_lengths = {}
+        self._summaries = {}
+        self._total_length = 0.0
+        # term -> [blocks, changes since they were sorted]; a block is [max frequency, min length, doc keys]
+        self._blocks = {}
+
+    def __len__(self):
+        return len(self._doc_lengths)
+
+    def add(self, kind: str, record: dict):
+        """Index a record, replacing any previous version of it"""
+        doc_key = (kind, record["id"])
+        self.remove(kind, record["id"])
+        frequencies = {}
+        for field, weight in self.FIELDS[kind].items():
+            value = record.get(field)
+            if not value:
+                continue
+            text = " ".join(value) if isinstance(value, list) else str(value)
+            for token in tokenize(text):
+                frequencies[token] = frequencies.get(token, 0.0) + weight
+        length = sum(frequencies.values())
+        for term, frequency in frequencies.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._terms, term)
+            postings[doc_key] = frequency
+            cached = self._blocks.get(term)
+            if cached is not None:
+                # Appended out of impact order; the bounds stay valid and a re-sort comes with enough churn
+                blocks = cached[0]
+                last = blocks[-1] if blocks else None
+                if last is None or len(last[2]) >= self.BLOCK_SIZE:
+                    blocks.append([frequency, length, [doc_key]])
+                else:
+                    last[0] = max(last[0], frequency)
+                    last[1] = min(last[1], length)
+                    last[2].append(doc_key)
+                self._churn(term, cached)
+        self._doc_terms[doc_key] = frequencies
+        self._doc_lengths[doc_key] = length
+        self._total_length += length
+        self._summaries[doc_key] = {field: record.get(field) for field in self.SUMMARY_FIELDS[kind]}
+
+    def remove(self, kind: str, record_id: str):
+        doc_key = (kind, record_id)
+        frequencies = self._doc_terms.pop(doc_key, None)
+        if frequencies is None:
+            return
+        for term in frequencies:
+            postings = self._postings[term]
+            del postings[doc_key]
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+                self._blocks.pop(term, None)
+            elif term in self._blocks:
+                # The stale block entry is skipped when met, since it is no longer in the postings
+                self._churn(term, self._blocks[term])
+        self._total_length -= self._doc_lengths.pop(doc_key)
+        del self._summaries[doc_key]
+
+    def clear(self):
+        self.__init__()
+
+    def _churn(self, term: str, cached: list):
+        cached[1] += 1
+        if cached[1] > len(self._postings[term]) // 2:
+            del self._blocks[term]
+
+    def _term_blocks(self, term: str, average_length: float):
+        """Impact-ordered blocks of a term's postings, sorted on first use"""
+        cached = self._blocks.get(term)
+        if cached is None:
+            postings = self._postings[term]
+            doc_lengths = self._doc_lengths
+            length_factor = self.B / average_length
+            base = 1 - self.B
+
+            def impact(doc_key):
+                frequency = postings[doc_key]
+                return frequency / (frequency + self.K1 * (base + length_factor * doc_lengths[doc_key]))
+
+            ordered = sorted(postings, key=impact, reverse=True)
+            blocks = []
+            for start in range(0, len(ordered), self.BLOCK_SIZE):
+                doc_keys = ordered[start:start + self.BLOCK_SIZE]
+                blocks.append([
+                    max(postings[doc_key] for doc_key in doc_keys),
+                    min(doc_lengths[doc_key] for doc_key in doc_keys),
+                    doc_keys,
+                ])
+            cached = self._blocks[term] = [blocks, 0]
+        return cached[0]
+
+    def _expand(self, token: str):
+        """Terms a prefix stands for: the token itself, then the most frequent completions"""
+        if len(token) < self.MIN_PREFIX_LENGTH:
+            return [token]
+        position = bisect_left(self._terms, token)
+        matches = [term for term in islice(self._terms, position, position + self.MAX_PREFIX_SCAN)
+                   if term.startswith(token)]
+        if matches and matches[0] == token:
+            completions = matches[1:]
+            expansions = [token]
+        else:
+            completions = matches
+            expansions = []
+        completions.sort(key=lambda term: len(self._postings[term]), reverse=True)
+        return expansions + completions[:self.MAX_PREFIX_EXPANSIONS - len(expansions)]
+
+    def search(self, query: str, limit: int = 10, kind: Optional[str] = None, prefix: bool = True):
+        """Top ``limit`` hits for ``query`` as (score, kind, summary) tuples"""
+        tokens = tokenize(query)
+        if not tokens or not self._doc_lengths:
+            return []
+        doc_count = len(self._doc_lengths)
+        average_length = self._total_length / doc_count or 1.0
+        doc_lengths = self._doc_lengths
+        k1, k1_plus_1 = self.K1, self.K1 + 1
+        length_factor = self.B / average_length
+        base = 1 - self.B
+        common_df = self.COMMON_TERM_RATIO * doc_count
+
+        # One group per token; several expansions of one prefix count once, at their best
+        groups = []
+        cursors = []
+        for position, token in enumerate(tokens):
+            is_last = position == len(tokens) - 1
+            terms = self._expand(token) if prefix and is_last else [token]
+            group = []
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                blocks = self._term_blocks(term, average_length)
+                # remaining[i]: best score any entry in blocks[i:] can reach
+                remaining = [0.0] * (len(blocks) + 1)
+                for i in range(len(blocks) - 1, -1, -1):
+                    frequency, length, _ = blocks[i]
+                    bound = idf * frequency * k1_plus_1 / (frequency + k1 * (base + length_factor * length))
+                    remaining[i] = max(bound, remaining[i + 1])
+                cursor = {"postings": postings, "idf": idf, "blocks": blocks, "remaining": remaining,
+                          "next": 0, "common": len(postings) > common_df, "active": False}
+                group.append(cursor)
+                cursors.append(cursor)
+            if group:
+                groups.append(group)
+        if not groups:
+            return []
+
+        def score(doc_key):
+            norm = k1 * (base + length_factor * doc_lengths[doc_key])
+            total = 0.0
+            for group in groups:
+                best = 0.0
+                for cursor in group:
+                    frequency = cursor["postings"].get(doc_key)
+                    if frequency is not None:
+                        best = max(best, cursor["idf"] * frequency * k1_plus_1 / (frequency + norm))
+                total += best
+            return total
+
+        top = []
+        seen = set()
+
+        def walk(active, budget=None):
+            """Visit the blocks of the active cursors best first until the top ``limit`` is settled"""
+            for cursor in active:
+                cursor["active"] = True
+            frontier = [(-cursor["remaining"][cursor["next"]], id(cursor), cursor)
+                        for cursor in active if cursor["next"] < len(cursor["blocks"])]
+            heapq.heapify(frontier)
+            while frontier:
+                if len(top) == limit:
+                    # Best score of a document not met yet; inactive terms may still add to it
+                    ceiling = sum(
+                        max(cursor["remaining"][cursor["next"] if cursor["active"] else 0] for cursor in group)
+                        for group in groups
+                    )
+                    if ceiling <= top[0][0] or (budget is not None and len(seen) >= budget):
+                        return
+                _, _, cursor = heapq.heappop(frontier)
+                for doc_key in cursor["blocks"][cursor["next"]][2]:
+                    if doc_key in seen or doc_key not in cursor["postings"]:
+                        continue
+                    seen.add(doc_key)
+                    if kind is not None and doc_key[0] != kind:
+                        continue
+                    entry = (score(doc_key), doc_key)
+                    if len(top) < limit:
+                        heapq.heappush(top, entry)
+                    elif entry > top[0]:
+                        heapq.heapreplace(top, entry)
+                cursor["next"] += 1
+                if cursor["next"] < len(cursor["blocks"]):
+                    heapq.heappush(frontier, (-cursor["remaining"][cursor["next"]], id(cursor), cursor))
+
+        rare = [cursor for cursor in cursors if not cursor["common"]]
+        if rare:
+            walk(rare)
+        if len(top) < limit:
+            walk(cursors, len(seen) + self.COMMON_TERM_CANDIDATES)
+        best = sorted(top, key=lambda entry: (-entry[0], entry[1]))
+        return [(score, doc_key[0], self._summaries[doc_key]) for score, doc_key in best]
+
+
+search_index = SearchIndex()
+
+# Collection name -> search document kind
+SEARCHABLE_COLLECTIONS = {"packages": "package", "blog_posts": "blog"}
+# Documents indexed between two yields to the event loop during a rebuild
+SEARCH_INDEX_BATCH_SIZE = int(os.environ.get('SEARCH_INDEX_BATCH_SIZE', '200'))
+
+# Writes made while rebuild_search_index runs, as (kind, id, record or None for a delete)
+search_index_pending = None
+
+def index_for_search(collection_name: str, record: dict):
+    kind = SEARCHABLE_COLLECTIONS[collection_name]
+    search_index.add(kind, record)
+    if search_index_pending is not None:
+        search_index_pending.append((kind, record["id"], record))
+
+def unindex_for_search(collection_name: str, record_id: str):
+    kind = SEARCHABLE_COLLECTIONS[collection_name]
+    search_index.remove(kind, record_id)
+    if search_index_pending is not None:
+        search_index_pending.append((kind, record_id, None))
+
+async def rebuild_search_index():
+    """Index every package and blog post from scratch
+
+    The new index is built SEARCH_INDEX_BATCH_SIZE documents at a time, with
+    a yield to the event loop after each batch, and swapped in once
+    complete; searches meanwhile use the previous index.  Writes that land
+    during the build are applied to the new index before the swap.
+    """
+    global search_index, search_index_pending
+    index = SearchIndex()
+    search_index_pending = []
+    try:
+        for collection_name, kind in SEARCHABLE_COLLECTIONS.items():
+            records = await query_records(collection_name)
+            for start in range(0, len(records), SEARCH_INDEX_BATCH_SIZE):
+                for record in records[start:start + SEARCH_INDEX_BATCH_SIZE]:
+                    index.add(kind, record)
+                await asyncio.sleep(0)
+        for kind, record_id, record in search_index_pending:
+            if record is None:
+                index.remove(kind, record_id)
+            else:
+                index.add(kind, record)
+        search_index = index
+    finally:
+        search_index_pending = None
+    logger.info(f"✅ Search index built with {len(search_index)} documents")
+
+# ==================== DESTINATION PACKAGE COUNTS ====================
+
+DESTINATION_COUNTS_RECONCILE_SECONDS = float(os.environ.get('DESTINATION_COUNTS_RECONCILE_SECONDS', '300'))
+# Pause between a count going negative and the resync it triggers
+DESTINATION_COUNTS_RESYNC_DELAY_SECONDS = float(os.environ.get('DESTINATION_COUNTS_RESYNC_DELAY_SECONDS', '1'))
+
+class DestinationCounts:
+    """Materialized number of packages per destination.
+
+    A package belongs to every destination whose name its free-text
+    ``destination`` contains, case-insensitively; the same match as
+    ``/api/packages?destination=``.  Counts are kept per distinct package
+    ``destination`` label and updated incrementally on package writes.  The
+    per-destination count is summed from the labels once and then kept up to
+    date by the same updates, so reading it is a dict lookup.
+
+    A delete that races a recount can take a count below zero.  Counts are
+    served clamped at zero and ``drifted`` is set, which wakes the
+    reconcile loop for a resync.
+    """
+
+    def __init__(self):
+        self._labels = {}
+        self._by_name = {}
+        # Bumped by every incremental update, see reconcile_destination_counts
+        self.version = 0
+        self.drifted = asyncio.Event()
+
+    def count(self, name: str) -> int:
+        key = name.casefold()
+        total = self._by_name.get(key)
+        if total is None:
+            total = sum(count for label, count in self._labels.items() if key in label)
+            self._by_name[key] = total
+        return max(total, 0)
+
+    def add(self, label, delta: int) -> bool:
+        """Adjust a label by ``delta``; returns whether a known destination count changed"""
+        label = str(label or "").casefold()
+        self.version += 1
+        remaining = self._labels.get(label, 0) + delta
+        if remaining > 0:
+            self._labels[label] = remaining
+        else:
+            self._labels.pop(label, None)
+        negative = remaining < 0
+        changed = False
+        for key in self._by_name:
+            if key in label:
+                self._by_name[key] += delta
+                changed = True
+                negative = negative or self._by_name[key] < 0
+        if negative:
+            self.drifted.set()
+        return changed
+
+    def move(self, old_label, new_label) -> bool:
+        """A package changed destination from ``old_label`` to ``new_label``"""
+        if old_label == new_label:
+            return False
+        removed = self.add(old_label, -1)
+        return self.add(new_label, 1) or removed
+
+    def replace(self, labels) -> bool:
+        """Swap in recounted labels; returns whether anything differed"""
+        labels = {str(label or "").casefold(): count for label, count in labels.items() if count > 0}
+        drifted = self.drifted.is_set()
+        self.drifted.clear()
+        if labels == self._labels and not drifted:
+            return False
+        self._labels = labels
+        self._by_name.clear()
+        return True
+
+    def stats(self):
+        return {"labels": len(self._labels), "destinations": len(self._by_name)}
+
+
+destination_counts = DestinationCounts()
+
+def package_count_changed(changed: bool):
+    """Invalidate destination responses when a package write moved a count"""
+    if changed:
+        mark_collection_dirty("destinations")
+
+def with_package_count(destination: dict):
+    """Destination document with its materialized package count"""
+    return {**destination, "packages": destination_counts.count(destination.get("name", ""))}
+
+async def count_packages_by_label():
+    """Packages per ``destination`` label, in one aggregation on MongoDB"""
+    if mongo_available():
+        try:
+            pipeline = [{"$group": {"_id": "$destination", "count": {"$sum": 1}}}]
+            groups = await db["packages"].aggregate(pipeline).to_list(None)
+            return {group["_id"]: group["count"] for group in groups}
+        except Exception as e:
+            mongo_breaker.record_failure(e)
+            logger.error(f"Database error in count_packages_by_label: {e}")
+    labels = {}
+    for record in in_memory_data["packages"]:
+        label = record.get("destination")
+        labels[label] = labels.get(label, 0) + 1
+    return labels
+
+async def reconcile_destination_counts():
+    """Recount packages per destination and repair any drift in the counters
+
+    A count that raced a package write is dropped; the next run picks it up.
+    """
+    version = destination_counts.version
+    labels = await count_packages_by_label()
+    if version != destination_counts.version:
+        logger.info("Package writes landed during the recount; keeping the incremental counts")
+        return False
+    package_count_changed(destination_counts.replace(labels))
+    return True
+
+async def reconcile_destination_counts_forever():
+    """Background loop running reconcile_destination_counts every few minutes, and soon after a count drifts"""
+    while True:
+        try:
+            await asyncio.wait_for(destination_counts.drifted.wait(), DESTINATION_COUNTS_RECONCILE_SECONDS)
+            # Let the writes that raced the last recount land before counting again
+            await asyncio.sleep(DESTINATION_COUNTS_RESYNC_DELAY_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        try:
+            await reconcile_destination_counts()
+        except Exception as e:
+            logger.error(f"Error reconciling destination package counts: {e}")
+
+def schedule_destination_counts_reconcile():
+    """Recount in the background, after writes whose previous destinations are unknown"""
+    task = asyncio.create_task(reconcile_destination_counts())
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+# ==================== STATUS CHECK ROLLUPS ====================
+
+# Raw status checks and per-minute rollups expire after this long; 0 keeps them forever
+STATUS_RETENTION_SECONDS = int(os.environ.get('STATUS_RETENTION_SECONDS', str(7 * 24 * 3600)))
+# Per-client totals (count, first and last seen) are kept for as long as the client exists
+STATUS_CLIENTS_COLLECTION = "status_clients"
+STATUS_MINUTES_COLLECTION = "status_minutes"
+
+def status_minute(timestamp: datetime) -> datetime:
+    return timestamp.replace(second=0, microsecond=0)
+
+def group_status_checks(checks):
+    """Per-client (count, first, last) and per-minute counts for a batch of status checks"""
+    clients = {}
+    minutes = {}
+    for check in checks:
+        timestamp = check["timestamp"]
+        count, first_seen, last_seen = clients.get(check["client_name"], (0, timestamp, timestamp))
+        clients[check["client_name"]] = (count + 1, min(first_seen, timestamp), max(last_seen, timestamp))
+        minute = status_minute(timestamp)
+        minutes[minute] = minutes.get(minute, 0) + 1
+    return clients, minutes
+
+class StatusRollups:
+    """Per-client and per-minute status check counts kept in memory
+
+    Serves /api/status/summary while MongoDB is unavailable; with MongoDB the
+    same rollups live in the status_clients and status_minutes collections.
+    """
+
+    def __init__(self):
+        self.clients = {}
+        self.minutes = {}
+
+    def record(self, checks):
+        clients, minutes = group_status_checks(checks)
+        for client_name, (count, first_seen, last_seen) in clients.items():
+            current = self.clients.get(client_name)
+            if current is None:
+                self.clients[client_name] = {"client_name": client_name, "count": count,
+                                             "first_seen": first_seen, "last_seen": last_seen}
+            else:
+                current["count"] += count
+                current["first_seen"] = min(current["first_seen"], first_seen)
+                current["last_seen"] = max(current["last_seen"], last_seen)
+        for minute, count in minutes.items():
+            self.minutes[minute] = self.minutes.get(minute, 0) + count
+        if STATUS_RETENTION_SECONDS:
+            cutoff = datetime.utcnow() - timedelta(seconds=STATUS_RETENTION_SECONDS)
+            for minute in [minute for minute in self.minutes if minute < cutoff]:
+                del self.minutes[minute]
+
+    def dump(self):
+        """Copies of the client and minute rollups, for the local store snapshot"""
+        return ([dict(client) for client in self.clients.values()],
+                [{"minute": minute, "count": count} for minute, count in self.minutes.items()])
+
+    def restore(self, clients, minutes):
+        self.clients = {client["client_name"]: client for client in clients}
+        self.minutes = {item["minute"]: item["count"] for item in minutes}
+
+    def summary(self, since: datetime, limit: int):
+        clients = heapq.nlargest(limit, self.clients.values(), key=lambda client: client["last_seen"])
+        return {
+            "total": sum(client["count"] for client in self.clients.values()),
+            "clientCount": len(self.clients),
+            "clients": [dict(client) for client in clients],
+            "minutes": [{"minute": minute, "count": count}
+                        for minute, count in sorted(self.minutes.items()) if minute >= since],
+        }
+
+
+status_rollups = StatusRollups()
+
+async def record_status_rollups(checks):
+    """Fold a batch of stored status checks into the MongoDB rollups, one bulk write per collection"""
+    if not checks:
+        return
+    clients, minutes = group_status_checks(checks)
+    client_operations = [
+        UpdateOne(
+            {"client_name": client_name},
+            {"$inc": {"count": count}, "$min": {"first_seen": first_seen}, "$max": {"last_seen": last_seen}},
+            upsert=True,
+        )
+        for client_name, (count, first_seen, last_seen) in clients.items()
+    ]
+    minute_operations = [
+        UpdateOne({"minute": minute}, {"$inc": {"count": count}}, upsert=True)
+        for minute, count in minutes.items()
+    ]
+    await asyncio.gather(
+        db[STATUS_CLIENTS_COLLECTION].bulk_write(client_operations, ordered=False),
+        db[STATUS_MINUTES_COLLECTION].bulk_write(minute_operations, ordered=False),
+    )
+
+async def load_status_summary(since: datetime, limit: int):
+    """Status check totals, the most recently seen clients and the per-minute series
+
+    Reads only the rollup collections, never the raw status checks.
+    """
+    if mongo_available():
+        try:
+            clients = db[STATUS_CLIENTS_COLLECTION]
+            totals, recent, minutes = await asyncio.gather(
+                clients.aggregate([
+                    {"$group": {"_id": None, "total": {"$sum": "$count"}, "clientCount": {"$sum": 1}}}
+                ]).to_list(1),
+                clients.find({}, {"_id": 0}).sort("last_seen", DESCENDING).limit(limit).to_list(limit),
+                db[STATUS_MINUTES_COLLECTION].find({"minute": {"$gte": since}}, {"_id": 0})
+                .sort("minute", ASCENDING).to_list(None),
+            )
+            totals = totals[0] if totals else {"total": 0, "clientCount": 0}
+            return {
+                "total": totals["total"],
+                "clientCount": totals["clientCount"],
+                "clients": recent,
+                "minutes": minutes,
+            }
+        except Exception as e:
+            mongo_breaker.record_failure(e)
+            logger.error(f"Database error in load_status_summary: {e}")
+    return status_rollups.summary(since, limit)
+
+async def ensure_ttl_index(collection_name: str, field: str, seconds: int, unique: bool = False):
+    """Create a TTL index on ``field``, or change its expiry when the setting changed"""
+    try:
+        await db[collection_name].create_index([(field, ASCENDING)], expireAfterSeconds=seconds, unique=unique)
+    except OperationFailure:
+        # An index on the field already exists with other options
+        await db.command("collMod", collection_name, index={"keyPattern": {field: 1}, "expireAfterSeconds": seconds})
+
+async def drop_ttl_index(collection_name: str, field: str):
+    """Drop the TTL index on ``field`` left by an earlier retention setting, if there is one"""
+    collection = db[collection_name]
+    for name, info in (await collection.index_information()).items():
+        if "expireAfterSeconds" in info and info["key"] == [(field, ASCENDING)]:
+            await collection.drop_index(name)
+            logger.info(f"Dropped TTL index {name} on {collection_name}; documents are kept")
+
+# ==================== STATUS CHECK INGESTION ====================
+
+STATUS_BATCH_SIZE = int(os.environ.get('STATUS_BATCH_SIZE', '500'))
+STATUS_FLUSH_INTERVAL_MS = int(os.environ.get('STATUS_FLUSH_INTERVAL_MS', '50'))
+STATUS_BUFFER_MAX = int(os.environ.get('STATUS_BUFFER_MAX', '20000'))
+STATUS_ENQUEUE_TIMEOUT_MS = int(os.environ.get('STATUS_ENQUEUE_TIMEOUT_MS', '1000'))
+
+class StatusIngestBuffer:
+    """Accepts status checks and stores them in batches
+
+    ``submit`` only appends to a deque.  A single flusher task writes up to
+    ``batch_size`` checks with one insert_many as soon as that many are
+    waiting, or ``flush_interval`` after the first one arrived.  Once
+    ``max_pending`` checks are waiting, ``submit`` waits up to
+    ``enqueue_timeout`` for room and then refuses the check, so a slow
+    database pushes back on clients instead of growing memory without bound.
+
+    Checks are acknowledged before they are written: those still pending are
+    lost if the process dies, and ``close`` drains them on a clean shutdown.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_pending: int, enqueue_timeout: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.enqueue_timeout = enqueue_timeout
+        self._pending = deque()
+        self._task = None
+        self._wakeup = None
+        self._room = None
+        self._closing = False
+
+    def __len__(self):
+        return len(self._pending)
+
+    def _start(self):
+        self._wakeup = asyncio.Event()
+        self._room = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def submit(self, check: dict) -> bool:
+        """Queue a check; returns False if the buffer stayed full for enqueue_timeout"""
+        if self._task is None:
+            self._start()
+        deadline = time.monotonic() + self.enqueue_timeout
+        while len(self._pending) >= self.max_pending:
+            self._room.clear()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(self._room.wait(), remaining)
+            except asyncio.TimeoutError:
+                return False
+        self._pending.append(check)
+        if len(self._pending) in (1, self.batch_size):
+            self._wakeup.set()
+        return True
+
+    async def _run(self):
+        while not (self._closing and not self._pending):
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if len(self._pending) < self.batch_size and not self._closing:
+                # Give the batch time to fill; a full batch wakes the flusher early
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+            while self._pending:
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                self._room.set()
+                try:
+                    await store_status_checks(batch)
+                except Exception as e:
+                    logger.error(f"Error storing {len(batch)} status checks: {e}")
+
+    async def close(self):
+        """Write every pending check and stop the flusher"""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        await self._task
+
+
+status_buffer = StatusIngestBuffer(
+    batch_size=STATUS_BATCH_SIZE,
+    flush_interval=STATUS_FLUSH_INTERVAL_MS / 1000,
+    max_pending=STATUS_BUFFER_MAX,
+    enqueue_timeout=STATUS_ENQUEUE_TIMEOUT_MS / 1000,
+)
+
+async def store_status_checks(checks):
+    """Insert a batch of status checks with one insert_many and fold it into the rollups
+
+    While MongoDB is unreachable the batch is journaled for replay instead.
+    """
+    if mongo_available():
+        stored = None
+        try:
+            await db["status_checks"].insert_many(checks, ordered=False)
+            stored = checks
+        except BulkWriteError as e:
+            failed = {error["index"] for error in e.details.get("writeErrors", [])}
+            stored = [check for index, check in enumerate(checks) if index not in failed]
+            logger.error(f"{len(failed)} of {len(checks)} status checks were rejected by the database")
+        except Exception as e:
+            mongo_breaker.record_failure(e)
+            logger.error(f"Error saving status checks to database: {e}")
+        if stored is not None:
+            try:
+                await record_status_rollups(stored)
+            except Exception as e:
+                mongo_breaker.record_failure(e)
+                logger.error(f"Error updating status check rollups: {e}")
+            return
+    if db is not None:
+        # Kept for replay once MongoDB is reachable again
+        await journal_memory_write(*[upsert_entry("status_checks", check) for check in checks])
+    # Without MongoDB only the rollups are kept; the local store saves them with its snapshots
+    status_rollups.record(checks)
+
+# ==================== METRICS ====================
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+def escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label_value(value)}"' for name, value in pairs) + "}"
+
+class Counter:
+    """Monotonic count per label combination"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.values = {}
+        # MongoDB command listeners report from driver threads
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for labels, value in sorted(self.values.items()):
+            yield f"{self.name}{format_labels(self.label_names, labels)} {value}"
+
+class Gauge(Counter):
+    """Value that goes up and down"""
+
+    kind = "gauge"
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value):
+        with self._lock:
+            self.values[labels] = value
+
+class Histogram:
+    """Bucketed observations per label combination, rendered cumulatively"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last is +Inf), sum]
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, *labels, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.values.get(labels)
+            if series is None:
+                series = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for labels, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                yield f"{self.name}_bucket{format_labels(self.label_names, labels, [('le', bound)])} {cumulative}"
+            yield f"{self.name}_sum{format_labels(self.label_names, labels)} {total}"
+            yield f"{self.name}_count{format_labels(self.label_names, labels)} {cumulative}"
+
+http_requests_total = Counter(
+    "http_requests_total", "HTTP requests by method, route and status", ("method", "route", "status"))
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by method and route", ("method", "route"))
+http_response_size_bytes = Histogram(
+    "http_response_size_bytes", "HTTP response body size by method and route", ("method", "route"), SIZE_BUCKETS)
+http_requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+db_operation_duration_seconds = Histogram(
+    "db_operation_duration_seconds", "MongoDB command latency by collection and command", ("collection", "command"))
+db_operations_total = Counter(
+    "db_operations_total", "MongoDB commands by collection, command and outcome", ("collection", "command", "outcome"))
+storage_operations_total = Counter(
+    "storage_operations_total", "Storage helper calls by the backend that served them",
+    ("collection", "operation", "backend"))
+storage_fallbacks_total = Counter(
+    "storage_fallbacks_total", "MongoDB errors that fell back to in-memory storage", ("collection", "operation"))
+singleflight_calls_total = Counter(
+    "singleflight_calls_total", "Coalescable storage reads by helper and collection", ("key",))
+singleflight_coalesced_total = Counter(
+    "singleflight_coalesced_total", "Storage reads served by joining an identical in-flight read", ("key",))
+mongo_circuit_state = Gauge(
+    "mongo_circuit_breaker_state", "MongoDB circuit breaker state (0 closed, 1 half open, 2 open)")
+status_ingest_pending = Gauge(
+    "status_ingest_pending", "Status checks acknowledged but not yet stored")
+status_ingest_rejected_total = Counter(
+    "status_ingest_rejected_total", "Status checks refused because the ingestion buffer was full")
+
+METRICS = (
+    http_requests_total, http_request_duration_seconds, http_response_size_bytes, http_requests_in_flight,
+    db_operation_duration_seconds, db_operations_total, storage_operations_total, storage_fallbacks_total,
+    singleflight_calls_total, singleflight_coalesced_total, mongo_circuit_state,
+    status_ingest_pending, status_ingest_rejected_total,
+)
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    mongo_circuit_state.set(value={"closed": 0, "half_open": 1, "open": 2}[mongo_breaker.state])
+    status_ingest_pending.set(value=len(status_buffer))
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+class MetricsMiddleware:
+    """Times every HTTP request and measures its response body
+
+    Plain ASGI rather than BaseHTTPMiddleware: it only wraps ``send``, so
+    responses are not buffered and the per-request cost is a few dict
+    updates.  Requests are labelled with the route template (e.g.
+    ``/api/destinations/{destination_id}``) to keep label cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        response = {"status": 500, "size": 0}
+
+        async def send_and_measure(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["size"] += len(message.get("body", b""))
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_and_measure)
+        finally:
+            http_requests_in_flight.dec()
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            http_requests_total.inc(method, route, str(response["status"]))
+            http_request_duration_seconds.observe(method, route, value=time.perf_counter() - start)
+            http_response_size_bytes.observe(method, route, value=response["size"])
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Per-collection MongoDB latency straight from the driver's command events"""
+
+    def __init__(self):
+        self._collections = {}
+
+    def started(self, event):
+        target = event.command.get("collection" if event.command_name == "getMore" else event.command_name)
+        self._collections[event.request_id] = target if isinstance(target, str) else event.database_name
+
+    def succeeded(self, event):
+        self._record(event, "ok")
+
+    def failed(self, event):
+        self._record(event, "error")
+
+    def _record(self, event, outcome):
+        collection = self._collections.pop(event.request_id, "unknown")
+        db_operation_duration_seconds.observe(collection, event.command_name, value=event.duration_micros / 1e6)
+        db_operations_total.inc(collection, event.command_name, outcome)
+
+mongo_command_metrics = MongoCommandMetrics()
+
+# ==================== PROFILING ====================
+
+# Profiling is compiled out entirely unless a token is configured
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+PROFILE_HEADER = "x-profile-token"
+PROFILE_QUERY_PARAM = "profile"
+PROFILES_PATH = "/api/admin/profiles"
+MAX_STORED_PROFILES = int(os.environ.get('MAX_STORED_PROFILES', '20'))
+
+current_profile = contextvars.ContextVar("current_profile", default=None)
+stored_profiles = OrderedDict()
+profiling_busy = False
+
+class RequestProfile:
+    """cProfile capture plus wall-clock storage timing for one request"""
+
+    def __init__(self, method: str, path: str):
+        self.id = str(uuid.uuid4())
+        self.method = method
+        self.path = path
+        self.created_at = datetime.utcnow()
+        self.profiler = cProfile.Profile()
+        self.storage_seconds = 0.0
+        self.storage_calls = []
+        self.total_seconds = 0.0
+        self.status = None
+        self.stats = None
+
+    def add_storage(self, name: str, seconds: float):
+        self.storage_seconds += seconds
+        self.storage_calls.append({"function": name, "ms": round(seconds * 1000, 3)})
+
+    def finish(self, total_seconds: float, status):
+        self.total_seconds = total_seconds
+        self.status = status
+        self.profiler.create_stats()
+        self.stats = self.profiler.stats
+        self.profiler = None
+
+    def cpu_phases(self):
+        """Exclusive CPU time in pydantic validators and in serializers/response rendering"""
+        validation = serialization = 0.0
+        for (filename, _, name), (_, _, own_time, cumulative_time, _) in self.stats.items():
+            if "SchemaValidator" in name:
+                validation += own_time
+            elif "SchemaSerializer" in name or filename.endswith(os.path.join("fastapi", "encoders.py")):
+                serialization += own_time
+            elif name == "render" and filename.endswith(os.path.join("starlette", "responses.py")):
+                serialization += cumulative_time
+        return validation, serialization
+
+    def summary(self):
+        validation, serialization = self.cpu_phases()
+        phases = {
+            "validation": validation,
+            "storage": self.storage_seconds,
+            "serialization": serialization,
+        }
+        phases["other"] = max(self.total_seconds - sum(phases.values()), 0.0)
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "created_at": self.created_at,
+            "total_ms": round(self.total_seconds * 1000, 3),
+            "phases_ms": {phase: round(seconds * 1000, 3) for phase, seconds in phases.items()},
+            "storage_calls": self.storage_calls,
+        }
+
+    def report(self, limit: int = 30) -> str:
+        output = io.StringIO()
+        stats = pstats.Stats(stream=output)
+        stats.stats = self.stats
+        stats.get_top_level_stats()
+        stats.sort_stats("cumulative").print_stats(limit)
+        return output.getvalue()
+
+def profiled_storage(func):
+    """Count a storage helper's wall-clock time towards the profiled request, if any"""
+    if not PROFILE_TOKEN:
+        return func
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        profile = current_profile.get()
+        if profile is None:
+            return await func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            profile.add_storage(func.__name__, time.perf_counter() - start)
+    return wrapper
+
+def has_profile_token(value: Optional[str]) -> bool:
+    return bool(PROFILE_TOKEN) and value is not None and hmac.compare_digest(value, PROFILE_TOKEN)
+
+class ProfilingMiddleware:
+    """Profiles requests carrying the admin profile token (header or ``?profile=``)
+
+    Only installed when PROFILE_TOKEN is set.  cProfile hooks the whole
+    thread, so one request is profiled at a time; others arriving meanwhile
+    run unprofiled.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def requested(scope) -> bool:
+        if scope["path"].startswith(PROFILES_PATH):
+            # Downloading profiles carries the token too; don't let it evict what it fetches
+            return False
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER.encode():
+                return has_profile_token(value.decode("latin-1"))
+        if scope["query_string"]:
+            values = parse_qs(scope["query_string"].decode("latin-1")).get(PROFILE_QUERY_PARAM)
+            return bool(values) and has_profile_token(values[0])
+        return False
+
+    async def __call__(self, scope, receive, send):
+        global profiling_busy
+        if scope["type"] != "http" or profiling_busy or not self.requested(scope):
+            await self.app(scope, receive, send)
+            return
+        profile = RequestProfile(scope["method"], scope["path"])
+        status = {"code": None}
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile.id.encode())]}
+            await send(message)
+
+        profiling_busy = True
+        context_token = current_profile.set(profile)
+        start = time.perf_counter()
+        profile.profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profile.profiler.disable()
+            current_profile.reset(context_token)
+            profiling_busy = False
+            profile.finish(time.perf_counter() - start, status["code"])
+            stored_profiles[profile.id] = profile
+            while len(stored_profiles) > MAX_STORED_PROFILES:
+                stored_profiles.popitem(last=False)
+
+# ==================== OPERATION LOG ====================
+
+LOG_COMMIT_DELAY_MS = float(os.environ.get('LOG_COMMIT_DELAY_MS', '2'))
+
+def json_default(value):
+    """json.dumps hook: datetimes become {"$date": iso}"""
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def json_object_hook(value: dict):
+    """json.loads hook undoing json_default"""
+    if len(value) == 1 and "$date" in value:
+        return datetime.fromisoformat(value["$date"])
+    return value
+
+def encode_json_line(value) -> bytes:
+    return json.dumps(value, default=json_default, separators=(",", ":")).encode() + b"\n"
+
+def write_file_atomically(path: Path, data: bytes):
+    """Replace ``path`` with ``data`` so readers see either the old or the new file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(temp_path, "wb") as temp_file:
+        temp_file.write(data)
+        temp_file.flush()
+        os.fsync(temp_file.fileno())
+    os.replace(temp_path, path)
+
+class AppendOnlyLog:
+    """JSON-lines file of operations, appended with group commit and read back in order
+
+    Appends hit the file immediately but are made durable by one fsync per
+    batch: every writer arriving within ``commit_delay`` seconds of the first
+    waits on the same fsync, so write bursts cost a handful of disk flushes
+    instead of one each.
+    """
+
+    def __init__(self, path, commit_delay: float = 0.002):
+        self.path = Path(path)
+        self.commit_delay = commit_delay
+        self.size = 0
+        self.commits = 0
+        self._file = None
+        self._batch = None
+        self._commit_task = None
+        self._io_lock = asyncio.Lock()
+
+    def _open(self):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "ab")
+            self.size = self._file.tell()
+        return self._file
+
+    def end_offset(self) -> int:
+        """Byte offset just past the last appended entry"""
+        self._open()
+        return self.size
+
+    async def append(self, *entries: dict):
+        """Append entries and return once they are on disk"""
+        if not entries:
+            return
+        log_file = self._open()
+        data = b"".join(encode_json_line(entry) for entry in entries)
+        log_file.write(data)
+        log_file.flush()
+        self.size += len(data)
+        if self._batch is None:
+            self._batch = asyncio.get_running_loop().create_future()
+            self._commit_task = asyncio.create_task(self._group_commit())
+        # Shielded: a cancelled writer must not cancel the fsync other writers wait on
+        await asyncio.shield(self._batch)
+
+    async def _group_commit(self):
+        await asyncio.sleep(self.commit_delay)
+        batch, self._batch = self._batch, None
+        try:
+            async with self._io_lock:
+                if self._file is not None:
+                    await asyncio.to_thread(os.fsync, self._file.fileno())
+                    self.commits += 1
+        except Exception as e:
+            batch.set_exception(e)
+            return
+        batch.set_result(None)
+
+    async def sync(self):
+        """Wait until everything appended so far is on disk"""
+        async with self._io_lock:
+            if self._file is not None:
+                await asyncio.to_thread(os.fsync, self._file.fileno())
+
+    def read(self):
+        """Return (entries, offset) where offset is the byte length of the entries read"""
+        if not self.path.exists():
+            return [], 0
+        entries, offset = [], 0
+        with open(self.path, "rb") as log_file:
+            for line in log_file:
+                if not line.endswith(b"\n"):
+                    # Torn final write from a crash; the operation never completed
+                    break
+                offset += len(line)
+                try:
+                    entries.append(json.loads(line, object_hook=json_object_hook))
+                except ValueError as e:
+                    logger.error(f"Skipping corrupt entry in {self.path}: {e}")
+        return entries, offset
+
+    async def discard_through(self, offset: int):
+        """Drop the first ``offset`` bytes, keeping anything appended after they were read"""
+        async with self._io_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if not self.path.exists():
+                return
+            with open(self.path, "rb") as log_file:
+                log_file.seek(offset)
+                remaining = log_file.read()
+            if remaining:
+                write_file_atomically(self.path, remaining)
+            else:
+                self.path.unlink()
+
+    async def close(self):
+        await self.sync()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def upsert_entry(collection_name: str, record: dict):
+    # A failed insert_one may already have stamped an ObjectId on the document
+    record = {key: value for key, value in record.items() if key != "_id"}
+    return {"collection": collection_name, "op": "upsert", "id": record["id"], "record": record}
+
+def delete_entry(collection_name: str, record_id: str):
+    return {"collection": collection_name, "op": "delete", "id": record_id}
+
+def homepage_entry(fields: dict, revision: int):
+    return {"collection": "homepage", "op": "set", "fields": fields, "revision": revision}
+
+async def journal_memory_write(*entries: dict):
+    """Make writes that only reached in-memory storage durable
+
+    With MongoDB configured they go to the write-behind journal for replay;
+    without it they go to the local store's operation log.
+    """
+    if not entries:
+        return
+    try:
+        if db is not None:
+            await write_behind_journal.append(*entries)
+            schedule_journal_replay()
+        elif local_store is not None and local_store.opened:
+            await local_store.record(*entries)
+    except Exception as e:
+        logger.error(f"❌ Error writing operation log: {e}")
+
+def schedule_journal_replay():
+    """Replay the journal soon if MongoDB is reachable
+
+    Writes also fall back to the journal on errors that do not trip the
+    breaker; without this they would wait for the next recovery or restart.
+    """
+    global replay_scheduled
+    if replay_scheduled or not mongo_available():
+        return
+
+    async def replay():
+        global replay_scheduled
+        try:
+            await replay_write_behind_journal()
+        except Exception as e:
+            mongo_breaker.record_failure(e)
+            logger.error(f"Error replaying write-behind journal: {e}")
+        finally:
+            replay_scheduled = False
+
+    replay_scheduled = True
+    task = asyncio.create_task(replay())
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+def apply_memory_entry(entry: dict):
+    """Apply one logged operation to in-memory storage"""
+    collection_name = entry["collection"]
+    if collection_name == "homepage":
+        homepage = in_memory_data["homepage"]
+        homepage.update(entry["fields"])
+        homepage["revision"] = entry.get("revision", homepage.get("revision", 0) + 1)
+        return
+    store = in_memory_data.get(collection_name)
+    if not isinstance(store, InMemoryCollection):
+        return
+    if entry["op"] == "upsert":
+        store.insert(entry["record"])
+    else:
+        store.delete(entry["id"])
+
+# ==================== WRITE-BEHIND JOURNAL ====================
+
+WRITE_BEHIND_JOURNAL = os.environ.get('WRITE_BEHIND_JOURNAL', str(ROOT_DIR / 'data' / 'write_behind.jsonl'))
+REPLAY_BATCH_SIZE = int(os.environ.get('REPLAY_BATCH_SIZE', '200'))
+REPLAY_CONCURRENCY = int(os.environ.get('REPLAY_CONCURRENCY', '2'))
+# Journaled writes MongoDB rejected on replay, kept for inspection instead of retried forever
+WRITE_BEHIND_DEAD_LETTER = os.environ.get(
+    'WRITE_BEHIND_DEAD_LETTER', str(ROOT_DIR / 'data' / 'write_behind_dead_letter.jsonl'))
+
+write_behind_journal = AppendOnlyLog(WRITE_BEHIND_JOURNAL, LOG_COMMIT_DELAY_MS / 1000)
+dead_letter_log = AppendOnlyLog(WRITE_BEHIND_DEAD_LETTER, LOG_COMMIT_DELAY_MS / 1000)
+replay_lock = asyncio.Lock()
+replay_scheduled = False
+
+def coalesce_journal(entries):
+    """Keep only the last write per (collection, id); homepage fields merge in order"""
+    records, homepage_fields = {}, {}
+    for entry in entries:
+        if entry["collection"] == "homepage":
+            homepage_fields.update(entry["fields"])
+        else:
+            key = (entry["collection"], entry["id"])
+            records.pop(key, None)
+            records[key] = entry
+    batches = {}
+    for (collection_name, _), entry in records.items():
+        batches.setdefault(collection_name, []).append(entry)
+    return batches, homepage_fields
+
+async def replay_write_behind_journal():
+    """Copy writes made during an outage to MongoDB; returns the number of entries replayed
+
+    Entries are coalesced per id and written as unordered bulk upserts/deletes
+    by id, so replaying the same journal twice is harmless.  At most
+    REPLAY_CONCURRENCY batches are in flight.  The journal is only trimmed once
+    every batch reached MongoDB; on a connection failure it is kept for the
+    next attempt.  Writes MongoDB itself rejects (per-document write errors)
+    would fail every attempt, so they go to the dead-letter log instead.
+    """
+    async with replay_lock:
+        entries, offset = write_behind_journal.read()
+        if not entries:
+            return 0
+        batches, homepage_fields = coalesce_journal(entries)
+        semaphore = asyncio.Semaphore(REPLAY_CONCURRENCY)
+
+        async def apply_batch(collection_name: str, batch):
+            operations = [
+                ReplaceOne({"id": entry["id"]}, entry["record"], upsert=True) if entry["op"] == "upsert"
+                else DeleteOne({"id": entry["id"]})
+                for entry in batch
+            ]
+            async with semaphore:
+                try:
+                    result = await db[collection_name].bulk_write(operations, ordered=False)
+                    upserted = result.upserted_ids
+                except BulkWriteError as e:
+                    upserted = [item["index"] for item in e.details.get("upserted", [])]
+                    errors = e.details.get("writeErrors", [])
+                    await dead_letter_log.append(*[
+                        {**batch[error["index"]], "error": error.get("errmsg")} for error in errors
+                    ])
+                    logger.error(f"MongoDB rejected {len(errors)} journaled {collection_name} writes; "
+                                 f"moved to {WRITE_BEHIND_DEAD_LETTER}")
+                if collection_name == "status_checks":
+                    # Only checks this replay inserted; a retried batch is not counted twice
+                    await record_status_rollups([batch[index]["record"] for index in upserted])
+
+        async def apply_homepage(fields):
+            try:
+                await db["homepage"].update_one({}, {"$set": fields, "$inc": {"revision": 1}}, upsert=True)
+            except OperationFailure as e:
+                await dead_letter_log.append({**homepage_entry(fields, None), "error": str(e)})
+                logger.error(f"MongoDB rejected the journaled homepage update; moved to {WRITE_BEHIND_DEAD_LETTER}")
+
+        jobs = [
+            apply_batch(collection_name, batch[start:start + REPLAY_BATCH_SIZE])
+            for collection_name, batch in batches.items()
+            for start in range(0, len(batch), REPLAY_BATCH_SIZE)
+        ]
+        if homepage_fields:
+            jobs.append(apply_homepage(homepage_fields))
+        errors = [result for result in await asyncio.gather(*jobs, return_exceptions=True) if isinstance(result, Exception)]
+        if errors:
+            raise errors[0]
+        await write_behind_journal.discard_through(offset)
+        for collection_name in batches:
+            mark_collection_dirty(collection_name)
+        if homepage_fields:
+            mark_collection_dirty("homepage", tuple(homepage_fields))
+        logger.info(f"✅ Replayed {len(entries)} journaled writes to MongoDB")
+        return len(entries)
+
+# ==================== LOCAL STORE ====================
+
+LOCAL_STORE_DIR = os.environ.get('LOCAL_STORE_DIR', str(ROOT_DIR / 'data' / 'local_store'))
+LOCAL_SNAPSHOT_EVERY = int(os.environ.get('LOCAL_SNAPSHOT_EVERY', '1000'))
+
+class LocalStore:
+    """File-backed persistence for in-memory storage when running without MongoDB
+
+    Every in-memory write is appended to ``oplog.jsonl``.  After
+    ``snapshot_every`` operations the whole state is written to
+    ``snapshot.jsonl`` (one record per line) and the log is trimmed to the
+    operations that came after it.  Startup maps the snapshot into memory,
+    parses it line by line and replays the remaining log on top.  Status
+    check rollups are not logged per heartbeat; they are only saved with
+    each snapshot, including the one taken on shutdown.
+    """
+
+    def __init__(self, directory, snapshot_every: int = 1000, commit_delay: float = 0.002):
+        self.directory = Path(directory)
+        self.snapshot_path = self.directory / "snapshot.jsonl"
+        self.oplog = AppendOnlyLog(self.directory / "oplog.jsonl", commit_delay)
+        self.snapshot_every = snapshot_every
+        self.opened = False
+        self.ops_since_snapshot = 0
+        # When the snapshot restored by load() was taken
+        self.snapshot_created_at = None
+        self._snapshot_task = None
+
+    def load(self) -> bool:
+        """Rebuild in-memory storage from disk; returns False when nothing was stored"""
+        found = False
+        if self.snapshot_path.exists() and self.snapshot_path.stat().st_size > 0:
+            records = {name: [] for name, store in in_memory_data.items() if isinstance(store, InMemoryCollection)}
+            with open(self.snapshot_path, "rb") as snapshot_file:
+                with mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    header = json.loads(mapped.readline(), object_hook=json_object_hook)
+                    rollups = {STATUS_CLIENTS_COLLECTION: [], STATUS_MINUTES_COLLECTION: []}
+                    for line in iter(mapped.readline, b""):
+                        item = json.loads(line, object_hook=json_object_hook)
+                        if item["c"] == "homepage":
+                            in_memory_data["homepage"] = item["r"]
+                        elif item["c"] in records:
+                            records[item["c"]].append(item["r"])
+                        elif item["c"] in rollups:
+                            rollups[item["c"]].append(item["r"])
+            for collection_name, items in records.items():
+                in_memory_data[collection_name].replace_all(items)
+            status_rollups.restore(rollups[STATUS_CLIENTS_COLLECTION], rollups[STATUS_MINUTES_COLLECTION])
+            self.snapshot_created_at = header.get("created_at")
+            logger.info(f"Loaded snapshot from {self.snapshot_created_at}")
+            found = True
+        entries, _ = self.oplog.read()
+        for entry in entries:
+            apply_memory_entry(entry)
+        self.ops_since_snapshot = len(entries)
+        self.opened = True
+        return found or bool(entries)
+
+    async def record(self, *entries: dict):
+        await self.oplog.append(*entries)
+        self.ops_since_snapshot += len(entries)
+        if self.ops_since_snapshot >= self.snapshot_every and (self._snapshot_task is None or self._snapshot_task.done()):
+            self._snapshot_task = asyncio.create_task(self.snapshot())
+
+    async def snapshot(self):
+        """Write the current state to disk and trim the log to what came after it"""
+        # Offset and state are captured together, with no await in between.  Stores
+        # replace records instead of mutating them, so references are enough.
+        offset = self.oplog.end_offset()
+        items = [("homepage", copy.deepcopy(in_memory_data["homepage"]))]
+        for collection_name, store in in_memory_data.items():
+            if isinstance(store, InMemoryCollection):
+                items.extend((collection_name, record) for record in store)
+        clients, minutes = status_rollups.dump()
+        items.extend((STATUS_CLIENTS_COLLECTION, client) for client in clients)
+        items.extend((STATUS_MINUTES_COLLECTION, minute) for minute in minutes)
+        self.ops_since_snapshot = 0
+        try:
+            await asyncio.to_thread(self._write_snapshot, items)
+            await self.oplog.discard_through(offset)
+        except Exception as e:
+            logger.error(f"❌ Error writing local store snapshot: {e}")
+
+    def _write_snapshot(self, items):
+        """Encode and write a snapshot; runs in a worker thread"""
+        lines = [encode_json_line({"version": 1, "created_at": datetime.utcnow()})]
+        lines.extend(encode_json_line({"c": collection_name, "r": record}) for collection_name, record in items)
+        write_file_atomically(self.snapshot_path, b"".join(lines))
+
+    async def close(self):
+        if self._snapshot_task is not None:
+            await self._snapshot_task
+        if self.opened:
+            await self.snapshot()
+        await self.oplog.close()
+
+local_store = LocalStore(LOCAL_STORE_DIR, LOCAL_SNAPSHOT_EVERY, LOG_COMMIT_DELAY_MS / 1000) if LOCAL_STORE_DIR else None
+
+# ==================== CIRCUIT BREAKER ====================
+
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get('BREAKER_FAILURE_THRESHOLD', '3'))
+BREAKER_FAILURE_WINDOW_SECONDS = float(os.environ.get('BREAKER_FAILURE_WINDOW_SECONDS', '30'))
+BREAKER_PROBE_INTERVAL_SECONDS = float(os.environ.get('BREAKER_PROBE_INTERVAL_SECONDS', '5'))
+BREAKER_PROBE_SUCCESSES = int(os.environ.get('BREAKER_PROBE_SUCCESSES', '2'))
+
+class CircuitBreaker:
+    """Stops calling MongoDB after repeated connection failures and probes for recovery.
+
+    closed: requests go to MongoDB; connection failures inside the window are counted.
+    open: requests go straight to in-memory storage while a background task probes.
+    half_open: a probe is in flight; enough consecutive successful probes close the breaker.
+
+    ``on_recover`` runs before closing (e.g. to replay journaled writes); if it
+    fails the breaker stays open and probing continues.  ``on_switch`` runs
+    whenever requests move from one backend to the other, i.e. on trip and
+    on close.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, probe, failure_threshold: int = 3, failure_window: float = 30.0,
+                 probe_interval: float = 5.0, probe_successes: int = 2, on_recover=None, on_switch=None):
+        self.probe = probe
+        self.on_recover = on_recover
+        self.on_switch = on_switch
+        self.failure_threshold = failure_threshold
+        self.failure_window = failure_window
+        self.probe_interval = probe_interval
+        self.probe_successes = probe_successes
+        self.state = self.CLOSED
+        self.opened_at = None
+        self.last_error = None
+        self.trips = 0
+        self.short_circuited = 0
+        self._failures = deque()
+        self._probe_task = None
+
+    @staticmethod
+    def is_outage(error) -> bool:
+        """Only connectivity problems count; query errors say nothing about availability"""
+        return isinstance(error, (ConnectionFailure, asyncio.TimeoutError, OSError))
+
+    def allow_request(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        self.short_circuited += 1
+        return False
+
+    def record_failure(self, error):
+        if self.state != self.CLOSED or not self.is_outage(error):
+            return
+        now = time.monotonic()
+        self.last_error = str(error)
+        self._failures.append(now)
+        self._expire_failures(now)
+        if len(self._failures) >= self.failure_threshold:
+            self.trip()
+
+    def _expire_failures(self, now: float):
+        while self._failures and now - self._failures[0] > self.failure_window:
+            self._failures.popleft()
+
+    def trip(self):
+        self.state = self.OPEN
+        self.opened_at = datetime.utcnow()
+        self.trips += 1
+        self._failures.clear()
+        logger.warning(f"⚠️ MongoDB circuit breaker opened, serving from in-memory storage: {self.last_error}")
+        if self.on_switch is not None:
+            self.on_switch()
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.create_task(self._probe_until_closed())
+
+    async def _probe_until_closed(self):
+        successes = 0
+        while self.state != self.CLOSED:
+            await asyncio.sleep(self.probe_interval)
+            self.state = self.HALF_OPEN
+            try:
+                await self.probe()
+            except Exception as e:
+                self.state = self.OPEN
+                self.last_error = str(e)
+                successes = 0
+                continue
+            successes += 1
+            if successes >= self.probe_successes:
+                if self.on_recover is not None:
+                    try:
+                        await self.on_recover()
+                    except Exception as e:
+                        self.state = self.OPEN
+                        self.last_error = str(e)
+                        logger.error(f"MongoDB recovery step failed, keeping circuit open: {e}")
+                        successes = 0
+                        continue
+                self.state = self.CLOSED
+                self.opened_at = None
+                logger.info("✅ MongoDB circuit breaker closed, MongoDB reachable again")
+                if self.on_switch is not None:
+                    self.on_switch()
+
+    def stats(self):
+        self._expire_failures(time.monotonic())
+        return {
+            "state": self.state,
+            "opened_at": self.opened_at.isoformat() if self.opened_at else None,
+            "recent_failures": len(self._failures),
+            "trips": self.trips,
+            "short_circuited": self.short_circuited,
+            "last_error": self.last_error,
+        }
+
+async def ping_mongo():
+    """Cheap round trip used by the circuit breaker probe"""
+    await asyncio.wait_for(db.command("ping"), timeout=MONGO_TIMEOUT_MS / 1000)
+
+mongo_breaker = CircuitBreaker(
+    ping_mongo,
+    failure_threshold=BREAKER_FAILURE_THRESHOLD,
+    failure_window=BREAKER_FAILURE_WINDOW_SECONDS,
+    probe_interval=BREAKER_PROBE_INTERVAL_SECONDS,
+    probe_successes=BREAKER_PROBE_SUCCESSES,
+    on_recover=replay_write_behind_journal,
+    # Responses built from the other backend must not be served or revalidated
+    on_switch=mark_all_collections_dirty,
+)
+
+def mongo_available() -> bool:
+    """True when MongoDB is configured and the circuit breaker lets requests through"""
+    return db is not None and mongo_breaker.allow_request()
+
+# ==================== REQUEST COALESCING ====================
+
+class SingleFlight:
+    """Concurrent identical calls share one in-flight load
+
+    The load runs as its own task and every caller awaits it through
+    ``asyncio.shield``, so a caller that disconnects or times out is
+    cancelled alone; the load carries on for everyone else.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+
+    def __len__(self):
+        return len(self._inflight)
+
+    async def do(self, key, loader, label: str):
+        singleflight_calls_total.inc(label)
+        task = self._inflight.get(key)
+        if task is not None:
+            singleflight_coalesced_total.inc(label)
+        else:
+            task = asyncio.ensure_future(loader())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every caller was cancelled
+            task.exception()
+
+read_flights = SingleFlight()
+
+def single_flight(func):
+    """Coalesce concurrent identical calls of a storage read helper
+
+    The key includes the collection version, so a read that starts after a
+    write never joins a flight that began before it.  Only MongoDB reads are
+    worth sharing; without a database the helper is called directly.
+    """
+    @functools.wraps(func)
+    async def wrapper(collection_name: str, *args, **kwargs):
+        if db is None:
+            return await func(collection_name, *args, **kwargs)
+        key = (func.__name__, collection_name, collection_versions.get(collection_name, 0),
+               repr(args), repr(sorted(kwargs.items())))
+        return await read_flights.do(
+            key, lambda: func(collection_name, *args, **kwargs), f"{func.__name__}:{collection_name}"
+        )
+    return wrapper
+
 # ==================== HELPER FUNCTIONS ====================
 
 async def get_collection_or_memory(collection_name: str):
     """Get data from MongoDB or fallback to in-memory storage"""
-    if db is not None:
+    if mongo_available():
         try:
             collection = db[collection_name]
             return collection
-        except:
+        except Exception as e:
+            mongo_breaker.record_failure(e)
             return None
     return None
 
+# Unpaginated list reads return at most this many records, on either backend
+MAX_LIST_SIZE = 1000
+
+def get_memory_data(collection_name: str, default_data=None):
+    """Read a collection from in-memory storage as plain data"""
+    data = in_memory_data.get(collection_name)
+    if data is None:
+        return default_data
+    if isinstance(data, InMemoryCollection):
+        return list(islice(data, MAX_LIST_SIZE))
+    return data
+
+@profiled_storage
+@single_flight
 async def get_data_or_memory(collection_name: str, default_data=None):
     """Get data from MongoDB or fallback to in-memory storage"""
-    if db is not None:
+    if mongo_available():
         try:
             collection = db[collection_name]
             if collection_name == "homepage":
-                data = await collection.find_one({})
+                data = await collection.find_one({}, {"_id": 0})
                 if data:
+                    storage_operations_total.inc(collection_name, "read", "mongo")
                     return data
                 # If no data in MongoDB, check in-memory storage
-                return in_memory_data.get(collection_name, default_data)
+                storage_operations_total.inc(collection_name, "read", "memory")
+                return get_memory_data(collection_name, default_data)
             else:
-                cursor = collection.find({})
-                data = await cursor.to_list(1000)
+                cursor = collection.find({}, {"_id": 0}).limit(MAX_LIST_SIZE)
+                data = await cursor.to_list(MAX_LIST_SIZE)
                 if data:
+                    storage_operations_total.inc(collection_name, "read", "mongo")
                     return data
                 # If no data in MongoDB, check in-memory storage
-                return in_memory_data.get(collection_name, default_data)
-        except:
+                storage_operations_total.inc(collection_name, "read", "memory")
+                return get_memory_data(collection_name, default_data)
+        except Exception as e:
+            mongo_breaker.record_failure(e)
+            storage_fallbacks_total.inc(collection_name, "read")
             # If MongoDB fails, check in-memory storage
-            return in_memory_data.get(collection_name, default_data)
-    return in_memory_data.get(collection_name, default_data)
+    storage_operations_total.inc(collection_name, "read", "memory")
+    return get_memory_data(collection_name, default_data)
+
+@profiled_storage
+@single_flight
+async def get_records_by_ids(collection_name: str, record_ids: List[str]):
+    """Fetch only the given ids, in the order requested, skipping missing ones"""
+    if not record_ids:
+        return []
+    if mongo_available():
+        try:
+            collection = db[collection_name]
+            cursor = collection.find({"id": {"$in": list(record_ids)}}, {"_id": 0})
+            found = {doc["id"]: doc for doc in await cursor.to_list(len(record_ids))}
+            # Only an empty collection falls back to in-memory storage; missing ids are skipped
+            if found or await collection.estimated_document_count() > 0:
+                storage_operations_total.inc(collection_name, "read", "mongo")
+                return [found[record_id] for record_id in record_ids if record_id in found]
+        except Exception as e:
+            mongo_breaker.record_failure(e)
+            storage_fallbacks_total.inc(collection_name, "read")
+            logger.error(f"Database error in get_records_by_ids: {e}")
+    storage_operations_total.inc(collection_name, "read", "memory")
+    store = in_memory_data.get(collection_name)
+    if isinstance(store, InMemoryCollection):
+        return store.get_many(record_ids)
+    return []
+
+async def get_cached_data(collection_name: str, default_data=None):
+    """Read a collection through the response cache"""
+    return await cached_read(
+        collection_name,
+        (collection_name,),
+        lambda: get_data_or_memory(collection_name, default_data),
+    )
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(record, sort_field: str):
+    """Opaque cursor pointing just after ``record`` in (sort_field, id) order"""
+    value = record.get(sort_field)
+    if isinstance(value, datetime):
+        value = {"$date": value.isoformat()}
+    raw = json.dumps([value, record["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    """Inverse of encode_cursor; returns (value, id)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, record_id = json.loads(raw)
+        if isinstance(value, dict):
+            value = naive_utc(datetime.fromisoformat(value["$date"]))
+        return value, str(record_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_query(sort_field: str, after, descending: bool):
+    """MongoDB filter selecting the documents after the cursor key"""
+    if after is None:
+        return {}
+    value, record_id = after
+    op = "$lt" if descending else "$gt"
+    if sort_field == "id":
+        return {"id": {op: record_id}}
+    clauses = [{sort_field: value, "id": {op: record_id}}]
+    # null sorts before every value but never satisfies $gt/$lt against one
+    if value is None:
+        if not descending:
+            clauses.append({sort_field: {"$ne": None}})
+    else:
+        clauses.append({sort_field: {op: value}})
+        if descending:
+            clauses.append({sort_field: None})
+    return {"$or": clauses}
+
+def mongo_filter(conditions):
+    """MongoDB query for a list of (op, field, value) conditions"""
+    query = {}
+    for op, field, value in conditions:
+        if op == "eq":
+            query[field] = value
+        elif op == "contains":
+            query[field] = {"$regex": re.escape(value), "$options": "i"}
+        else:
+            query.setdefault(field, {})[f"${op}"] = value
+    return query
+
+def record_matches(record, conditions):
+    """In-memory equivalent of mongo_filter"""
+    for op, field, value in conditions:
+        actual = record.get(field)
+        if op == "eq":
+            if actual != value:
+                return False
+        elif op == "contains":
+            if value.lower() not in str(actual or "").lower():
+                return False
+        elif actual is None:
+            return False
+        elif op == "gte" and actual < value:
+            return False
+        elif op == "lte" and actual > value:
+            return False
+    return True
+
+def plan_memory_query(store: InMemoryCollection, conditions):
+    """Candidates from the most selective usable index, or None to scan in sort order"""
+    best_size, best_plan = None, None
+    bounds = {}
+    for op, field, value in conditions:
+        if op == "eq" and store.has_index(field):
+            size = store.count_by(field, value)
+            if best_size is None or size < best_size:
+                best_size, best_plan = size, ("eq", field, value)
+        elif op in ("gte", "lte") and store.has_sorted_index(field):
+            low, high = bounds.get(field, (None, None))
+            bounds[field] = (value, high) if op == "gte" else (low, value)
+    for field, (low, high) in bounds.items():
+        start, end = store.range_bounds(field, low, high)
+        if best_size is None or end - start < best_size:
+            best_size, best_plan = end - start, ("range", field, (low, high))
+    if best_plan is None:
+        return None
+    kind, field, value = best_plan
+    return store.find_by(field, value) if kind == "eq" else store.range(field, *value)
+
+def project(record: dict, fields):
+    """Copy of ``record`` restricted to ``fields``"""
+    return {field: record[field] for field in fields if field in record}
+
+def query_memory(store: InMemoryCollection, conditions, sort_field: Optional[str], after, limit, descending: bool):
+    """Filter, order and cut an in-memory collection using its indexes"""
+    candidates = plan_memory_query(store, conditions)
+    if candidates is None:
+        records = store.iter_sorted(sort_field, after, descending) if sort_field else iter(store)
+        matched = (record for record in records if record_matches(record, conditions))
+        return list(islice(matched, limit)) if limit is not None else list(matched)
+    matched = [record for record in candidates if record_matches(record, conditions)]
+    if sort_field is None:
+        return matched[:limit] if limit is not None else matched
+    matched.sort(key=lambda record: sort_key(record.get(sort_field), record["id"]), reverse=descending)
+    if after is not None:
+        after_key = sort_key(*after)
+        if descending:
+            matched = [r for r in matched if sort_key(r.get(sort_field), r["id"]) < after_key]
+        else:
+            matched = [r for r in matched if sort_key(r.get(sort_field), r["id"]) > after_key]
+    return matched[:limit] if limit is not None else matched
+
+@profiled_storage
+@single_flight
+async def query_records(collection_name: str, conditions=(), sort_field: Optional[str] = None,
+                        descending: bool = False, after=None, limit: Optional[int] = None,
+                        fields=None):
+    """Filtered records from MongoDB or in-memory storage
+
+    Records come back in (sort_field, id) order, or natural order when no
+    sort field is given.  ``fields`` restricts the returned keys and is pushed
+    down to MongoDB as a projection.
+    """
+    if mongo_available():
+        try:
+            collection = db[collection_name]
+            query = mongo_filter(conditions)
+            keyset = keyset_query(sort_field, after, descending) if sort_field else {}
+            if query and keyset:
+                query = {"$and": [query, keyset]}
+            else:
+                query = query or keyset
+            projection = {"_id": 0}
+            if fields:
+                projection.update((field, 1) for field in fields)
+            db_cursor = collection.find(query, projection)
+            if sort_field:
+                direction = DESCENDING if descending else ASCENDING
+                sort = [(sort_field, direction)]
+                if sort_field != "id":
+                    sort.append(("id", direction))
+                db_cursor = db_cursor.sort(sort)
+            if limit is not None:
+                db_cursor = db_cursor.limit(limit)
+            docs = await db_cursor.to_list(limit)
+            if docs or await collection.estimated_document_count() > 0:
+                storage_operations_total.inc(collection_name, "read", "mongo")
+                return docs
+            # If no data in MongoDB, check in-memory storage
+        except Exception as e:
+            mongo_breaker.record_failure(e)
+            storage_fallbacks_total.inc(collection_name, "read")
+            logger.error(f"Database error in query_records: {e}")
+    storage_operations_total.inc(collection_name, "read", "memory")
+    store = in_memory_data.get(collection_name)
+    if not isinstance(store, InMemoryCollection):
+        return []
+    records = query_memory(store, conditions, sort_field, after, limit, descending)
+    if fields:
+        return [project(record, fields) for record in records]
+    return records
+
+async def get_page(collection_name: str, limit: int, cursor: Optional[str] = None,
+                   sort_field: str = "id", descending: bool = False, conditions=(), fields=None):
+    """Fetch one page ordered by (sort_field, id) from MongoDB or in-memory storage"""
+    after = decode_cursor(cursor) if cursor else None
+    if fields and sort_field not in fields:
+        fields = [*fields, sort_field]
+    docs = await query_records(collection_name, conditions, sort_field, descending, after, limit + 1, fields)
+    items = docs[:limit]
+    next_cursor = encode_cursor(items[-1], sort_field) if len(docs) > limit else None
+    return {"items": items, "next": next_cursor}
+
+# Serializes read-modify-write updates of the in-memory homepage document
+homepage_lock = asyncio.Lock()
+
+def revision_conflict(current_revision: int):
+    return HTTPException(
+        status_code=409,
+        detail={"message": "Homepage was modified by someone else", "revision": current_revision},
+    )
 
+@profiled_storage
+async def update_homepage_fields(mongo_update: dict, apply_in_memory, section: Optional[str] = None,
+                                 expected_revision: Optional[int] = None, precondition: Optional[dict] = None):
+    """Apply a targeted update to the homepage document; returns (changed, revision)
+
+    On MongoDB ``mongo_update`` runs as one atomic find_one_and_update, so only
+    the touched fields are written and concurrent edits of other fields
+    survive.  Every change increments the document ``revision``; when
+    ``expected_revision`` is given and no longer current, a 409 is raised.
+    ``precondition`` is an extra match (e.g. "not already featured") that
+    turns the update into a no-op when unmet.  ``apply_in_memory(homepage)``
+    is the in-memory equivalent and returns the changed flag.
+    """
+    sections = (section,) if section else None
+    if mongo_available():
+        try:
+            collection = db["homepage"]
+            match = dict(precondition or {})
+            if expected_revision is not None:
+                # Documents written before revisions existed count as revision 0
+                match["revision"] = {"$in": [0, None]} if expected_revision == 0 else expected_revision
+            update = {**mongo_update, "$inc": {"revision": 1}}
+            projection = {"_id": 0, "revision": 1}
+            for attempt in range(2):
+                doc = await collection.find_one_and_update(
+                    match, update, projection=projection, return_document=ReturnDocument.AFTER
+                )
+                if doc is not None:
+                    mark_collection_dirty("homepage", sections)
+                    return True, doc["revision"]
+                current = await collection.find_one({}, projection)
+                if current is not None:
+                    break
+                # No homepage stored yet: start from the data currently being served
+                seed = copy.deepcopy(get_memory_data("homepage", default_homepage_data))
+                seed["revision"] = seed.get("revision", 0)
+                await collection.update_one({}, {"$setOnInsert": seed}, upsert=True)
+            current_revision = current.get("revision", 0) if current else 0
+            if expected_revision is not None and current_revision != expected_revision:
+                raise revision_conflict(current_revision)
+            return False, current_revision
+        except HTTPException:
+            raise
+        except Exception as e:
+            mongo_breaker.record_failure(e)
+            storage_fallbacks_total.inc("homepage", "write")
+            logger.error(f"Database error in update_homepage_fields: {e}")
+            logger.info("Falling back to in-memory storage...")
+    async with homepage_lock:
+        homepage = in_memory_data["homepage"]
+        current_revision = homepage.get("revision", 0)
+        if expected_revision is not None and current_revision != expected_revision:
+            raise revision_conflict(current_revision)
+        changed = apply_in_memory(homepage)
+        if changed:
+            homepage["revision"] = current_revision + 1
+            touched = sections or [key for key in homepage if key != "revision"]
+            await journal_memory_write(homepage_entry(
+                {key: homepage[key] for key in touched if key in homepage}, homepage["revision"]
+            ))
+    if changed:
+        mark_collection_dirty("homepage", sections)
+    return changed, homepage["revision"] if changed else current_revision
+
+@profiled_storage
 async def save_data_or_memory(collection_name: str, data, is_update=False):
     """Save data to MongoDB or fallback to in-memory storage"""
-    if db is not None:
+    if mongo_available():
         try:
             collection = db[collection_name]
             if collection_name == "homepage":
                 if is_update:
-                    # For homepage, replace the entire document
-                    await collection.replace_one({}, data, upsert=True)
+                    # For homepage, set every section and bump the revision in one update
+                    sections = {key: value for key, value in data.items() if key not in ("_id", "revision")}
+                    update = {"$set": sections, "$inc": {"revision": 1}}
+                    # No homepage stored yet: the other sections start from the data being served
+                    seed = {key: value for key, value in get_memory_data("homepage", default_homepage_data).items()
+                            if key not in sections and key not in ("_id", "revision")}
+                    if seed:
+                        update["$setOnInsert"] = copy.deepcopy(seed)
+                    await collection.update_one({}, update, upsert=True)
                 else:
                     await collection.insert_one(data)
             else:
                 if is_update:
-                    await collection.replace_one({"_id": data.get("id")}, data, upsert=True)
+                    await collection.replace_one({"id": data.get("id")}, data, upsert=True)
                 else:
                     await collection.insert_one(data)
+            mark_collection_dirty(collection_name)
+            storage_operations_total.inc(collection_name, "write", "mongo")
             return True
         except Exception as e:
+            mongo_breaker.record_failure(e)
+            storage_fallbacks_total.inc(collection_name, "write")
             logger.error(f"Database error in save_data_or_memory: {e}")
             # Fall back to in-memory storage if MongoDB fails
             logger.info("Falling back to in-memory storage...")
@@ -376,44 +2839,237 @@ async def save_data_or_memory_internal(collection_name: str, data, is_update=Fal
     """Internal function for in-memory storage"""
     try:
         if collection_name == "homepage":
-            in_memory_data[collection_name] = data
+            homepage = in_memory_data[collection_name]
+            sections = {key: value for key, value in data.items() if key not in ("_id", "revision")}
+            revision = homepage.get("revision", 0) + 1
+            # Updates merge the given sections, as the $set does on MongoDB
+            base = homepage if is_update else {}
+            in_memory_data[collection_name] = {**base, **sections, "revision": revision}
+            await journal_memory_write(homepage_entry(sections, revision))
         else:
-            if is_update:
-                # Update existing item
-                for i, item in enumerate(in_memory_data[collection_name]):
-                    if item.get("id") == data.get("id"):
-                        in_memory_data[collection_name][i] = data
-                        break
-            else:
-                # Add new item
-                in_memory_data[collection_name].append(data)
+            # Updates upsert, as replace_one(upsert=True) does on MongoDB
+            in_memory_data[collection_name].insert(data)
+            await journal_memory_write(upsert_entry(collection_name, data))
+        mark_collection_dirty(collection_name)
+        storage_operations_total.inc(collection_name, "write", "memory")
         logger.info(f"✅ Data saved to in-memory storage: {collection_name}")
         return True
     except Exception as e:
         logger.error(f"❌ Error saving to in-memory storage: {e}")
         return False
 
+# ==================== BULK OPERATIONS ====================
+
+MAX_BULK_ITEMS = 1000
+
+BULK_MODELS = {"packages": Package, "blog_posts": BlogPost, "destinations": Destination}
+
+def validate_bulk_items(collection_name: str, items: List[dict]):
+    """Validate each item on its own so one bad record does not sink the batch"""
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ITEMS} items per request")
+    model = BULK_MODELS[collection_name]
+    records, results = [], []
+    for index, item in enumerate(items):
+        try:
+            record = model(**item).dict()
+        except ValidationError as e:
+            results.append({"index": index, "id": item.get("id"), "status": "invalid",
+                            "error": e.errors(include_url=False)})
+            continue
+        records.append((index, record))
+        results.append(None)
+    return records, results
+
+def bulk_save_memory(collection_name: str, records, upsert: bool):
+    """Apply a batch to in-memory storage in one pass; returns a status per record"""
+    store = in_memory_data[collection_name]
+    statuses = []
+    for record in records:
+        if record["id"] in store:
+            if upsert:
+                store.update(record["id"], record)
+                statuses.append("updated")
+            else:
+                statuses.append("exists")
+        else:
+            store.insert(record)
+            statuses.append("created")
+    return statuses
+
+@profiled_storage
+async def bulk_save_records(collection_name: str, records, upsert: bool):
+    """Insert or upsert a batch by id; returns (status, error) per record
+
+    On MongoDB the batch is a single unordered bulk_write: upserts are
+    ReplaceOne(upsert=True), inserts are $setOnInsert upserts so existing ids
+    are reported instead of duplicated.
+    """
+    if not records:
+        return []
+    if mongo_available():
+        try:
+            if upsert:
+                operations = [ReplaceOne({"id": r["id"]}, r, upsert=True) for r in records]
+            else:
+                operations = [UpdateOne({"id": r["id"]}, {"$setOnInsert": r}, upsert=True) for r in records]
+            errors = {}
+            try:
+                result = await db[collection_name].bulk_write(operations, ordered=False)
+                upserted = set(result.upserted_ids)
+            except BulkWriteError as e:
+                upserted = {item["index"] for item in e.details.get("upserted", [])}
+                errors = {item["index"]: item.get("errmsg") for item in e.details.get("writeErrors", [])}
+            mark_collection_dirty(collection_name)
+            outcomes = []
+            for position in range(len(records)):
+                if position in errors:
+                    outcomes.append(("failed", errors[position]))
+                elif position in upserted:
+                    outcomes.append(("created", None))
+                else:
+                    outcomes.append(("updated" if upsert else "exists", None))
+            return outcomes
+        except Exception as e:
+            mongo_breaker.record_failure(e)
+            storage_fallbacks_total.inc(collection_name, "write")
+            logger.error(f"Database error in bulk_save_records: {e}")
+            logger.info("Falling back to in-memory storage...")
+    statuses = bulk_save_memory(collection_name, records, upsert)
+    await journal_memory_write(*[
+        upsert_entry(collection_name, record) for record, status in zip(records, statuses) if status != "exists"
+    ])
+    mark_collection_dirty(collection_name)
+    return [(status, None) for status in statuses]
+
+@profiled_storage
+async def bulk_delete_records(collection_name: str, record_ids: List[str]):
+    """Delete a batch of ids; returns the set of ids that existed"""
+    if not record_ids:
+        return set()
+    if mongo_available():
+        try:
+            collection = db[collection_name]
+            found = await collection.find({"id": {"$in": record_ids}}, {"_id": 0, "id": 1}).to_list(None)
+            if found:
+                await collection.delete_many({"id": {"$in": record_ids}})
+                mark_collection_dirty(collection_name)
+                return {doc["id"] for doc in found}
+        except Exception as e:
+            mongo_breaker.record_failure(e)
+            storage_fallbacks_total.inc(collection_name, "delete")
+            logger.error(f"Database error in bulk_delete_records: {e}")
+    store = in_memory_data[collection_name]
+    deleted = {record_id for record_id in record_ids if store.delete(record_id) is not None}
+    await journal_memory_write(*[delete_entry(collection_name, record_id) for record_id in deleted])
+    mark_collection_dirty(collection_name)
+    return deleted
+
+async def run_bulk_save(collection_name: str, items: List[dict], mode: str):
+    """Validate, write and report a bulk create/upsert request"""
+    records, results = validate_bulk_items(collection_name, items)
+    outcomes = await bulk_save_records(collection_name, [record for _, record in records], mode == "upsert")
+    for (index, record), (status, error) in zip(records, outcomes):
+        results[index] = {"index": index, "id": record["id"], "status": status}
+        if error:
+            results[index]["error"] = error
+        elif status == "exists":
+            results[index]["error"] = "A record with this id already exists"
+        elif collection_name in SEARCHABLE_COLLECTIONS and status in ("created", "updated"):
+            index_for_search(collection_name, record)
+    if collection_name == "packages":
+        schedule_destination_counts_reconcile()
+    summary = {status: 0 for status in ("created", "updated", "exists", "invalid", "failed")}
+    for result in results:
+        summary[result["status"]] += 1
+    return {"summary": summary, "results": results}
+
+async def run_bulk_delete(collection_name: str, record_ids: List[str]):
+    """Delete a batch of ids and report which ones were found"""
+    if len(record_ids) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ITEMS} items per request")
+    deleted = await bulk_delete_records(collection_name, record_ids)
+    if collection_name in SEARCHABLE_COLLECTIONS:
+        for record_id in deleted:
+            unindex_for_search(collection_name, record_id)
+    if collection_name == "packages" and deleted:
+        schedule_destination_counts_reconcile()
+    results = [
+        {"index": index, "id": record_id, "status": "deleted" if record_id in deleted else "not_found"}
+        for index, record_id in enumerate(record_ids)
+    ]
+    return {"summary": {"deleted": len(deleted), "not_found": len(record_ids) - len(deleted)}, "results": results}
+
 # ==================== API ROUTES ====================
 
 @api_router.get("/")
 async def root():
-    return {"message": "Travel Company API", "status": "running", "db_status": "connected" if db is not None else "in_memory"}
+    return {"message": "Travel Company API", "status": "running", "db_status": "connected" if mongo_available() else "in_memory"}
 
 @api_router.get("/health")
 async def health_check():
-    if db is not None:
-        try:
-            # Test MongoDB connection
-            await db.command("ping")
-            return {"status": "healthy", "database": "connected"}
-        except Exception as e:
-            logger.error(f"MongoDB connection test failed: {e}")
-            return {"status": "healthy", "database": "in-memory (MongoDB failed)"}
-    else:
-        return {"status": "healthy", "database": "in-memory"}
+    if db is None:
+        return {"status": "healthy", "database": "in-memory", "circuit_breaker": mongo_breaker.stats()}
+    if not mongo_available():
+        return {"status": "healthy", "database": "in-memory (MongoDB unavailable)", "circuit_breaker": mongo_breaker.stats()}
+    try:
+        # Test MongoDB connection
+        await asyncio.wait_for(db.command("ping"), timeout=MONGO_TIMEOUT_MS / 1000)
+        return {"status": "healthy", "database": "connected", "circuit_breaker": mongo_breaker.stats()}
+    except Exception as e:
+        mongo_breaker.record_failure(e)
+        logger.error(f"MongoDB connection test failed: {e}")
+        return {"status": "healthy", "database": "in-memory (MongoDB failed)", "circuit_breaker": mongo_breaker.stats()}
+
+@api_router.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@api_router.get("/ready")
+async def readiness_check(response: Response):
+    """Readiness probe: 503 until the storage backend has been chosen"""
+    if not startup_state["ready"]:
+        response.status_code = 503
+        return {"status": "starting", "database": startup_state["database"]}
+    return {"status": "ready", "database": startup_state["database"], "seeded": startup_state["seeded"]}
 
 # ==================== ADMIN ROUTES ====================
 
+@api_router.get("/admin/cache")
+async def get_cache_stats():
+    """Get response cache hit/miss counters"""
+    return response_cache.stats()
+
+def require_profile_token(request: Request):
+    if not PROFILE_TOKEN:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not has_profile_token(request.headers.get(PROFILE_HEADER)):
+        raise HTTPException(status_code=403, detail="Invalid profile token")
+
+@api_router.get("/admin/profiles")
+async def list_profiles(request: Request):
+    """Summaries of the stored request profiles, newest first"""
+    require_profile_token(request)
+    return [profile.summary() for profile in reversed(stored_profiles.values())]
+
+@api_router.get("/admin/profiles/{profile_id}")
+async def get_profile(request: Request, profile_id: str, format: str = Query("json", pattern="^(json|text|pstats)$")):
+    """One stored profile: summary and report as JSON, the report as text, or raw pstats for snakeviz/pstats"""
+    require_profile_token(request)
+    profile = stored_profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "pstats":
+        return Response(
+            marshal.dumps(profile.stats),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.pstats"'},
+        )
+    if format == "text":
+        return Response(profile.report(), media_type="text/plain")
+    return {**profile.summary(), "report": profile.report()}
+
 @api_router.get("/admin/homepage")
 async def get_homepage_data():
     """Get current homepage data"""
@@ -433,17 +3089,56 @@ async def update_homepage_data(data: dict):
         logger.error(f"Error updating homepage: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to update homepage: {str(e)}")
 
+@api_router.patch("/admin/homepage/{section}")
+async def patch_homepage_section(section: str, fields: dict, revision: Optional[int] = None):
+    """Update some fields of one homepage section
+
+    Only the given fields are written (``$set`` on ``section.field``).  Pass
+    the ``revision`` read from GET /api/admin/homepage to have the update
+    rejected with 409 if someone else changed the homepage in the meantime.
+    """
+    if section not in HOMEPAGE_SECTIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown homepage section: {section}")
+    if not fields:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    if any(not key or "." in key or key.startswith("$") for key in fields):
+        raise HTTPException(status_code=400, detail="Field names may not be empty, contain '.' or start with '$'")
+
+    def apply(homepage):
+        current = homepage.get(section)
+        homepage[section] = {**(current if isinstance(current, dict) else {}), **fields}
+        return True
+
+    try:
+        _, new_revision = await update_homepage_fields(
+            {"$set": {f"{section}.{key}": value for key, value in fields.items()}},
+            apply,
+            section,
+            expected_revision=revision,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error updating homepage section {section}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to update homepage: {str(e)}")
+    return {"message": "Homepage section updated successfully", "section": section,
+            "revision": new_revision, "data": fields}
+
 @api_router.get("/admin/packages")
-async def get_all_packages():
-    """Get all travel packages"""
-    packages = await get_data_or_memory("packages", [])
-    return packages
+async def get_all_packages(limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None):
+    """Get all travel packages, or one page of them when limit/cursor is given"""
+    if limit is None and cursor is None:
+        return await get_data_or_memory("packages", [])
+    return await get_page("packages", limit or DEFAULT_PAGE_SIZE, cursor)
 
 @api_router.post("/admin/packages")
 async def create_package(package: Package):
     """Create a new travel package"""
-    success = await save_data_or_memory("packages", package.dict())
+    package_dict = package.dict()
+    success = await save_data_or_memory("packages", package_dict)
     if success:
+        index_for_search("packages", package_dict)
+        package_count_changed(destination_counts.add(package_dict["destination"], 1))
         return {"message": "Package created successfully", "package": package}
     raise HTTPException(status_code=500, detail="Failed to create package")
 
@@ -452,28 +3147,41 @@ async def update_package(package_id: str, package: Package):
     """Update an existing travel package"""
     package_dict = package.dict()
     package_dict["id"] = package_id
+    previous = await get_records_by_ids("packages", [package_id])
     success = await save_data_or_memory("packages", package_dict, is_update=True)
     if success:
+        index_for_search("packages", package_dict)
+        if previous:
+            package_count_changed(destination_counts.move(previous[0].get("destination"), package_dict["destination"]))
+        else:
+            package_count_changed(destination_counts.add(package_dict["destination"], 1))
         return {"message": "Package updated successfully", "package": package_dict}
     raise HTTPException(status_code=500, detail="Failed to update package")
 
 @api_router.delete("/admin/packages/{package_id}")
 async def delete_package(package_id: str):
     """Delete a travel package"""
-    if db is not None:
+    if mongo_available():
         try:
             collection = db["packages"]
-            result = await collection.delete_one({"_id": package_id})
-            if result.deleted_count > 0:
+            deleted = await collection.find_one_and_delete({"id": package_id}, {"_id": 0, "destination": 1})
+            if deleted is not None:
+                mark_collection_dirty("packages")
+                unindex_for_search("packages", package_id)
+                package_count_changed(destination_counts.add(deleted.get("destination"), -1))
                 return {"message": "Package deleted successfully"}
-        except:
+        except Exception as e:
+            mongo_breaker.record_failure(e)
             pass
     
     # In-memory deletion
-    for i, package in enumerate(in_memory_data["packages"]):
-        if package.get("id") == package_id:
-            del in_memory_data["packages"][i]
-            return {"message": "Package deleted successfully"}
+    deleted = in_memory_data["packages"].delete(package_id)
+    if deleted is not None:
+        await journal_memory_write(delete_entry("packages", package_id))
+        mark_collection_dirty("packages")
+        unindex_for_search("packages", package_id)
+        package_count_changed(destination_counts.add(deleted.get("destination"), -1))
+        return {"message": "Package deleted successfully"}
     
     raise HTTPException(status_code=404, detail="Package not found")
 
@@ -488,15 +3196,13 @@ async def get_featured_packages():
 @api_router.put("/admin/featured-packages")
 async def update_featured_packages(featured_data: dict):
     """Update featured packages configuration"""
+    def apply(homepage):
+        homepage["featuredPackages"] = featured_data
+        return True
+
     try:
-        homepage_data = await get_data_or_memory("homepage", default_homepage_data)
-        homepage_data["featuredPackages"] = featured_data
-        
-        success = await save_data_or_memory("homepage", homepage_data, is_update=True)
-        if success:
-            return {"message": "Featured packages updated successfully", "data": featured_data}
-        else:
-            raise HTTPException(status_code=500, detail="Failed to save data")
+        await update_homepage_fields({"$set": {"featuredPackages": featured_data}}, apply, "featuredPackages")
+        return {"message": "Featured packages updated successfully", "data": featured_data}
     except Exception as e:
         logger.error(f"Error updating featured packages: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to update featured packages: {str(e)}")
@@ -504,32 +3210,30 @@ async def update_featured_packages(featured_data: dict):
 @api_router.post("/admin/featured-packages/add")
 async def add_featured_package(package_id: str, order: int = None):
     """Add a package to featured packages"""
+    def apply(homepage):
+        featured_packages = homepage.setdefault("featuredPackages", {})
+        package_ids = featured_packages.get("packageIds", [])
+        if package_id in package_ids:
+            return False
+        featured_packages["packageIds"] = [*package_ids, package_id]
+        return True
+
     try:
-        # Check if package exists
-        packages = await get_data_or_memory("packages", [])
-        package_exists = any(pkg.get("id") == package_id for pkg in packages)
-        if not package_exists:
+        # Check if package exists with a point lookup
+        if not await get_records_by_ids("packages", [package_id]):
             raise HTTPException(status_code=404, detail="Package not found")
         
-        homepage_data = await get_data_or_memory("homepage", default_homepage_data)
-        featured_packages = homepage_data.get("featuredPackages", {})
-        package_ids = featured_packages.get("packageIds", [])
-        
-        # Add package if not already featured
-        if package_id not in package_ids:
-            if order is None:
-                order = len(package_ids) + 1
-            package_ids.append(package_id)
-            featured_packages["packageIds"] = package_ids
-            homepage_data["featuredPackages"] = featured_packages
-            
-            success = await save_data_or_memory("homepage", homepage_data, is_update=True)
-            if success:
-                return {"message": "Package added to featured successfully", "package_id": package_id}
-            else:
-                raise HTTPException(status_code=500, detail="Failed to save data")
-        else:
-            return {"message": "Package is already featured", "package_id": package_id}
+        added, _ = await update_homepage_fields(
+            {"$addToSet": {"featuredPackages.packageIds": package_id}},
+            apply,
+            "featuredPackages",
+            precondition={"featuredPackages.packageIds": {"$ne": package_id}},
+        )
+        if added:
+            return {"message": "Package added to featured successfully", "package_id": package_id}
+        return {"message": "Package is already featured", "package_id": package_id}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error adding featured package: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to add featured package: {str(e)}")
@@ -537,23 +3241,24 @@ async def add_featured_package(package_id: str, order: int = None):
 @api_router.delete("/admin/featured-packages/remove/{package_id}")
 async def remove_featured_package(package_id: str):
     """Remove a package from featured packages"""
-    try:
-        homepage_data = await get_data_or_memory("homepage", default_homepage_data)
-        featured_packages = homepage_data.get("featuredPackages", {})
+    def apply(homepage):
+        featured_packages = homepage.setdefault("featuredPackages", {})
         package_ids = featured_packages.get("packageIds", [])
-        
-        if package_id in package_ids:
-            package_ids.remove(package_id)
-            featured_packages["packageIds"] = package_ids
-            homepage_data["featuredPackages"] = featured_packages
-            
-            success = await save_data_or_memory("homepage", homepage_data, is_update=True)
-            if success:
-                return {"message": "Package removed from featured successfully", "package_id": package_id}
-            else:
-                raise HTTPException(status_code=500, detail="Failed to save data")
-        else:
-            return {"message": "Package is not featured", "package_id": package_id}
+        if package_id not in package_ids:
+            return False
+        featured_packages["packageIds"] = [pid for pid in package_ids if pid != package_id]
+        return True
+
+    try:
+        removed, _ = await update_homepage_fields(
+            {"$pull": {"featuredPackages.packageIds": package_id}},
+            apply,
+            "featuredPackages",
+            precondition={"featuredPackages.packageIds": package_id},
+        )
+        if removed:
+            return {"message": "Package removed from featured successfully", "package_id": package_id}
+        return {"message": "Package is not featured", "package_id": package_id}
     except Exception as e:
         logger.error(f"Error removing featured package: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to remove featured package: {str(e)}")
@@ -561,32 +3266,33 @@ async def remove_featured_package(package_id: str):
 @api_router.put("/admin/featured-packages/reorder")
 async def reorder_featured_packages(package_ids: List[str]):
     """Reorder featured packages"""
+    def apply(homepage):
+        homepage.setdefault("featuredPackages", {})["packageIds"] = list(package_ids)
+        return True
+
     try:
-        homepage_data = await get_data_or_memory("homepage", default_homepage_data)
-        featured_packages = homepage_data.get("featuredPackages", {})
-        featured_packages["packageIds"] = package_ids
-        homepage_data["featuredPackages"] = featured_packages
-        
-        success = await save_data_or_memory("homepage", homepage_data, is_update=True)
-        if success:
-            return {"message": "Featured packages reordered successfully", "package_ids": package_ids}
-        else:
-            raise HTTPException(status_code=500, detail="Failed to save data")
+        await update_homepage_fields(
+            {"$set": {"featuredPackages.packageIds": package_ids}}, apply, "featuredPackages"
+        )
+        return {"message": "Featured packages reordered successfully", "package_ids": package_ids}
     except Exception as e:
         logger.error(f"Error reordering featured packages: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to reorder featured packages: {str(e)}")
 
 @api_router.get("/admin/blog")
-async def get_all_blog_posts():
-    """Get all blog posts"""
-    posts = await get_data_or_memory("blog_posts", [])
-    return posts
+async def get_all_blog_posts(limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None):
+    """Get all blog posts, or one page of them when limit/cursor is given"""
+    if limit is None and cursor is None:
+        return await get_data_or_memory("blog_posts", [])
+    return await get_page("blog_posts", limit or DEFAULT_PAGE_SIZE, cursor)
 
 @api_router.post("/admin/blog")
 async def create_blog_post(post: BlogPost):
     """Create a new blog post"""
-    success = await save_data_or_memory("blog_posts", post.dict())
+    post_dict = post.dict()
+    success = await save_data_or_memory("blog_posts", post_dict)
     if success:
+        index_for_search("blog_posts", post_dict)
         return {"message": "Blog post created successfully", "post": post}
     raise HTTPException(status_code=500, detail="Failed to create blog post")
 
@@ -597,66 +3303,186 @@ async def update_blog_post(post_id: str, post: BlogPost):
     post_dict["id"] = post_id
     success = await save_data_or_memory("blog_posts", post_dict, is_update=True)
     if success:
+        index_for_search("blog_posts", post_dict)
         return {"message": "Blog post updated successfully", "post": post_dict}
     raise HTTPException(status_code=500, detail="Failed to update blog post")
 
 @api_router.delete("/admin/blog/{post_id}")
 async def delete_blog_post(post_id: str):
     """Delete a blog post"""
-    if db is not None:
+    if mongo_available():
         try:
             collection = db["blog_posts"]
-            result = await collection.delete_one({"_id": post_id})
+            result = await collection.delete_one({"id": post_id})
             if result.deleted_count > 0:
+                mark_collection_dirty("blog_posts")
+                unindex_for_search("blog_posts", post_id)
                 return {"message": "Blog post deleted successfully"}
-        except:
+        except Exception as e:
+            mongo_breaker.record_failure(e)
             pass
     
     # In-memory deletion
-    for i, post in enumerate(in_memory_data["blog_posts"]):
-        if post.get("id") == post_id:
-            del in_memory_data["blog_posts"][i]
-            return {"message": "Blog post deleted successfully"}
+    if in_memory_data["blog_posts"].delete(post_id) is not None:
+        await journal_memory_write(delete_entry("blog_posts", post_id))
+        mark_collection_dirty("blog_posts")
+        unindex_for_search("blog_posts", post_id)
+        return {"message": "Blog post deleted successfully"}
     
     raise HTTPException(status_code=404, detail="Blog post not found")
 
+# ==================== BULK ADMIN ROUTES ====================
+
+BULK_MODE_PATTERN = "^(insert|upsert)$"
+
+@api_router.post("/admin/packages/bulk")
+async def bulk_save_packages(items: List[dict], mode: str = Query("upsert", pattern=BULK_MODE_PATTERN)):
+    """Create (mode=insert) or create-or-replace (mode=upsert) many packages at once"""
+    return await run_bulk_save("packages", items, mode)
+
+@api_router.post("/admin/packages/bulk-delete")
+async def bulk_delete_packages(package_ids: List[str]):
+    """Delete many packages at once"""
+    return await run_bulk_delete("packages", package_ids)
+
+@api_router.post("/admin/blog/bulk")
+async def bulk_save_blog_posts(items: List[dict], mode: str = Query("upsert", pattern=BULK_MODE_PATTERN)):
+    """Create (mode=insert) or create-or-replace (mode=upsert) many blog posts at once"""
+    return await run_bulk_save("blog_posts", items, mode)
+
+@api_router.post("/admin/blog/bulk-delete")
+async def bulk_delete_blog_posts(post_ids: List[str]):
+    """Delete many blog posts at once"""
+    return await run_bulk_delete("blog_posts", post_ids)
+
+@api_router.post("/admin/destinations/bulk")
+async def bulk_save_destinations(items: List[dict], mode: str = Query("upsert", pattern=BULK_MODE_PATTERN)):
+    """Create (mode=insert) or create-or-replace (mode=upsert) many destinations at once"""
+    return await run_bulk_save("destinations", items, mode)
+
+@api_router.post("/admin/destinations/bulk-delete")
+async def bulk_delete_destinations(destination_ids: List[str]):
+    """Delete many destinations at once"""
+    return await run_bulk_delete("destinations", destination_ids)
+
 # ==================== PUBLIC ROUTES ====================
 
+PACKAGE_SORT_PATTERN = "^-?(price|rating|reviews)$"
+
+def package_conditions(category=None, min_price=None, max_price=None,
+                       min_rating=None, destination=None, featured=None):
+    """Translate package list query parameters into filter conditions"""
+    conditions = []
+    if category is not None:
+        conditions.append(("eq", "category", category))
+    if featured is not None:
+        conditions.append(("eq", "featured", featured))
+    if min_price is not None:
+        conditions.append(("gte", "price", min_price))
+    if max_price is not None:
+        conditions.append(("lte", "price", max_price))
+    if min_rating is not None:
+        conditions.append(("gte", "rating", min_rating))
+    if destination:
+        conditions.append(("contains", "destination", destination))
+    return conditions
+
+LIST_VIEW_PATTERN = "^(summary|full)$"
+BLOG_SORT_PATTERN = "^-?(publishedAt|id)$"
+
+# Fields a listing card needs; everything else is only read on detail pages
+SUMMARY_FIELDS = {
+    "packages": ["id", "title", "image", "price", "originalPrice", "rating", "reviews",
+                 "duration", "destination", "category", "featured"],
+    "blog_posts": ["id", "title", "excerpt", "author", "image", "category", "tags",
+                   "publishedAt", "readTime"],
+}
+
+LIST_MODELS = {"packages": Package, "blog_posts": BlogPost}
+
+def list_projection(collection_name: str, fields: Optional[str], view: Optional[str]):
+    """Fields requested through ?fields= or ?view=, or None for full documents"""
+    if fields:
+        requested = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in requested if field not in LIST_MODELS[collection_name].model_fields]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        return ["id", *(field for field in requested if field != "id")]
+    if view == "summary":
+        return SUMMARY_FIELDS[collection_name]
+    return None
+
+def request_cache_key(path: str, params: dict):
+    """Cache key for a GET from its validated parameters
+
+    Only the parameters a handler passes in count, unset ones left out, so
+    unknown query parameters cannot add cache entries.
+    """
+    return path + "?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()) if v is not None)
+
 @api_router.get("/homepage")
-async def get_public_homepage():
+async def get_public_homepage(request: Request, response: Response):
     """Get public homepage data"""
-    data = await get_data_or_memory("homepage", default_homepage_data)
+    not_modified = check_not_modified(request, response, ("homepage",))
+    if not_modified is not None:
+        return not_modified
+    data = await get_cached_data("homepage", default_homepage_data)
     return data
 
 @api_router.get("/packages")
-async def get_public_packages():
-    """Get public packages"""
-    packages = await get_data_or_memory("packages", [])
-    return packages
+async def get_public_packages(
+    request: Request,
+    response: Response,
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_rating: Optional[float] = None,
+    destination: Optional[str] = None,
+    featured: Optional[bool] = None,
+    sort: Optional[str] = Query(None, pattern=PACKAGE_SORT_PATTERN),
+    fields: Optional[str] = None,
+    view: Optional[str] = Query(None, pattern=LIST_VIEW_PATTERN),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    """Get public packages, optionally filtered, sorted and trimmed to some fields
+
+    Returns the plain list, or one page of it when limit/cursor is given.
+    """
+    not_modified = check_not_modified(request, response, ("packages",), vary="Accept-Encoding")
+    if not_modified is not None:
+        return not_modified
+    conditions = package_conditions(category, min_price, max_price, min_rating, destination, featured)
+    projection = list_projection("packages", fields, view)
+    if limit is None and cursor is None and not conditions and sort is None and projection is None:
+        loader = lambda: get_data_or_memory("packages", [])
+        return await encoded_read(request, response, ("packages",), loader, {}, precompress=True)
+    sort_field = sort.lstrip("-") if sort else None
+    descending = bool(sort) and sort.startswith("-")
+    if limit is None and cursor is None:
+        loader = lambda: query_records(
+            "packages", conditions, sort_field, descending, limit=MAX_LIST_SIZE, fields=projection
+        )
+    else:
+        limit = limit or DEFAULT_PAGE_SIZE
+        loader = lambda: get_page(
+            "packages", limit, cursor, sort_field or "id", descending, conditions, projection
+        )
+    params = {"where": conditions or None, "sort": sort, "fields": projection, "limit": limit, "cursor": cursor}
+    return await encoded_read(request, response, ("packages",), loader, params)
 
 @api_router.get("/featured-packages")
-async def get_featured_packages_with_details():
+async def get_featured_packages_with_details(request: Request, response: Response):
     """Get featured packages with full package details"""
+    not_modified = check_not_modified(request, response, ("homepage.featuredPackages", "packages"))
+    if not_modified is not None:
+        return not_modified
     try:
-        homepage_data = await get_data_or_memory("homepage", default_homepage_data)
-        featured_packages = homepage_data.get("featuredPackages", {})
-        package_ids = featured_packages.get("packageIds", [])
-        
-        # Get all packages
-        all_packages = await get_data_or_memory("packages", [])
-        
-        # Filter and sort featured packages
-        featured_packages_list = []
-        for package_id in package_ids:
-            package = next((pkg for pkg in all_packages if pkg.get("id") == package_id), None)
-            if package:
-                featured_packages_list.append(package)
-        
-        return {
-            "title": featured_packages.get("title", "Popular Destinations"),
-            "description": featured_packages.get("description", ""),
-            "packages": featured_packages_list
-        }
+        return await cached_read(
+            "featured-packages",
+            ("homepage.featuredPackages", "packages"),
+            load_featured_packages_with_details,
+        )
     except Exception as e:
         logger.error(f"Error getting featured packages: {e}")
         return {
@@ -665,58 +3491,216 @@ async def get_featured_packages_with_details():
             "packages": []
         }
 
+async def load_featured_packages_with_details():
+    """Build the featured packages response"""
+    homepage_data = await get_cached_data("homepage", default_homepage_data)
+    featured_packages = homepage_data.get("featuredPackages", {})
+    package_ids = featured_packages.get("packageIds", [])
+    
+    # Fetch only the featured packages, keeping the configured order
+    featured_packages_list = await get_records_by_ids("packages", package_ids)
+    
+    return {
+        "title": featured_packages.get("title", "Popular Destinations"),
+        "description": featured_packages.get("description", ""),
+        "packages": featured_packages_list
+    }
+
+@api_router.get("/homepage/full")
+async def get_full_homepage(request: Request, response: Response):
+    """Get the homepage with featured packages and latest blog posts resolved, in one response"""
+    tags = ("homepage", "packages", "blog_posts")
+    not_modified = check_not_modified(request, response, tags)
+    if not_modified is not None:
+        return not_modified
+    return await cached_read("homepage-full", tags, load_full_homepage)
+
+DEFAULT_LATEST_POSTS = 3
+MAX_LATEST_POSTS = 50
+
+def posts_to_show(blogs_config: dict):
+    """Number of latest posts the homepage asks for, defaulted and clamped when invalid"""
+    try:
+        count = int(blogs_config.get("postsToShow", DEFAULT_LATEST_POSTS))
+    except (TypeError, ValueError):
+        logger.warning(f"Invalid latestBlogs.postsToShow {blogs_config.get('postsToShow')!r}, using the default")
+        count = DEFAULT_LATEST_POSTS
+    return min(max(count, 1), MAX_LATEST_POSTS)
+
+async def load_full_homepage():
+    """Assemble the homepage; the package and blog reads run concurrently"""
+    homepage_data = await get_cached_data("homepage", default_homepage_data)
+    featured_config = homepage_data.get("featuredPackages", {})
+    blogs_config = homepage_data.get("latestBlogs", {})
+    featured_packages_list, latest_posts = await asyncio.gather(
+        get_records_by_ids("packages", featured_config.get("packageIds", [])),
+        get_latest_blog_posts(posts_to_show(blogs_config), SUMMARY_FIELDS["blog_posts"]),
+    )
+    return {
+        **homepage_data,
+        "featuredPackages": {**featured_config, "packages": featured_packages_list},
+        "latestBlogs": {**blogs_config, "posts": latest_posts},
+    }
+
 @api_router.get("/blog")
-async def get_public_blog_posts():
-    """Get public blog posts"""
-    posts = await get_data_or_memory("blog_posts", [])
-    return posts
+async def get_public_blog_posts(
+    request: Request,
+    response: Response,
+    sort: Optional[str] = Query(None, pattern=BLOG_SORT_PATTERN),
+    fields: Optional[str] = None,
+    view: Optional[str] = Query(None, pattern=LIST_VIEW_PATTERN),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    """Get public blog posts, or one page of them when limit/cursor is given
+
+    Pages are newest first unless another sort is requested.
+    """
+    not_modified = check_not_modified(request, response, ("blog_posts",), vary="Accept-Encoding")
+    if not_modified is not None:
+        return not_modified
+    projection = list_projection("blog_posts", fields, view)
+    if limit is None and cursor is None and projection is None and sort is None:
+        loader = lambda: get_data_or_memory("blog_posts", [])
+        return await encoded_read(request, response, ("blog_posts",), loader, {}, precompress=True)
+    sort_field = sort.lstrip("-") if sort else None
+    descending = bool(sort) and sort.startswith("-")
+    if limit is None and cursor is None:
+        loader = lambda: query_records(
+            "blog_posts", (), sort_field, descending, limit=MAX_LIST_SIZE, fields=projection
+        )
+    else:
+        limit = limit or DEFAULT_PAGE_SIZE
+        if sort is None:
+            sort_field, descending = "publishedAt", True
+        loader = lambda: get_page("blog_posts", limit, cursor, sort_field, descending, fields=projection)
+    params = {"sort": sort, "fields": projection, "limit": limit, "cursor": cursor}
+    return await encoded_read(request, response, ("blog_posts",), loader, params)
+
+@api_router.get("/blog/latest")
+async def get_latest_blog_posts_route(
+    request: Request,
+    response: Response,
+    n: int = Query(DEFAULT_LATEST_POSTS, ge=1, le=MAX_LATEST_POSTS),
+    fields: Optional[str] = None,
+    view: Optional[str] = Query(None, pattern=LIST_VIEW_PATTERN),
+):
+    """Get the newest ``n`` blog posts"""
+    not_modified = check_not_modified(request, response, ("blog_posts",))
+    if not_modified is not None:
+        return not_modified
+    projection = list_projection("blog_posts", fields, view)
+    return await cached_read(
+        request_cache_key(request.url.path, {"n": n, "fields": projection}),
+        ("blog_posts",),
+        lambda: get_latest_blog_posts(n, projection),
+    )
+
+async def get_latest_blog_posts(n: int, fields=None):
+    """Top ``n`` posts by publishedAt, read from the descending publishedAt index"""
+    return await query_records("blog_posts", sort_field="publishedAt", descending=True, limit=n, fields=fields)
+
+@api_router.get("/search")
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    type: Optional[str] = Query(None, pattern="^(package|blog)$"),
+    limit: int = Query(10, ge=1, le=50),
+    prefix: bool = True,
+):
+    """Ranked full-text search over packages and blog posts"""
+    hits = search_index.search(q, limit, type, prefix)
+    return {
+        "query": q,
+        "results": [{"type": kind, "score": round(score, 4), **summary} for score, kind, summary in hits],
+    }
 
 # ==================== LEGACY ROUTES ====================
 
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
+    """Queue a status check; it is stored with the next batch"""
     status_dict = input.dict()
     status_obj = StatusCheck(**status_dict)
-    if db is not None:
-        try:
-            collection = db["status_checks"]
-            await collection.insert_one(status_obj.dict())
-        except:
-            pass
+    if not await status_buffer.submit(status_obj.dict()):
+        status_ingest_rejected_total.inc()
+        raise HTTPException(status_code=503, detail="Too many pending status checks", headers={"Retry-After": "1"})
     return status_obj
 
-@api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    if db is not None:
+@api_router.get("/status", response_model=Union[List[StatusCheck], StatusCheckPage])
+async def get_status_checks(limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None):
+    if limit is not None or cursor is not None:
+        page = await get_page("status_checks", limit or DEFAULT_PAGE_SIZE, cursor, sort_field="timestamp")
+        return StatusCheckPage(
+            items=[StatusCheck(**status_check) for status_check in page["items"]],
+            next=page["next"],
+        )
+    if mongo_available():
         try:
             collection = db["status_checks"]
             status_checks = await collection.find().to_list(1000)
             return [StatusCheck(**status_check) for status_check in status_checks]
-        except:
+        except Exception as e:
+            mongo_breaker.record_failure(e)
             return []
     return []
 
+@api_router.get("/status/summary")
+async def get_status_summary(
+    minutes: int = Query(60, ge=1, le=1440),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+):
+    """Status check totals, the ``limit`` most recently seen clients and per-minute counts
+
+    Served from the rollups, so the cost does not grow with the number of raw checks.
+    """
+    since = status_minute(datetime.utcnow()) - timedelta(minutes=minutes - 1)
+    summary = await load_status_summary(since, limit)
+    summary.update(windowMinutes=minutes, retentionSeconds=STATUS_RETENTION_SECONDS)
+    return summary
+
 # ==================== DESTINATIONS API ENDPOINTS ====================
 
-@api_router.get("/destinations", response_model=List[Destination])
-async def get_destinations():
-    """Get all destinations"""
-    
-    if db is not None:
+@api_router.get("/destinations", response_model=Union[List[Destination], DestinationPage])
+async def get_destinations(request: Request, response: Response, limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None):
+    """Get all destinations, or one page of them when limit/cursor is given"""
+    not_modified = check_not_modified(request, response, ("destinations",))
+    if not_modified is not None:
+        return not_modified
+    if limit is None and cursor is None:
+        return await cached_read("destinations", ("destinations",), load_destinations)
+    limit = limit or DEFAULT_PAGE_SIZE
+    return await cached_read(
+        f"destinations:page:{limit}:{cursor}",
+        ("destinations",),
+        lambda: load_destinations_page(limit, cursor),
+    )
+
+async def load_destinations_page(limit: int, cursor: Optional[str]):
+    """Build one page of destinations"""
+    page = await get_page("destinations", limit, cursor)
+    return DestinationPage(
+        items=[Destination(**with_package_count(destination)) for destination in page["items"]],
+        next=page["next"],
+    )
+
+async def load_destinations():
+    """Build the destinations list from MongoDB or in-memory storage"""
+    if mongo_available():
         try:
             collection = db["destinations"]
             destinations = await collection.find().to_list(1000)
-            return [Destination(**destination) for destination in destinations]
+            return [Destination(**with_package_count(destination)) for destination in destinations]
         except Exception as e:
+            mongo_breaker.record_failure(e)
             logger.error(f"Error fetching destinations from database: {e}")
             return []
     else:
         # Return in-memory destinations
-        destinations_data = in_memory_data.get("destinations", [])
+        destinations_data = in_memory_data["destinations"]
         
         # Try to create Destination objects
         try:
-            result = [Destination(**dest) for dest in destinations_data]
+            result = [Destination(**with_package_count(dest)) for dest in destinations_data]
             return result
         except Exception as e:
             logger.error(f"Error creating Destination objects: {e}")
@@ -727,48 +3711,53 @@ async def create_destination(destination: DestinationCreate):
     """Create a new destination"""
     new_destination = Destination(
         name=destination.name,
-        country=destination.country
+        country=destination.country,
+        packages=destination_counts.count(destination.name),
     )
     
-    if db is not None:
+    if mongo_available():
         try:
             collection = db["destinations"]
             await collection.insert_one(new_destination.dict())
         except Exception as e:
+            mongo_breaker.record_failure(e)
             logger.error(f"Error creating destination in database: {e}")
             raise HTTPException(status_code=500, detail="Failed to create destination")
     else:
         # Add to in-memory storage
-        in_memory_data["destinations"].append(new_destination.dict())
+        in_memory_data["destinations"].insert(new_destination.dict())
+        await journal_memory_write(upsert_entry("destinations", new_destination.dict()))
     
+    mark_collection_dirty("destinations")
     return new_destination
 
 @api_router.get("/destinations/{destination_id}", response_model=Destination)
 async def get_destination(destination_id: str):
     """Get a specific destination by ID"""
-    if db is not None:
+    if mongo_available():
         try:
             collection = db["destinations"]
             destination = await collection.find_one({"id": destination_id})
             if destination:
-                return Destination(**destination)
+                return Destination(**with_package_count(destination))
             else:
                 raise HTTPException(status_code=404, detail="Destination not found")
         except Exception as e:
+            mongo_breaker.record_failure(e)
             logger.error(f"Error fetching destination from database: {e}")
             raise HTTPException(status_code=500, detail="Failed to fetch destination")
     else:
         # Search in-memory destinations
-        destination = next((dest for dest in in_memory_data.get("destinations", []) if dest["id"] == destination_id), None)
+        destination = in_memory_data["destinations"].get(destination_id)
         if destination:
-            return Destination(**destination)
+            return Destination(**with_package_count(destination))
         else:
             raise HTTPException(status_code=404, detail="Destination not found")
 
 @api_router.put("/destinations/{destination_id}", response_model=Destination)
 async def update_destination(destination_id: str, destination_update: DestinationUpdate):
     """Update a destination"""
-    if db is not None:
+    if mongo_available():
         try:
             collection = db["destinations"]
             update_data = destination_update.dict(exclude_unset=True)
@@ -781,46 +3770,49 @@ async def update_destination(destination_id: str, destination_update: Destinatio
             
             if result.modified_count == 0:
                 raise HTTPException(status_code=404, detail="Destination not found")
+            mark_collection_dirty("destinations")
             
             # Return updated destination
             updated_destination = await collection.find_one({"id": destination_id})
-            return Destination(**updated_destination)
+            return Destination(**with_package_count(updated_destination))
         except Exception as e:
+            mongo_breaker.record_failure(e)
             logger.error(f"Error updating destination in database: {e}")
             raise HTTPException(status_code=500, detail="Failed to update destination")
     else:
         # Update in-memory destination
-        destinations_list = in_memory_data.get("destinations", [])
-        destination_index = next((i for i, dest in enumerate(destinations_list) if dest["id"] == destination_id), None)
-        if destination_index is not None:
-            update_data = destination_update.dict(exclude_unset=True)
-            update_data["updated_at"] = datetime.utcnow()
-            destinations_list[destination_index].update(update_data)
-            return Destination(**destinations_list[destination_index])
+        update_data = destination_update.dict(exclude_unset=True)
+        update_data["updated_at"] = datetime.utcnow()
+        updated_destination = in_memory_data["destinations"].patch(destination_id, update_data)
+        if updated_destination is not None:
+            await journal_memory_write(upsert_entry("destinations", updated_destination))
+            mark_collection_dirty("destinations")
+            return Destination(**with_package_count(updated_destination))
         else:
             raise HTTPException(status_code=404, detail="Destination not found")
 
 @api_router.delete("/destinations/{destination_id}")
 async def delete_destination(destination_id: str):
     """Delete a destination"""
-    if db is not None:
+    if mongo_available():
         try:
             collection = db["destinations"]
             result = await collection.delete_one({"id": destination_id})
             
             if result.deleted_count == 0:
                 raise HTTPException(status_code=404, detail="Destination not found")
+            mark_collection_dirty("destinations")
             
             return {"message": "Destination deleted successfully"}
         except Exception as e:
+            mongo_breaker.record_failure(e)
             logger.error(f"Error deleting destination from database: {e}")
             raise HTTPException(status_code=500, detail="Failed to delete destination")
     else:
         # Delete from in-memory storage
-        destinations_list = in_memory_data.get("destinations", [])
-        destination_index = next((i for i, dest in enumerate(destinations_list) if dest["id"] == destination_id), None)
-        if destination_index is not None:
-            deleted_destination = destinations_list.pop(destination_index)
+        if in_memory_data["destinations"].delete(destination_id) is not None:
+            await journal_memory_write(delete_entry("destinations", destination_id))
+            mark_collection_dirty("destinations")
             return {"message": "Destination deleted successfully"}
         else:
             raise HTTPException(status_code=404, detail="Destination not found")
@@ -833,94 +3825,203 @@ app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', 'http://localhost:3000,http://127.0.0.1:3000').split(','),
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["Content-Type", "Authorization", "Accept"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization", "Accept", "If-None-Match"],
+    expose_headers=["ETag"],
 )
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+if PROFILE_TOKEN:
+    app.add_middleware(ProfilingMiddleware)
+
+# Outermost, so the timings include CORS handling
+app.add_middleware(MetricsMiddleware)
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize default data on startup"""
-    if db is None:
-        logger.info("Using in-memory storage - initializing default data")
-        # Initialize with some sample packages and blog posts
-        sample_packages = [
-            {
-                "id": str(uuid.uuid4()),
-                "title": "Bali Adventure",
-                "description": "Explore the beautiful island of Bali with its stunning beaches and rich culture",
-                "price": 1299.99,
-                "duration": "7 days",
-                "destination": "Bali, Indonesia",
-                "image": "https://images.unsplash.com/photo-1537953773345-d172ccf13cf1?w=800&q=80",
-                "highlights": ["Beach hopping", "Cultural tours", "Water sports"],
-                "included": ["Flights", "Hotel", "Meals", "Transfers"],
-                "excluded": ["Personal expenses", "Optional tours"],
-                "category": "Adventure",
-                "rating": 4.8,
-                "reviews": 127
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "title": "Paris Explorer",
-                "description": "Discover the magic of Paris with guided tours of iconic landmarks",
-                "price": 2199.99,
-                "duration": "5 days",
-                "destination": "Paris, France",
-                "image": "https://images.unsplash.com/photo-1502602898534-7d973c7a0b56?w=800&q=80",
-                "highlights": ["Eiffel Tower", "Louvre Museum", "Seine River cruise"],
-                "included": ["Flights", "Hotel", "Breakfast", "City tours"],
-                "excluded": ["Lunch & dinner", "Museum tickets"],
-                "category": "Cultural",
-                "rating": 4.9,
-                "reviews": 203
-            }
-        ]
-        
-        sample_blog_posts = [
-            {
-                "id": str(uuid.uuid4()),
-                "title": "Top 10 Hidden Gems in Bali",
-                "content": "Discover the lesser-known attractions that make Bali truly special...",
-                "excerpt": "Explore the secret spots that most tourists miss in this paradise island",
-                "author": "Travel Expert",
-                "image": "https://images.unsplash.com/photo-1537953773345-d172ccf13cf1?w=800&q=80",
-                "category": "Destinations",
-                "tags": ["Bali", "Hidden Gems", "Travel Tips"],
-                "publishedAt": datetime.utcnow(),
-                "readTime": 8
-            }
-        ]
+    """Connect to storage and seed default data in the background"""
+    task = asyncio.create_task(initialize_storage())
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+async def connect_to_mongo():
+    """Connect to MongoDB with bounded timeouts, returning the database or None"""
+    global client
+    try:
+        client = AsyncIOMotorClient(
+            MONGO_URL,
+            serverSelectionTimeoutMS=MONGO_TIMEOUT_MS,
+            connectTimeoutMS=MONGO_TIMEOUT_MS,
+            socketTimeoutMS=MONGO_TIMEOUT_MS * 5,
+            event_listeners=[mongo_command_metrics],
+        )
+        # serverSelectionTimeoutMS bounds the ping; wait_for is a hard cap on top of it
+        await asyncio.wait_for(client.admin.command('ping'), timeout=MONGO_TIMEOUT_MS / 500)
+        logger.info("✅ Connected to MongoDB")
+        return client[DB_NAME]
+    except Exception as e:
+        logger.warning(f"⚠️ MongoDB connection failed: {e}")
+        if client is not None:
+            client.close()
+            client = None
+        return None
+
+async def initialize_storage():
+    """Pick the storage backend, load it and build the search index, mark the app ready, then seed data"""
+    global db
+    db = await connect_to_mongo() if MONGO_URL else None
+    # Reads served while connecting were built from the in-memory defaults
+    mark_all_collections_dirty()
+    try:
+        if db is None:
+            if local_store is None:
+                logger.warning("⚠️ Using in-memory storage (data will not persist)")
+            else:
+                logger.info(f"Using in-memory storage persisted to {local_store.directory}")
+            if local_store is not None and local_store.load():
+                logger.info(f"✅ Restored in-memory storage from {local_store.directory}")
+                mark_all_collections_dirty()
+            else:
+                logger.info("Using in-memory storage - initializing default data")
+                seed_memory_data()
+                if local_store is not None:
+                    await local_store.snapshot()
+            await rebuild_search_index()
+            startup_state.update(ready=True, database="in_memory")
+        else:
+            # Writes journaled during an outage before the last shutdown go first
+            try:
+                await replay_write_behind_journal()
+            except Exception as e:
+                logger.error(f"Error replaying write-behind journal: {e}")
+            # Not ready before search covers the stored documents
+            await rebuild_search_index()
+            # MongoDB already holds the data, so traffic can start before seeding finishes
+            startup_state.update(ready=True, database="connected")
+            logger.info("Connected to MongoDB - initializing default data")
+            await seed_database()
+        await reconcile_destination_counts()
+        task = asyncio.create_task(reconcile_destination_counts_forever())
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+        startup_state["seeded"] = True
+    except Exception as e:
+        logger.error(f"Error initializing storage: {e}")
+        startup_state["ready"] = True
+
+def seed_memory_data():
+    """Load sample packages, blog posts and destinations into in-memory storage"""
+    # Initialize with some sample packages and blog posts
+    sample_packages = [
+        {
+            "id": str(uuid.uuid4()),
+            "title": "Bali Adventure",
+            "description": "Explore the beautiful island of Bali with its stunning beaches and rich culture",
+            "price": 1299.99,
+            "duration": "7 days",
+            "destination": "Bali, Indonesia",
+            "image": "https://images.unsplash.com/photo-1537953773345-d172ccf13cf1?w=800&q=80",
+            "highlights": ["Beach hopping", "Cultural tours", "Water sports"],
+            "included": ["Flights", "Hotel", "Meals", "Transfers"],
+            "excluded": ["Personal expenses", "Optional tours"],
+            "category": "Adventure",
+            "rating": 4.8,
+            "reviews": 127
+        },
+        {
+            "id": str(uuid.uuid4()),
+            "title": "Paris Explorer",
+            "description": "Discover the magic of Paris with guided tours of iconic landmarks",
+            "price": 2199.99,
+            "duration": "5 days",
+            "destination": "Paris, France",
+            "image": "https://images.unsplash.com/photo-1502602898534-7d973c7a0b56?w=800&q=80",
+            "highlights": ["Eiffel Tower", "Louvre Museum", "Seine River cruise"],
+            "included": ["Flights", "Hotel", "Breakfast", "City tours"],
+            "excluded": ["Lunch & dinner", "Museum tickets"],
+            "category": "Cultural",
+            "rating": 4.9,
+            "reviews": 203
+        }
+    ]
+    
+    sample_blog_posts = [
+        {
+            "id": str(uuid.uuid4()),
+            "title": "Top 10 Hidden Gems in Bali",
+            "content": "Discover the lesser-known attractions that make Bali truly special...",
+            "excerpt": "Explore the secret spots that most tourists miss in this paradise island",
+            "author": "Travel Expert",
+            "image": "https://images.unsplash.com/photo-1537953773345-d172ccf13cf1?w=800&q=80",
+            "category": "Destinations",
+            "tags": ["Bali", "Hidden Gems", "Travel Tips"],
+            "publishedAt": datetime.utcnow(),
+            "readTime": 8
+        }
+    ]
+    
+    in_memory_data["packages"].replace_all(sample_packages)
+    in_memory_data["blog_posts"].replace_all(sample_blog_posts)
+    in_memory_data["destinations"].replace_all([dict(dest) for dest in sample_destinations])
+    for collection_name in ("packages", "blog_posts", "destinations"):
+        mark_collection_dirty(collection_name)
+
+async def seed_database():
+    """Seed missing destinations and create the indexes"""
+    try:
+        # Initialize destinations collection
+        destinations_collection = db["destinations"]
+        existing_destinations = await destinations_collection.count_documents({})
         
-        in_memory_data["packages"] = sample_packages
-        in_memory_data["blog_posts"] = sample_blog_posts
-        in_memory_data["destinations"] = sample_destinations
-    else:
-        logger.info("Connected to MongoDB - initializing default data")
-        try:
-            # Initialize destinations collection
-            destinations_collection = db["destinations"]
-            existing_destinations = await destinations_collection.count_documents({})
+        if existing_destinations == 0:
+            logger.info("Initializing destinations collection with sample data")
+            await destinations_collection.insert_many([dict(dest) for dest in sample_destinations])
+            mark_collection_dirty("destinations")
+            logger.info(f"✅ Initialized {len(sample_destinations)} destinations")
+        else:
+            logger.info(f"✅ Destinations collection already has {existing_destinations} documents")
             
-            if existing_destinations == 0:
-                logger.info("Initializing destinations collection with sample data")
-                for dest in sample_destinations:
-                    await destinations_collection.insert_one(dest)
-                logger.info(f"✅ Initialized {len(sample_destinations)} destinations")
-            else:
-                logger.info(f"✅ Destinations collection already has {existing_destinations} documents")
-                
-        except Exception as e:
-            logger.error(f"Error initializing destinations in database: {e}")
+    except Exception as e:
+        logger.error(f"Error initializing destinations in database: {e}")
+
+    try:
+        await ensure_indexes()
+    except Exception as e:
+        logger.error(f"Error creating database indexes: {e}")
+
+async def ensure_indexes():
+    """Create the indexes the list endpoints rely on"""
+    for collection_name in ("packages", "blog_posts", "destinations"):
+        await db[collection_name].create_index([("id", ASCENDING)])
+    # Package filters: equality on category/featured first, then the range/sort field
+    packages = db["packages"]
+    for sort_field in ("price", "rating", "reviews"):
+        await packages.create_index([(sort_field, ASCENDING), ("id", ASCENDING)])
+        await packages.create_index([("category", ASCENDING), (sort_field, ASCENDING), ("id", ASCENDING)])
+    await packages.create_index([("featured", ASCENDING), ("id", ASCENDING)])
+    await packages.create_index([("category", ASCENDING), ("id", ASCENDING)])
+    await db["blog_posts"].create_index([("publishedAt", DESCENDING), ("id", DESCENDING)])
+    await db["status_checks"].create_index([("timestamp", ASCENDING), ("id", ASCENDING)])
+    await db[STATUS_CLIENTS_COLLECTION].create_index([("client_name", ASCENDING)], unique=True)
+    await db[STATUS_CLIENTS_COLLECTION].create_index([("last_seen", DESCENDING)])
+    if STATUS_RETENTION_SECONDS:
+        await ensure_ttl_index("status_checks", "timestamp", STATUS_RETENTION_SECONDS)
+        await ensure_ttl_index(STATUS_MINUTES_COLLECTION, "minute", STATUS_RETENTION_SECONDS, unique=True)
+    else:
+        # Retention turned off: stop expiring documents under an index created earlier
+        await drop_ttl_index("status_checks", "timestamp")
+        await drop_ttl_index(STATUS_MINUTES_COLLECTION, "minute")
+        await db[STATUS_MINUTES_COLLECTION].create_index([("minute", ASCENDING)], unique=True)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    # Pending status checks go out before the journal and the client close
+    await status_buffer.close()
+    for task in list(background_tasks):
+        task.cancel()
+    if local_store is not None:
+        await local_store.close()
+    await write_behind_journal.close()
+    await dead_letter_log.close()
     if client is not None:
         client.close()
 
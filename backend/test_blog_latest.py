@@ -0,0 +1,46 @@
+"""/api/blog/latest: the newest posts from the publishedAt index"""
+
+import pytest
+
+import server
+
+
+def post_blog(client, post_id: str, published_at: str):
+    post = {"id": post_id, "title": post_id, "content": "Body", "excerpt": "Excerpt", "author": "Editor",
+            "image": "https://example.com/image.jpg", "category": "News", "tags": [], "publishedAt": published_at}
+    assert client.post("/api/admin/blog", json=post).status_code == 200
+
+
+@pytest.fixture
+def posts(client):
+    for day in range(1, 8):
+        post_blog(client, f"day-{day}", f"2030-01-0{day}T12:00:00Z")
+
+
+def latest(client, **params):
+    response = client.get("/api/blog/latest", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_newest_posts_come_first(client, posts):
+    assert [post["id"] for post in latest(client)] == ["day-7", "day-6", "day-5"]
+    assert [post["id"] for post in latest(client, n=5)][-1] == "day-3"
+
+
+def test_fields_and_views_trim_the_posts(client, posts):
+    assert set(latest(client, view="summary")[0]) == set(server.SUMMARY_FIELDS["blog_posts"])
+    assert latest(client, n=1, fields="title") == [{"id": "day-7", "title": "day-7"}]
+
+
+@pytest.mark.parametrize("n", [0, server.MAX_LATEST_POSTS + 1])
+def test_out_of_range_counts_are_rejected(client, n):
+    assert client.get("/api/blog/latest", params={"n": n}).status_code == 422
+
+
+def test_new_post_is_served_after_a_cached_read(client, posts):
+    assert latest(client, n=1)[0]["id"] == "day-7"
+
+    post_blog(client, "day-8", "2030-01-08T12:00:00Z")
+
+    assert latest(client, n=1)[0]["id"] == "day-8"
@@ -0,0 +1,81 @@
+"""Circuit breaker around MongoDB and switching between storage backends"""
+
+import asyncio
+
+import pytest
+from pymongo.errors import AutoReconnect, OperationFailure
+
+import server
+from conftest import end_outage, start_outage
+
+
+@pytest.fixture
+def backend():
+    # The breaker only comes into play with MongoDB configured
+    return "mongo"
+
+
+def test_breaker_trips_only_on_outage_errors():
+    async def scenario():
+        breaker = server.CircuitBreaker(lambda: asyncio.sleep(0), failure_threshold=2, probe_interval=60)
+        breaker.record_failure(OperationFailure("duplicate key"))
+        breaker.record_failure(OperationFailure("duplicate key"))
+        assert breaker.state == breaker.CLOSED
+        breaker.record_failure(AutoReconnect("connection reset"))
+        breaker.record_failure(AutoReconnect("connection reset"))
+        assert breaker.state == breaker.OPEN
+        assert not breaker.allow_request()
+        breaker._probe_task.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_breaker_closes_only_after_recovery_step_succeeds():
+    async def scenario():
+        attempts = []
+
+        async def on_recover():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise AutoReconnect("still replaying")
+
+        switches = []
+        breaker = server.CircuitBreaker(
+            lambda: asyncio.sleep(0), probe_interval=0.001, probe_successes=1,
+            on_recover=on_recover, on_switch=lambda: switches.append(breaker.state),
+        )
+        breaker.trip()
+        await asyncio.wait_for(breaker._probe_task, 1)
+        assert breaker.state == breaker.CLOSED
+        assert len(attempts) == 2
+        assert switches == [breaker.OPEN, breaker.CLOSED]
+
+    asyncio.run(scenario())
+
+
+def test_backend_switch_invalidates_etags(client, monkeypatch):
+    client.post("/api/admin/packages", json=dict(server.sample_packages[0], id="only-in-mongo"))
+    mongo_etag = client.get("/api/packages").headers["etag"]
+
+    start_outage(client, monkeypatch)
+    outage = client.get("/api/packages", headers={"If-None-Match": mongo_etag})
+    assert outage.status_code == 200
+    outage_etag = outage.headers["etag"]
+
+    end_outage(monkeypatch)
+    recovered = client.get("/api/packages", headers={"If-None-Match": outage_etag})
+    assert recovered.status_code == 200
+    assert "only-in-mongo" in {package["id"] for package in recovered.json()}
+
+
+def test_open_breaker_serves_reads_from_memory(client, monkeypatch):
+    start_outage(client, monkeypatch)
+
+    packages = client.get("/api/packages").json()
+    health = client.get("/api/health").json()
+
+    assert {package["id"] for package in packages} == {record["id"] for record in server.in_memory_data["packages"]}
+    assert health["database"] == "in-memory (MongoDB unavailable)"
+    assert health["circuit_breaker"]["state"] in ("open", "half_open")
+    assert health["circuit_breaker"]["short_circuited"] > 0
+    end_outage(monkeypatch)
@@ -0,0 +1,72 @@
+"""Materialized package counts per destination"""
+
+import pytest
+
+import server
+from conftest import wait_for
+
+
+@pytest.fixture
+def backend():
+    return "memory"
+
+
+def counts(labels):
+    destination_counts = server.DestinationCounts()
+    destination_counts.replace(labels)
+    return destination_counts
+
+
+def test_counts_match_destination_names_inside_labels():
+    destination_counts = counts({"Bali, Indonesia": 2, "Tokyo & Kyoto, Japan": 1, "Ubud, Bali": 1})
+
+    assert destination_counts.count("bali") == 3
+    assert destination_counts.count("Kyoto") == 1
+    assert destination_counts.count("Paris") == 0
+
+
+def test_updates_keep_summed_counts_current():
+    destination_counts = counts({"Bali, Indonesia": 2})
+    assert destination_counts.count("Bali") == 2
+
+    destination_counts.move("Bali, Indonesia", "Tokyo, Japan")
+    destination_counts.add("Ubud, Bali", 1)
+
+    assert destination_counts.count("Bali") == 2
+    assert destination_counts.count("Tokyo") == 1
+    assert not destination_counts.drifted.is_set()
+
+
+def test_negative_counts_are_clamped_and_flag_drift():
+    destination_counts = counts({"Bali, Indonesia": 1})
+    destination_counts.count("Bali")
+
+    destination_counts.add("Bali, Indonesia", -2)
+
+    assert destination_counts.count("Bali") == 0
+    assert destination_counts.drifted.is_set()
+
+
+def test_resync_repairs_a_drifted_total_even_if_labels_match():
+    destination_counts = counts({"Bali, Indonesia": 1})
+    destination_counts.count("Bali")
+    destination_counts.add("Ubud, Bali", -1)
+
+    assert destination_counts.replace({"Bali, Indonesia": 1}) is True
+
+    assert destination_counts.count("Bali") == 1
+    assert not destination_counts.drifted.is_set()
+
+
+def test_negative_count_wakes_the_reconcile_loop(client, monkeypatch):
+    monkeypatch.setattr(server, "DESTINATION_COUNTS_RESYNC_DELAY_SECONDS", 0)
+    expected = client.get("/api/destinations/1").json()["packages"]
+    assert expected > 0
+
+    async def drift():
+        server.destination_counts.add("Bali", -(expected + 1))
+
+    client.portal.call(drift)
+
+    wait_for(lambda: not server.destination_counts.drifted.is_set())
+    assert server.destination_counts.count("Bali") == expected
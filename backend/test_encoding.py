@@ -0,0 +1,92 @@
+"""Compressed list responses: content negotiation, per-variant ETags and the body cache"""
+
+import gzip
+
+import server
+
+
+def add_packages(client, count: int = 10):
+    packages = [dict(server.sample_packages[0], id=f"etag-{i}") for i in range(count)]
+    response = client.post("/api/admin/packages/bulk", json=packages)
+    assert response.status_code == 200
+
+
+def cached_body(path: str, params: dict):
+    return server.response_cache.get("body:" + server.request_cache_key(path, params))[1]
+
+
+def test_compressed_variant_has_its_own_etag(client):
+    add_packages(client)
+
+    plain = client.get("/api/packages", headers={"Accept-Encoding": "identity"})
+    compressed = client.get("/api/packages", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in plain.headers
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["vary"] == "Accept-Encoding"
+    assert compressed.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+    assert compressed.json() == plain.json()
+
+
+def test_304_repeats_the_variant_etag(client):
+    add_packages(client)
+    etag = client.get("/api/packages", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+
+    response = client.get("/api/packages", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_accept_encoding_weights_pick_the_variant():
+    body = server.EncodedBody([{"text": "x" * 4000}])
+
+    assert body.pick("gzip, deflate") == "gzip"
+    assert body.pick("gzip;q=0, identity") == "identity"
+    assert body.pick("") == "identity"
+    assert body.pick("*;q=0.5, identity;q=0.1") != "identity"
+    if server.brotli is not None:
+        assert body.pick("gzip, br") == "br"
+        assert body.pick("gzip, br;q=0.5") == "gzip"
+
+
+def test_small_bodies_are_not_compressed():
+    body = server.EncodedBody([{"id": "1"}], precompress=True)
+
+    assert body.pick("gzip, br") == "identity"
+    assert body.variants == {"identity": body.identity}
+
+
+def test_unfiltered_list_is_compressed_ahead_of_time(client):
+    add_packages(client)
+    client.get("/api/packages", headers={"Accept-Encoding": "identity"})
+
+    body = cached_body("/api/packages", {})
+
+    assert set(body.variants) == set(body.encodings)
+    assert gzip.decompress(body.variants["gzip"]) == body.identity
+
+
+def test_filtered_list_is_compressed_on_demand_in_the_negotiated_encoding(client):
+    add_packages(client)
+    params = {"sort": "-rating", "limit": "20"}
+
+    client.get("/api/packages", params=params, headers={"Accept-Encoding": "identity"})
+    body = cached_body("/api/packages", {"sort": "-rating", "limit": 20})
+    assert set(body.variants) == {"identity"}
+
+    response = client.get("/api/packages", params=params, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert set(body.variants) == {"identity", "gzip"}
+    assert gzip.decompress(body.variants["gzip"]) == body.identity
+
+
+def test_unknown_query_parameters_share_the_cache_entry(client):
+    client.get("/api/packages", params={"sort": "-rating"})
+    entries = server.response_cache.stats()["entries"]
+
+    for n in range(5):
+        assert client.get("/api/packages", params={"sort": "-rating", "utm": str(n)}).status_code == 200
+
+    assert server.response_cache.stats()["entries"] == entries
@@ -0,0 +1,42 @@
+"""Conditional GETs: ETags and 304 Not Modified"""
+
+
+def test_unchanged_resource_revalidates_with_304(client):
+    first = client.get("/api/destinations")
+    etag = first.headers["etag"]
+
+    second = client.get("/api/destinations", headers={"If-None-Match": etag})
+
+    assert second.status_code == 304
+    assert second.headers["etag"] == etag
+    assert second.content == b""
+
+
+def test_weak_and_listed_validators_match(client):
+    etag = client.get("/api/destinations").headers["etag"]
+
+    response = client.get("/api/destinations", headers={"If-None-Match": f'"other", W/{etag}'})
+
+    assert response.status_code == 304
+
+
+def test_write_changes_the_etag(client):
+    etag = client.get("/api/destinations").headers["etag"]
+
+    assert client.put("/api/destinations/1", json={"name": "Ubud"}).status_code == 200
+    response = client.get("/api/destinations", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert "Ubud" in {destination["name"] for destination in response.json()}
+
+
+def test_write_to_another_collection_keeps_the_etag(client):
+    etag = client.get("/api/destinations").headers["etag"]
+
+    post = {"title": "Notes", "content": "Body", "excerpt": "Excerpt", "author": "Editor",
+            "image": "https://example.com/image.jpg", "category": "News", "tags": []}
+    assert client.post("/api/admin/blog", json=post).status_code == 200
+    response = client.get("/api/destinations", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
@@ -0,0 +1,117 @@
+"""Homepage: revisioned section updates and the assembled /api/homepage/full response"""
+
+import pytest
+
+import server
+
+
+def post_blog(client, post_id: str, published_at: str):
+    post = {"id": post_id, "title": post_id, "content": "Body", "excerpt": "Excerpt", "author": "Editor",
+            "image": "https://example.com/image.jpg", "category": "News", "tags": [], "publishedAt": published_at}
+    assert client.post("/api/admin/blog", json=post).status_code == 200
+
+
+def set_posts_to_show(client, value):
+    response = client.patch("/api/admin/homepage/latestBlogs", json={"postsToShow": value})
+    assert response.status_code == 200
+
+
+def test_featured_packages_are_resolved_in_configured_order(client):
+    package_ids = [package["id"] for package in client.get("/api/packages").json()][::-1]
+    response = client.patch("/api/admin/homepage/featuredPackages", json={"packageIds": package_ids})
+    assert response.status_code == 200
+
+    featured = client.get("/api/homepage/full").json()["featuredPackages"]
+
+    assert featured["packageIds"] == package_ids
+    assert [package["id"] for package in featured["packages"]] == package_ids
+
+
+def test_latest_posts_are_the_newest_first(client):
+    for day in range(1, 6):
+        post_blog(client, f"day-{day}", f"2030-01-0{day}T12:00:00Z")
+    set_posts_to_show(client, 2)
+
+    latest = client.get("/api/homepage/full").json()["latestBlogs"]
+
+    assert latest["postsToShow"] == 2
+    assert [post["id"] for post in latest["posts"]] == ["day-5", "day-4"]
+    assert set(latest["posts"][0]) == set(server.SUMMARY_FIELDS["blog_posts"])
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("many", server.DEFAULT_LATEST_POSTS), ("4", 4), (0, 1), (10**6, server.MAX_LATEST_POSTS),
+])
+def test_invalid_posts_to_show_is_defaulted_and_clamped(client, value, expected):
+    for n in range(60):
+        post_blog(client, f"post-{n}", f"2030-01-01T12:{n:02d}:00Z")
+    set_posts_to_show(client, value)
+
+    response = client.get("/api/homepage/full")
+
+    assert response.status_code == 200
+    assert len(response.json()["latestBlogs"]["posts"]) == expected
+
+
+def test_blog_write_changes_the_etag(client):
+    etag = client.get("/api/homepage/full").headers["etag"]
+    assert client.get("/api/homepage/full", headers={"If-None-Match": etag}).status_code == 304
+
+    post_blog(client, "fresh", "2030-01-01T12:00:00Z")
+    response = client.get("/api/homepage/full", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.json()["latestBlogs"]["posts"][0]["id"] == "fresh"
+
+
+def patch_section(client, section: str, fields: dict, revision=None):
+    params = {} if revision is None else {"revision": revision}
+    return client.patch(f"/api/admin/homepage/{section}", json=fields, params=params)
+
+
+# mongomock's find_one_and_update re-applies the filter after updating, so a
+# match on the revision it increments never returns the document
+memory_only = pytest.mark.parametrize("backend", ["memory"])
+
+
+@memory_only
+def test_patch_updates_only_the_given_fields(client):
+    before = client.get("/api/admin/homepage").json()
+    revision = before.get("revision", 0)
+
+    response = patch_section(client, "hero", {"title": "New title"}, revision)
+
+    assert response.status_code == 200
+    assert response.json()["revision"] == revision + 1
+    after = client.get("/api/admin/homepage").json()
+    assert after["hero"] == {**before["hero"], "title": "New title"}
+    assert after["cta"] == before["cta"]
+    assert after["revision"] == revision + 1
+
+
+@memory_only
+def test_stale_revision_is_rejected_with_409(client):
+    revision = client.get("/api/admin/homepage").json().get("revision", 0)
+    assert patch_section(client, "cta", {"title": "First"}, revision).status_code == 200
+
+    response = patch_section(client, "hero", {"title": "Second"}, revision)
+
+    assert response.status_code == 409
+    assert response.json()["detail"]["revision"] == revision + 1
+    assert client.get("/api/admin/homepage").json()["hero"]["title"] != "Second"
+
+
+def test_concurrent_patches_of_different_sections_both_apply(client):
+    assert patch_section(client, "hero", {"title": "Hero"}).status_code == 200
+    assert patch_section(client, "cta", {"title": "Call"}).status_code == 200
+
+    homepage = client.get("/api/admin/homepage").json()
+
+    assert (homepage["hero"]["title"], homepage["cta"]["title"]) == ("Hero", "Call")
+
+
+@pytest.mark.parametrize("section, fields, status", [
+    ("footer", {"title": "x"}, 404), ("hero", {}, 400), ("hero", {"a.b": 1}, 400), ("hero", {"$set": 1}, 400),
+])
+def test_invalid_patches_are_refused(client, section, fields, status):
+    assert patch_section(client, section, fields).status_code == status
@@ -0,0 +1,84 @@
+"""Write-behind journal: in-memory fallback writes replayed to MongoDB"""
+
+import pytest
+from pymongo.errors import BulkWriteError, OperationFailure
+
+import server
+from conftest import end_outage, start_outage, wait_for
+
+
+@pytest.fixture
+def backend():
+    # The journal only comes into play with MongoDB configured
+    return "mongo"
+
+
+def find_package(client, package_id):
+    return client.portal.call(lambda: server.db["packages"].find_one({"id": package_id}, {"_id": 0}))
+
+
+def test_outage_writes_are_journaled_and_replayed(client, monkeypatch):
+    start_outage(client, monkeypatch)
+    package = dict(server.sample_packages[0], id="written-during-outage")
+
+    assert client.post("/api/admin/packages", json=package).status_code == 200
+    entries, _ = server.write_behind_journal.read()
+    assert [entry["id"] for entry in entries] == ["written-during-outage"]
+    assert find_package(client, "written-during-outage") is None
+
+    end_outage(monkeypatch)
+    assert find_package(client, "written-during-outage")["title"] == package["title"]
+    assert server.write_behind_journal.read() == ([], 0)
+
+
+def test_fallback_write_is_replayed_while_mongo_is_up(client, monkeypatch):
+    collection_type = type(server.db["packages"])
+    insert_one = collection_type.insert_one
+    failures = []
+
+    async def flaky_insert_one(self, *args, **kwargs):
+        if self.name == "packages" and not failures:
+            failures.append(1)
+            raise OperationFailure("write conflict")
+        return await insert_one(self, *args, **kwargs)
+
+    monkeypatch.setattr(collection_type, "insert_one", flaky_insert_one)
+    package = dict(server.sample_packages[0], id="fell-back")
+
+    assert client.post("/api/admin/packages", json=package).status_code == 200
+    assert failures
+    wait_for(lambda: find_package(client, "fell-back") is not None)
+    wait_for(lambda: server.write_behind_journal.read() == ([], 0))
+    assert server.mongo_breaker.state == server.mongo_breaker.CLOSED
+
+
+def test_rejected_journal_entries_are_dead_lettered(client, monkeypatch):
+    collection_type = type(server.db["packages"])
+    bulk_write = collection_type.bulk_write
+
+    async def rejecting_bulk_write(self, operations, **kwargs):
+        if self.name == "blog_posts":
+            raise BulkWriteError({"writeErrors": [{"index": 0, "errmsg": "invalid document"}], "upserted": []})
+        return await bulk_write(self, operations, **kwargs)
+
+    monkeypatch.setattr(collection_type, "bulk_write", rejecting_bulk_write)
+    client.portal.call(lambda: server.write_behind_journal.append(
+        server.upsert_entry("blog_posts", {"id": "bad-post"}),
+        server.upsert_entry("packages", dict(server.sample_packages[0], id="good-package")),
+    ))
+
+    assert client.portal.call(server.replay_write_behind_journal) == 2
+    assert find_package(client, "good-package") is not None
+    assert server.write_behind_journal.read() == ([], 0)
+    dead, _ = server.dead_letter_log.read()
+    assert [(entry["id"], entry["error"]) for entry in dead] == [("bad-post", "invalid document")]
+
+
+def test_replaying_twice_is_harmless(client):
+    record = dict(server.sample_packages[0], id="replayed")
+    for _ in range(2):
+        client.portal.call(lambda: server.write_behind_journal.append(server.upsert_entry("packages", record)))
+        client.portal.call(server.replay_write_behind_journal)
+
+    count = client.portal.call(lambda: server.db["packages"].count_documents({"id": "replayed"}))
+    assert count == 1
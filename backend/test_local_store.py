@@ -0,0 +1,87 @@
+"""Local store: snapshot plus operation log, reloaded on restart without MongoDB"""
+
+from datetime import datetime
+
+import pytest
+
+import server
+from conftest import wait_for
+
+COLLECTIONS = ("packages", "blog_posts", "destinations")
+
+
+@pytest.fixture
+def backend():
+    # The local store only persists storage when running without MongoDB
+    return "memory"
+
+
+@pytest.fixture
+def store(client, monkeypatch, tmp_path):
+    local_store = server.LocalStore(tmp_path / "store", snapshot_every=1000, commit_delay=0.001)
+    assert not local_store.load()
+    monkeypatch.setattr(server, "local_store", local_store)
+    yield local_store
+    client.portal.call(local_store.oplog.close)
+
+
+def post_blog(client, post_id: str, published_at: str):
+    post = {"id": post_id, "title": post_id, "content": "Body", "excerpt": "Excerpt", "author": "Editor",
+            "image": "https://example.com/image.jpg", "category": "News", "tags": [], "publishedAt": published_at}
+    assert client.post("/api/admin/blog", json=post).status_code == 200
+
+
+def stored_state():
+    return {name: {record["id"]: record for record in server.in_memory_data[name]} for name in COLLECTIONS}
+
+
+def restart(directory):
+    """Drop the in-memory data and load it back from ``directory``"""
+    for name in COLLECTIONS:
+        server.in_memory_data[name].replace_all([])
+    restored = server.LocalStore(directory)
+    assert restored.load()
+    return restored
+
+
+def test_snapshot_and_log_are_reloaded_on_restart(client, store):
+    post_blog(client, "before-snapshot", "2024-05-01T12:00:00+02:00")
+    client.portal.call(store.snapshot)
+    post_blog(client, "after-snapshot", "2024-05-02T08:30:00Z")
+    assert client.put("/api/destinations/1", json={"name": "Ubud"}).status_code == 200
+    assert client.delete("/api/destinations/2").status_code == 200
+    before = stored_state()
+
+    restored = restart(store.directory)
+
+    assert stored_state() == before
+    posts = server.in_memory_data["blog_posts"]
+    assert posts.get("before-snapshot")["publishedAt"] == datetime(2024, 5, 1, 10, 0)
+    assert posts.get("after-snapshot")["publishedAt"] == datetime(2024, 5, 2, 8, 30)
+    assert isinstance(restored.snapshot_created_at, datetime)
+    # Only what came after the snapshot is replayed from the log
+    assert restored.ops_since_snapshot == 3
+
+
+def test_status_rollups_are_kept_with_the_snapshot(client, store, monkeypatch):
+    for _ in range(3):
+        assert client.post("/api/status", json={"client_name": "probe"}).status_code == 200
+    wait_for(lambda: server.status_rollups.clients.get("probe", {}).get("count") == 3)
+    client.portal.call(store.snapshot)
+    monkeypatch.setattr(server, "status_rollups", server.StatusRollups())
+
+    restart(store.directory)
+
+    assert server.status_rollups.clients["probe"]["count"] == 3
+    assert sum(server.status_rollups.minutes.values()) == 3
+
+
+def test_snapshot_trims_the_log(client, store):
+    post_blog(client, "logged", "2024-05-01T10:00:00Z")
+    assert store.oplog.read()[0]
+
+    client.portal.call(store.snapshot)
+
+    assert store.oplog.read() == ([], 0)
+    restart(store.directory)
+    assert "logged" in server.in_memory_data["blog_posts"]
@@ -0,0 +1,83 @@
+"""Prometheus metrics: /api/metrics and the request middleware"""
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def backend():
+    return "memory"
+
+
+def scrape(client):
+    """Series name with labels -> value"""
+    response = client.get("/api/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    series = {}
+    for line in response.text.splitlines():
+        if line and not line.startswith("#"):
+            name, _, value = line.rpartition(" ")
+            series[name] = float(value)
+    return series
+
+
+def test_requests_are_counted_by_route_template(client):
+    series = 'http_requests_total{method="GET",route="/api/destinations/{destination_id}",status="200"}'
+    before = scrape(client).get(series, 0)
+
+    for destination_id in ("1", "2", "3"):
+        assert client.get(f"/api/destinations/{destination_id}").status_code == 200
+
+    assert scrape(client)[series] - before == 3
+
+
+def test_unknown_paths_share_one_label(client):
+    series = 'http_requests_total{method="GET",route="unmatched",status="404"}'
+    before = scrape(client).get(series, 0)
+
+    for n in range(3):
+        assert client.get(f"/api/no-such-route/{n}").status_code == 404
+
+    after = scrape(client)
+    assert after[series] - before == 3
+    assert not any("no-such-route" in name for name in after)
+
+
+def test_latency_and_size_histograms_follow_requests(client):
+    labels = 'method="GET",route="/api/destinations"'
+    before = scrape(client)
+
+    client.get("/api/destinations")
+
+    after = scrape(client)
+    for histogram in ("http_request_duration_seconds", "http_response_size_bytes"):
+        count = f"{histogram}_count{{{labels}}}"
+        assert after[count] - before.get(count, 0) == 1
+        assert after[f'{histogram}_bucket{{{labels},le="+Inf"}}'] == after[count]
+    size_sum = f"http_response_size_bytes_sum{{{labels}}}"
+    assert after[size_sum] > before.get(size_sum, 0)
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = server.Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe("/x", value=value)
+
+    lines = list(histogram.render())
+
+    assert lines[2:] == [
+        'latency_seconds_bucket{route="/x",le="0.1"} 1',
+        'latency_seconds_bucket{route="/x",le="1.0"} 2',
+        'latency_seconds_bucket{route="/x",le="+Inf"} 3',
+        'latency_seconds_sum{route="/x"} 5.55',
+        'latency_seconds_count{route="/x"} 3',
+    ]
+
+
+def test_label_values_are_escaped():
+    counter = server.Counter("events_total", "Events", ("name",))
+    counter.inc('say "hi"\n')
+
+    assert list(counter.render())[-1] == 'events_total{name="say \\"hi\\"\\n"} 1'
@@ -0,0 +1,83 @@
+"""Group commit and crash recovery of the append-only operation log"""
+
+import asyncio
+
+import server
+
+
+def test_concurrent_appends_share_one_fsync(tmp_path):
+    log = server.AppendOnlyLog(tmp_path / "log.jsonl", commit_delay=0.01)
+
+    async def scenario():
+        await asyncio.gather(*(log.append({"n": n}) for n in range(50)))
+        await log.close()
+
+    asyncio.run(scenario())
+
+    assert log.commits == 1
+    entries, offset = log.read()
+    assert [entry["n"] for entry in entries] == list(range(50))
+    assert offset == (tmp_path / "log.jsonl").stat().st_size
+
+
+def test_appends_after_a_commit_start_a_new_batch(tmp_path):
+    log = server.AppendOnlyLog(tmp_path / "log.jsonl", commit_delay=0.001)
+
+    async def scenario():
+        await log.append({"n": 0})
+        await log.append({"n": 1})
+        await log.close()
+
+    asyncio.run(scenario())
+
+    assert log.commits == 2
+
+
+def test_torn_final_line_is_ignored(tmp_path):
+    path = tmp_path / "log.jsonl"
+    log = server.AppendOnlyLog(path)
+
+    async def scenario():
+        await log.append({"n": 0}, {"n": 1})
+        await log.close()
+
+    asyncio.run(scenario())
+    complete = path.stat().st_size
+    with open(path, "ab") as log_file:
+        log_file.write(b'{"n": 2')
+
+    entries, offset = log.read()
+
+    assert [entry["n"] for entry in entries] == [0, 1]
+    assert offset == complete
+
+
+def test_discard_through_keeps_later_appends(tmp_path):
+    log = server.AppendOnlyLog(tmp_path / "log.jsonl")
+
+    async def scenario():
+        await log.append({"n": 0}, {"n": 1})
+        _, offset = log.read()
+        await log.append({"n": 2})
+        await log.discard_through(offset)
+        await log.append({"n": 3})
+        await log.close()
+
+    asyncio.run(scenario())
+
+    entries, _ = log.read()
+    assert [entry["n"] for entry in entries] == [2, 3]
+
+
+def test_datetimes_round_trip(tmp_path):
+    log = server.AppendOnlyLog(tmp_path / "log.jsonl")
+    record = server.Package(**server.sample_packages[0]).model_dump()
+
+    async def scenario():
+        await log.append(server.upsert_entry("packages", record))
+        await log.close()
+
+    asyncio.run(scenario())
+
+    entries, _ = log.read()
+    assert entries[0]["record"] == record
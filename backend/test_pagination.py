@@ -0,0 +1,120 @@
+"""Cursor pagination must return the same pages on MongoDB and in-memory storage"""
+
+import pytest
+
+import server
+
+PACKAGE_COUNT = 23
+CATEGORIES = ("Beach", "City", "Mountain")
+
+
+def make_packages():
+    packages = []
+    for i in range(PACKAGE_COUNT):
+        package = dict(server.sample_packages[0])
+        package.update(
+            id=f"pkg-{i:02d}",
+            # Few distinct prices, so ties have to be broken by id
+            price=float(100 * (i % 5)),
+            rating=round(3 + (i % 4) * 0.5, 1),
+            category=CATEGORIES[i % 3],
+        )
+        packages.append(package)
+    return packages
+
+
+def make_blog_posts():
+    # Mixed naive and timezone-aware timestamps, as different clients send them
+    published = [
+        "2024-05-01T10:00:00Z",
+        "2024-05-01T12:00:00+02:00",
+        "2024-05-02T08:30:00",
+        "2024-04-30T23:59:59Z",
+        "2024-05-03T00:00:00",
+        "2024-05-02T08:30:00Z",
+    ]
+    return [
+        {
+            "id": f"post-{i}",
+            "title": f"Post {i}",
+            "content": "Body",
+            "excerpt": "Excerpt",
+            "author": "Editor",
+            "image": "https://example.com/image.jpg",
+            "category": "News",
+            "tags": [],
+            "publishedAt": published_at,
+        }
+        for i, published_at in enumerate(published)
+    ]
+
+
+@pytest.fixture
+def catalog(client):
+    server.in_memory_data["packages"].replace_all([])
+    server.in_memory_data["blog_posts"].replace_all([])
+    packages = make_packages()
+    response = client.post("/api/admin/packages/bulk", json=packages)
+    assert response.json()["summary"]["created"] == PACKAGE_COUNT
+    response = client.post("/api/admin/blog/bulk", json=make_blog_posts())
+    assert response.json()["summary"]["created"] == len(make_blog_posts())
+    return packages
+
+
+def walk(client, url: str):
+    """Follow next cursors from ``url`` and return the ids of every page"""
+    pages = []
+    cursor = None
+    while True:
+        separator = "&" if "?" in url else "?"
+        response = client.get(url + (f"{separator}cursor={cursor}" if cursor else ""))
+        assert response.status_code == 200
+        body = response.json()
+        pages.append([item["id"] for item in body["items"]])
+        cursor = body["next"]
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("limit", [1, 4, 50])
+@pytest.mark.parametrize("sort", [None, "price", "-price", "rating"])
+def test_package_pages_follow_sort_order(client, catalog, sort, limit):
+    field = sort.lstrip("-") if sort else "id"
+    descending = bool(sort) and sort.startswith("-")
+    expected = [p["id"] for p in sorted(catalog, key=lambda p: (p[field], p["id"]), reverse=descending)]
+
+    url = f"/api/packages?limit={limit}" + (f"&sort={sort}" if sort else "")
+    pages = walk(client, url)
+
+    assert [record_id for page in pages for record_id in page] == expected
+    assert all(len(page) == limit for page in pages[:-1])
+
+
+def test_filtered_pages_only_contain_matches(client, catalog):
+    expected = [
+        p["id"] for p in sorted(catalog, key=lambda p: (p["price"], p["id"]))
+        if p["category"] == "City" and p["price"] >= 200
+    ]
+
+    pages = walk(client, "/api/packages?limit=3&sort=price&category=City&min_price=200")
+
+    assert [record_id for page in pages for record_id in page] == expected
+
+
+def test_blog_pages_are_newest_first_across_timezones(client, catalog):
+    pages = walk(client, "/api/blog?limit=2")
+
+    ids = [record_id for page in pages for record_id in page]
+    assert ids == ["post-4", "post-5", "post-2", "post-1", "post-0", "post-3"]
+
+
+def test_summary_view_pages_carry_only_summary_fields(client, catalog):
+    body = client.get("/api/packages?limit=5&view=summary").json()
+
+    assert set(body["items"][0]) == set(server.SUMMARY_FIELDS["packages"])
+
+
+def test_invalid_cursor_is_rejected(client, catalog):
+    response = client.get("/api/packages?limit=5&cursor=not-a-cursor")
+
+    assert response.status_code == 400
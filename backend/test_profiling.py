@@ -0,0 +1,80 @@
+"""On-demand request profiling behind the admin profile token"""
+
+import marshal
+from collections import OrderedDict
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+TOKEN = "secret"
+
+
+@pytest.fixture
+def backend():
+    return "memory"
+
+
+@pytest.fixture
+def profiled(client, monkeypatch):
+    """A client of the app wrapped in ProfilingMiddleware, as it is when PROFILE_TOKEN is set"""
+    monkeypatch.setattr(server, "PROFILE_TOKEN", TOKEN)
+    monkeypatch.setattr(server, "stored_profiles", OrderedDict())
+    monkeypatch.setattr(server, "profiling_busy", False)
+    return TestClient(server.ProfilingMiddleware(server.app))
+
+
+def admin(client, path: str = "", token: str = TOKEN, **params):
+    return client.get(server.PROFILES_PATH + path, headers={server.PROFILE_HEADER: token}, params=params)
+
+
+def test_profiles_are_hidden_when_profiling_is_disabled(client):
+    assert admin(client).status_code == 404
+
+
+def test_wrong_token_is_refused(profiled):
+    assert admin(profiled, token="guess").status_code == 403
+    response = profiled.get("/api/destinations", headers={server.PROFILE_HEADER: "guess"})
+    assert "x-profile-id" not in response.headers
+    assert server.stored_profiles == {}
+
+
+def test_request_with_the_token_is_profiled(profiled):
+    response = profiled.get("/api/destinations", headers={server.PROFILE_HEADER: TOKEN})
+    profile_id = response.headers["x-profile-id"]
+
+    [summary] = admin(profiled).json()
+    detail = admin(profiled, f"/{profile_id}").json()
+
+    assert summary["id"] == profile_id
+    assert (summary["method"], summary["path"], summary["status"]) == ("GET", "/api/destinations", 200)
+    assert set(summary["phases_ms"]) == {"validation", "storage", "serialization", "other"}
+    assert "cumulative" in detail["report"]
+
+
+def test_profile_token_in_the_query_string(profiled):
+    response = profiled.get("/api/destinations", params={server.PROFILE_QUERY_PARAM: TOKEN})
+
+    assert response.headers["x-profile-id"] in server.stored_profiles
+
+
+def test_profile_downloads(profiled):
+    profile_id = profiled.get("/api/destinations", headers={server.PROFILE_HEADER: TOKEN}).headers["x-profile-id"]
+
+    text = admin(profiled, f"/{profile_id}", format="text")
+    raw = admin(profiled, f"/{profile_id}", format="pstats")
+
+    assert text.headers["content-type"].startswith("text/plain")
+    assert "function calls" in text.text
+    assert marshal.loads(raw.content) == server.stored_profiles[profile_id].stats
+    assert admin(profiled, "/missing").status_code == 404
+
+
+def test_only_the_newest_profiles_are_kept(profiled, monkeypatch):
+    monkeypatch.setattr(server, "MAX_STORED_PROFILES", 2)
+
+    ids = [profiled.get("/api/destinations", headers={server.PROFILE_HEADER: TOKEN}).headers["x-profile-id"]
+           for _ in range(3)]
+
+    assert [summary["id"] for summary in admin(profiled).json()] == [ids[2], ids[1]]
@@ -0,0 +1,163 @@
+"""Full-text search: BM25 ranking, top-k pruning and index rebuilds"""
+
+import asyncio
+import math
+import random
+
+import pytest
+
+import server
+
+REBUILD_SEARCH_INDEX = server.rebuild_search_index
+
+
+def package(package_id: str, title: str, description: str = "A trip") -> dict:
+    return {"id": package_id, "title": title, "description": description, "destination": "Bali",
+            "highlights": [], "price": 100, "rating": 4.5, "image": "https://example.com/image.jpg"}
+
+
+def hit_ids(index, query: str, **options):
+    return [summary["id"] for _, _, summary in index.search(query, **options)]
+
+
+def exhaustive(index, query: str, limit: int = 10):
+    """Scores of the top ``limit`` documents, every posting of every query term scored"""
+    tokens = server.tokenize(query)
+    doc_count = len(index._doc_lengths)
+    average_length = index._total_length / doc_count
+    scores = {}
+    for position, token in enumerate(tokens):
+        terms = index._expand(token) if position == len(tokens) - 1 else [token]
+        best = {}
+        for term in terms:
+            postings = index._postings.get(term, {})
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_key, frequency in postings.items():
+                norm = index.K1 * (1 - index.B + index.B * index._doc_lengths[doc_key] / average_length)
+                best[doc_key] = max(best.get(doc_key, 0.0), idf * frequency * (index.K1 + 1) / (frequency + norm))
+        for doc_key, score in best.items():
+            scores[doc_key] = scores.get(doc_key, 0.0) + score
+    return sorted(scores.values(), reverse=True)[:limit]
+
+
+@pytest.fixture
+def index():
+    index = server.SearchIndex()
+    index.add("package", package("title", "Komodo dragons", "Island hopping"))
+    index.add("package", package("description", "Island hopping", "Meet the Komodo dragons"))
+    index.add("blog", {"id": "post", "title": "Packing for Komodo", "content": "Dragons and reefs",
+                       "excerpt": "Tips", "tags": ["komodo"]})
+    return index
+
+
+def test_title_match_outranks_description_match(index):
+    assert hit_ids(index, "komodo", kind="package") == ["title", "description"]
+
+
+def test_kind_filter(index):
+    assert hit_ids(index, "komodo", kind="blog") == ["post"]
+    assert len(hit_ids(index, "komodo")) == 3
+
+
+def test_last_token_is_expanded_as_a_prefix(index):
+    assert set(hit_ids(index, "island kom")[:2]) == {"title", "description"}
+    assert hit_ids(index, "kom", prefix=False) == []
+
+
+def test_prefix_expansions_prefer_frequent_terms(monkeypatch):
+    monkeypatch.setattr(server.SearchIndex, "MAX_PREFIX_EXPANSIONS", 3)
+    index = server.SearchIndex()
+    for n, title in enumerate(["sun", "sunrise sunset", "sunset", "sunset sunny", "sunbed", "sunny"]):
+        index.add("package", package(str(n), title))
+
+    assert index._expand("sun") == ["sun", "sunset", "sunny"]
+    assert index._expand("s") == ["s"]
+
+
+def test_pruned_search_matches_exhaustive_scoring():
+    rng = random.Random(5)
+    words = [f"word{n}" for n in range(300)]
+    index = server.SearchIndex()
+    for n in range(2000):
+        index.add("package", package(str(n), " ".join(rng.choices(words, k=4)), " ".join(rng.choices(words, k=30))))
+
+    for _ in range(50):
+        query = " ".join(rng.choices(words, k=rng.randint(1, 3)))[:-1]
+        scores = [score for score, _, _ in index.search(query, 10)]
+        assert scores == pytest.approx(exhaustive(index, query))
+
+
+def test_writes_after_a_search_are_found():
+    rng = random.Random(6)
+    words = [f"word{n}" for n in range(100)]
+    index = server.SearchIndex()
+    for n in range(500):
+        index.add("package", package(str(n), " ".join(rng.choices(words, k=3)), " ".join(rng.choices(words, k=20))))
+    index.search("word1")
+
+    index.add("package", package("new", "word1 word1 word1"))
+    index.add("package", package("3", "Renamed"))
+    index.remove("package", "4")
+
+    assert hit_ids(index, "word1", limit=1) == ["new"]
+    assert not {"3", "4"} & set(hit_ids(index, "word1", limit=500))
+    assert [score for score, _, _ in index.search("word1", 10)] == pytest.approx(exhaustive(index, "word1"))
+
+
+def test_common_terms_still_fill_the_results():
+    index = server.SearchIndex()
+    for n in range(100):
+        index.add("package", package(str(n), f"Bali trip {n}"))
+
+    assert len(index.search("bali", limit=20)) == 20
+
+
+@pytest.fixture
+def ready_during_rebuild(monkeypatch):
+    """Record whether the app already reported ready while the startup index build ran"""
+    states = []
+
+    async def rebuild():
+        states.append(server.startup_state["ready"])
+        await REBUILD_SEARCH_INDEX()
+
+    monkeypatch.setattr(server, "rebuild_search_index", rebuild)
+    return states
+
+
+def test_ready_only_after_the_index_is_built(ready_during_rebuild, client):
+    assert ready_during_rebuild == [False]
+    assert client.get("/api/search", params={"q": "bali"}).json()["results"]
+
+
+def test_rebuild_yields_to_the_event_loop(client, monkeypatch):
+    monkeypatch.setattr(server, "SEARCH_INDEX_BATCH_SIZE", 1)
+    ticks = []
+
+    async def scenario():
+        async def ticker():
+            while True:
+                ticks.append(None)
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(ticker())
+        await server.rebuild_search_index()
+        task.cancel()
+
+    client.portal.call(scenario)
+
+    assert len(ticks) >= len(server.search_index) - 1
+
+
+def test_writes_during_a_rebuild_reach_the_new_index(client):
+    async def scenario():
+        rebuild = asyncio.create_task(server.rebuild_search_index())
+        await asyncio.sleep(0)
+        server.index_for_search("packages", package("new", "Komodo sailing"))
+        server.unindex_for_search("packages", "1")
+        await rebuild
+
+    client.portal.call(scenario)
+
+    assert hit_ids(server.search_index, "komodo") == ["new"]
+    assert "1" not in hit_ids(server.search_index, "bali", limit=50)
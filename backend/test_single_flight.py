@@ -0,0 +1,97 @@
+"""Request coalescing: concurrent identical loads share one flight"""
+
+import asyncio
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def backend():
+    return "mongo"
+
+
+def test_concurrent_calls_share_one_load():
+    flights = server.SingleFlight()
+    loads = []
+
+    async def load():
+        loads.append(None)
+        await asyncio.sleep(0.01)
+        return {"value": 1}
+
+    async def scenario():
+        results = await asyncio.gather(*(flights.do("key", load, "test") for _ in range(10)))
+        return results, len(flights)
+
+    results, inflight = asyncio.run(scenario())
+
+    assert len(loads) == 1
+    assert all(result is results[0] for result in results)
+    assert inflight == 0
+
+
+def test_different_keys_load_separately():
+    flights = server.SingleFlight()
+
+    async def scenario():
+        return await asyncio.gather(*(flights.do(n, lambda n=n: asyncio.sleep(0.01, n), "test") for n in range(3)))
+
+    assert asyncio.run(scenario()) == [0, 1, 2]
+
+
+def test_failure_reaches_every_caller_and_the_next_call_retries():
+    flights = server.SingleFlight()
+    loads = []
+
+    async def load():
+        loads.append(None)
+        await asyncio.sleep(0.01)
+        if len(loads) == 1:
+            raise RuntimeError("storage down")
+        return "ok"
+
+    async def scenario():
+        failures = await asyncio.gather(*(flights.do("key", load, "test") for _ in range(3)), return_exceptions=True)
+        return failures, await flights.do("key", load, "test")
+
+    failures, retried = asyncio.run(scenario())
+
+    assert [type(failure) for failure in failures] == [RuntimeError] * 3
+    assert retried == "ok"
+    assert len(loads) == 2
+
+
+def test_cancelled_caller_leaves_the_load_running():
+    flights = server.SingleFlight()
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def load():
+            await release.wait()
+            return "done"
+
+        first = asyncio.create_task(flights.do("key", load, "test"))
+        second = asyncio.create_task(flights.do("key", load, "test"))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return first.cancelled(), await second
+
+    assert asyncio.run(scenario()) == (True, "done")
+
+
+def test_concurrent_storage_reads_are_coalesced(client):
+    label = ("get_data_or_memory:packages",)
+    before = server.singleflight_coalesced_total.values.get(label, 0)
+
+    async def scenario():
+        return await asyncio.gather(*(server.get_data_or_memory("packages", []) for _ in range(5)))
+
+    results = client.portal.call(scenario)
+
+    assert server.singleflight_coalesced_total.values.get(label, 0) - before == 4
+    assert all(result is results[0] for result in results)
@@ -0,0 +1,27 @@
+"""Startup: choosing the storage backend"""
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def backend():
+    return "memory"
+
+
+def test_empty_mongo_url_starts_in_memory_without_connecting(client, monkeypatch):
+    attempts = []
+
+    async def connect_to_mongo():
+        attempts.append(None)
+
+    monkeypatch.setattr(server, "MONGO_URL", "")
+    monkeypatch.setattr(server, "connect_to_mongo", connect_to_mongo)
+    monkeypatch.setattr(server, "startup_state", {"ready": False, "database": "connecting", "seeded": False})
+
+    client.portal.call(server.initialize_storage)
+
+    assert attempts == []
+    assert server.db is None
+    assert server.startup_state == {"ready": True, "database": "in_memory", "seeded": True}
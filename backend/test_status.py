@@ -0,0 +1,75 @@
+"""Status checks: rollup summary and retention"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+import server
+from conftest import wait_for
+
+
+def summary(client, **params):
+    response = client.get("/api/status/summary", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def ttl_indexes(client, collection_name: str):
+    async def read():
+        return await server.db[collection_name].index_information()
+
+    return {name: info for name, info in client.portal.call(read).items() if "expireAfterSeconds" in info}
+
+
+def test_summary_counts_checks_per_client_and_minute(client):
+    for client_name in ("alpha", "alpha", "alpha", "beta", "beta"):
+        assert client.post("/api/status", json={"client_name": client_name}).status_code == 200
+    wait_for(lambda: summary(client)["total"] == 5)
+
+    result = summary(client)
+
+    assert result["clientCount"] == 2
+    assert {item["client_name"]: item["count"] for item in result["clients"]} == {"alpha": 3, "beta": 2}
+    assert sum(item["count"] for item in result["minutes"]) == 5
+    assert result["retentionSeconds"] == server.STATUS_RETENTION_SECONDS
+
+
+@pytest.mark.parametrize("backend", ["mongo"])
+def test_zero_retention_drops_the_ttl_indexes(client, monkeypatch):
+    # Created at startup with the default retention
+    assert ttl_indexes(client, "status_checks")
+    assert ttl_indexes(client, server.STATUS_MINUTES_COLLECTION)
+
+    monkeypatch.setattr(server, "STATUS_RETENTION_SECONDS", 0)
+    client.portal.call(server.ensure_indexes)
+
+    assert ttl_indexes(client, "status_checks") == {}
+    assert ttl_indexes(client, server.STATUS_MINUTES_COLLECTION) == {}
+
+    async def read():
+        return await server.db[server.STATUS_MINUTES_COLLECTION].index_information()
+
+    assert client.portal.call(read)["minute_1"]["unique"]
+
+
+def test_memory_rollups_drop_minutes_past_retention(monkeypatch):
+    monkeypatch.setattr(server, "STATUS_RETENTION_SECONDS", 3600)
+    rollups = server.StatusRollups()
+    now = datetime.utcnow()
+
+    rollups.record([{"client_name": "old", "timestamp": now - timedelta(hours=2)},
+                    {"client_name": "new", "timestamp": now}])
+
+    assert list(rollups.minutes) == [server.status_minute(now)]
+    # Per-client totals outlive retention
+    assert set(rollups.clients) == {"old", "new"}
+
+
+def test_memory_rollups_are_kept_with_zero_retention(monkeypatch):
+    monkeypatch.setattr(server, "STATUS_RETENTION_SECONDS", 0)
+    rollups = server.StatusRollups()
+    old = datetime.utcnow() - timedelta(days=30)
+
+    rollups.record([{"client_name": "old", "timestamp": old}])
+
+    assert rollups.minutes == {server.status_minute(old): 1}
@@ -0,0 +1,95 @@
+"""Status check ingestion: batching and backpressure"""
+
+import asyncio
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def backend():
+    return "memory"
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    """Batch sizes handed to store_status_checks"""
+    batches = []
+
+    async def store_status_checks(checks):
+        batches.append(len(checks))
+
+    monkeypatch.setattr(server, "store_status_checks", store_status_checks)
+    return batches
+
+
+def check(n: int) -> dict:
+    return {"id": str(n), "client_name": "probe"}
+
+
+def test_full_batches_are_written_together(stored):
+    buffer = server.StatusIngestBuffer(batch_size=50, flush_interval=1.0, max_pending=1000, enqueue_timeout=0.1)
+
+    async def scenario():
+        for n in range(120):
+            assert await buffer.submit(check(n))
+        await buffer.close()
+
+    asyncio.run(scenario())
+
+    assert stored == [50, 50, 20]
+
+
+def test_partial_batch_is_written_after_the_flush_interval(stored):
+    buffer = server.StatusIngestBuffer(batch_size=50, flush_interval=0.01, max_pending=1000, enqueue_timeout=0.1)
+
+    async def scenario():
+        for n in range(3):
+            await buffer.submit(check(n))
+        await asyncio.sleep(0.1)
+        flushed = list(stored)
+        await buffer.close()
+        return flushed
+
+    assert asyncio.run(scenario()) == [3]
+
+
+def test_full_buffer_refuses_checks_until_there_is_room(monkeypatch):
+    batches = []
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def store_status_checks(checks):
+            await release.wait()
+            batches.append(len(checks))
+
+        monkeypatch.setattr(server, "store_status_checks", store_status_checks)
+        buffer = server.StatusIngestBuffer(batch_size=5, flush_interval=0.01, max_pending=10, enqueue_timeout=0.05)
+        for n in range(10):
+            assert await buffer.submit(check(n))
+        # The flusher takes one batch and blocks writing it
+        await asyncio.sleep(0.01)
+        for n in range(10, 15):
+            assert await buffer.submit(check(n))
+
+        refused = not await buffer.submit(check(15))
+
+        release.set()
+        await buffer.close()
+        return refused
+
+    assert asyncio.run(scenario())
+    assert sum(batches) == 15
+
+
+def test_full_buffer_answers_503(client, monkeypatch):
+    monkeypatch.setattr(server, "status_buffer", server.StatusIngestBuffer(
+        batch_size=1, flush_interval=0.01, max_pending=0, enqueue_timeout=0.01,
+    ))
+
+    response = client.post("/api/status", json={"client_name": "probe"})
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"